@@ -3,6 +3,8 @@ Controllers package
 Contains HTTP request handlers (API endpoints)
 """
 from .student_controller import router as student_router
+from .metrics_controller import router as metrics_router
+from .analytics_controller import router as analytics_router
 
-__all__ = ["student_router"]
+__all__ = ["student_router", "metrics_router", "analytics_router"]
 
@@ -0,0 +1,134 @@
+"""
+Analytics Controller
+API dữ liệu biểu đồ: số liệu đã tổng hợp từ bảng students dạng JSON, client tự vẽ
+
+Thay cho việc lấy ảnh PNG trong file zip của /api/students/crawl-students.
+Mỗi response có "version" (version change log), dữ liệu được cache tới khi có ghi.
+"""
+
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.monitoring import query_budget
+from app.schemas import (
+    AgeScoresResponse,
+    CorrelationResponse,
+    HometownScoresResponse,
+    ScoreDistributionResponse
+)
+from app.services import AnalyticsService
+from app.utils import precompressed_response
+
+router = APIRouter(
+    prefix="/api/analytics",
+    tags=["analytics"]
+)
+
+
+@router.get("/hometown-scores", response_model=HometownScoresResponse)
+@query_budget(2)  # version change log + GROUP BY (cache hit: 1)
+def get_hometown_scores(
+    request: Request,
+    top: int = Query(5, ge=0, le=1000, description="Số quê quán đông sinh viên nhất (0 = tất cả)"),
+    db: Session = Depends(get_db)
+):
+    """
+    API: Điểm trung bình từng môn theo quê quán (biểu đồ cột nhóm)
+    
+    Method: GET
+    Endpoint: /api/analytics/hometown-scores
+    
+    Query Parameters:
+        - top: Số quê quán đông sinh viên nhất (mặc định: 5, 0 = tất cả)
+    
+    Response: HometownScoresResponse
+        {
+            "version": 1024,
+            "hometowns": [
+                {"hometown": "Hà Nội", "students": 120, "math_score": 7.41,
+                 "literature_score": 6.9, "english_score": 7.02},
+                ...
+            ]
+        }
+    """
+    body = AnalyticsService(db).hometown_scores_body(top=top)
+    return precompressed_response(body, request.headers.get("accept-encoding", ""))
+
+
+@router.get("/english-by-hometown", response_model=HometownScoresResponse)
+@query_budget(2)
+def get_english_by_hometown(request: Request, db: Session = Depends(get_db)):
+    """
+    API: Điểm Anh trung bình của tất cả quê quán, tăng dần (biểu đồ cột ngang)
+    
+    Method: GET
+    Endpoint: /api/analytics/english-by-hometown
+    
+    Response: HometownScoresResponse (quê quán không có điểm Anh nằm cuối, english_score null)
+    """
+    body = AnalyticsService(db).english_by_hometown_body()
+    return precompressed_response(body, request.headers.get("accept-encoding", ""))
+
+
+@router.get("/scores-by-age", response_model=AgeScoresResponse)
+@query_budget(2)
+def get_scores_by_age(request: Request, db: Session = Depends(get_db)):
+    """
+    API: Điểm trung bình từng môn theo tuổi (biểu đồ đường)
+    
+    Method: GET
+    Endpoint: /api/analytics/scores-by-age
+    
+    Response: AgeScoresResponse
+        {
+            "version": 1024,
+            "ages": [{"age": 18, "students": 250, "math_score": 7.1, ...}, ...]
+        }
+    """
+    body = AnalyticsService(db).scores_by_age_body()
+    return precompressed_response(body, request.headers.get("accept-encoding", ""))
+
+
+@router.get("/correlation", response_model=CorrelationResponse)
+@query_budget(2)
+def get_correlation(request: Request, db: Session = Depends(get_db)):
+    """
+    API: Ma trận tương quan giữa các môn và điểm trung bình (heatmap)
+    
+    Method: GET
+    Endpoint: /api/analytics/correlation
+    
+    Response: CorrelationResponse
+        {
+            "version": 1024,
+            "columns": ["math_score", "literature_score", "english_score", "avg_score"],
+            "matrix": [[1.0, 0.02, -0.01, 0.58], ...]
+        }
+    """
+    body = AnalyticsService(db).correlation_body()
+    return precompressed_response(body, request.headers.get("accept-encoding", ""))
+
+
+@router.get("/score-distribution", response_model=ScoreDistributionResponse)
+@query_budget(2)
+def get_score_distribution(request: Request, db: Session = Depends(get_db)):
+    """
+    API: Tứ phân vị / whisker / outlier của từng môn (box plot)
+    
+    Method: GET
+    Endpoint: /api/analytics/score-distribution
+    
+    Response: ScoreDistributionResponse
+        {
+            "version": 1024,
+            "subjects": [
+                {"subject": "math_score", "count": 1000, "mean": 6.52, "min": 0.0,
+                 "q1": 5.0, "median": 6.5, "q3": 8.25, "max": 10.0,
+                 "whisker_low": 0.5, "whisker_high": 10.0, "outliers": [[0.0, 3]]},
+                ...
+            ]
+        }
+    """
+    body = AnalyticsService(db).score_distribution_body()
+    return precompressed_response(body, request.headers.get("accept-encoding", ""))
@@ -0,0 +1,36 @@
+"""
+Metrics Controller
+Endpoint /metrics cho Prometheus scrape
+"""
+
+from fastapi import APIRouter, Response
+
+from app.monitoring.metrics import CONTENT_TYPE_LATEST, render_metrics
+
+router = APIRouter(tags=["Monitoring"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    API: Metrics theo Prometheus text format
+    
+    Method: GET
+    Endpoint: /metrics
+    
+    Bao gồm:
+        - http_request_duration_seconds: latency histogram theo route template
+        - http_requests_in_flight: số request đang xử lý theo route template
+        - db_pool_*: thời gian chờ checkout, kích thước pool
+        - cache_requests_total: số lần hit/miss của từng cache
+        - crawl_stage_duration_seconds: thời gian từng stage của crawl pipeline
+        - analytics_snapshot_*: bộ nhớ / số row / số lần nạp lại snapshot analytics
+    
+    Nhiều worker: có PROMETHEUS_MULTIPROC_DIR (run.py production tự đặt) thì là tổng
+    của mọi worker (counter / histogram cộng dồn, gauge cộng của các worker đang
+    chạy); không có thì chỉ là số liệu của worker nhận request.
+    
+    Example:
+        curl http://localhost:8000/metrics
+    """
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
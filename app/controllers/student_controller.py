@@ -4,25 +4,30 @@ Lớp xử lý HTTP requests/responses
 Định nghĩa các API endpoints và gọi service
 """
 
-from fastapi import APIRouter, Depends, Query, Response
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Literal, Optional
 
-from app.database import get_db
-from app.services import StudentService
+from app.database import get_db, SessionLocal
+from app.monitoring import query_budget
+from app.services import StudentService, CrawlService
+from app.utils import precompressed_response
+from app.schemas.student import CHANGE_FEED_MAX_LIMIT
 from app.schemas import (
     StudentCreate,
     StudentUpdate,
     StudentResponse,
     StudentListResponse,
-    MessageResponse
+    MessageResponse,
+    StudentBulkUpdateItem,
+    StudentBulkDeleteRequest,
+    BulkOperationResponse,
+    StudentBatchGetRequest,
+    StudentBatchGetResponse,
+    StudentChangeFeedResponse
 )
-
-from app.crawling.clean_data import clean_student_data
-from app.crawling.students_crawl import crawl_students
-from app.crawling.analysis_data import analysis_data
 import os
-from zipfile import ZipFile
 
 # Tạo router cho student endpoints
 router = APIRouter(
@@ -32,6 +37,7 @@ router = APIRouter(
 
 
 @router.post("/", response_model=StudentResponse, status_code=201)
+@query_budget(3)  # INSERT quê quán mới + INSERT + change log
 def create_student(
     student: StudentCreate,
     db: Session = Depends(get_db)
@@ -77,7 +83,9 @@ def create_student(
 
 
 @router.get("/", response_model=StudentListResponse)
+@query_budget(3)  # version change log + SELECT trang + COUNT
 def get_students(
+    request: Request,
     skip: int = Query(
         0, 
         ge=0, 
@@ -134,10 +142,173 @@ def get_students(
           GET /api/students/?search=Nguyen&skip=0&limit=10
     """
     service = StudentService(db)
-    return service.get_all_students(skip=skip, limit=limit, search=search)
+    # Fast path: service trả JSON bytes đã serialize sẵn (kèm bản nén lưu trong cache),
+    # trả thẳng Response để FastAPI không validate lại từng row theo response_model
+    body = service.get_all_students_body(skip=skip, limit=limit, search=search)
+    return precompressed_response(body, request.headers.get("accept-encoding", ""))
+
+
+@router.get("/export")
+def export_students(
+    format: Literal["csv", "ndjson", "parquet"] = Query(
+        "csv",
+        description="Định dạng file export (csv, ndjson, parquet)"
+    ),
+    search: Optional[str] = Query(
+        None,
+        description="Từ khóa tìm kiếm (giống API lấy danh sách)"
+    )
+):
+    """
+    API: Export toàn bộ sinh viên (streaming)
+    
+    Method: GET
+    Endpoint: /api/students/export
+    
+    Query Parameters:
+        - format: csv | ndjson | parquet (mặc định: csv)
+        - search: Từ khóa tìm kiếm (optional, giống GET /api/students/)
+    
+    Response: File stream (Content-Disposition: attachment)
+        Dữ liệu được đọc theo batch và gửi dần về client, bộ nhớ server
+        không tăng theo số lượng sinh viên.
+    
+    Errors:
+        - 400: Format không hỗ trợ / thiếu pyarrow cho parquet
+    
+    Example:
+        GET /api/students/export?format=ndjson&search=Nguyen
+    """
+    media_type, extension = StudentService.check_export_format(format)
+
+    # Session riêng cho stream: session của Depends(get_db) đã đóng
+    # trước khi StreamingResponse bắt đầu gửi body
+    def stream():
+        with SessionLocal() as db:
+            yield from StudentService(db).export_students(format, search=search)
+
+    return StreamingResponse(
+        stream(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="students.{extension}"'}
+    )
+
+
+@router.get("/changes", response_model=StudentChangeFeedResponse)
+@query_budget(2)
+def get_student_changes(
+    since: int = Query(
+        0,
+        ge=0,
+        description="Version đã đồng bộ tới (0 = từ đầu)"
+    ),
+    limit: int = Query(
+        1000,
+        ge=1,
+        le=CHANGE_FEED_MAX_LIMIT,
+        description=f"Số thay đổi tối đa trả về (1-{CHANGE_FEED_MAX_LIMIT})"
+    ),
+    db: Session = Depends(get_db)
+):
+    """
+    API: Change feed - các sinh viên thay đổi sau version `since`
+    
+    Method: GET
+    Endpoint: /api/students/changes
+    
+    Query Parameters:
+        - since: Version đã đồng bộ tới (mặc định: 0 = toàn bộ)
+        - limit: Số thay đổi tối đa (mặc định: 1000, max: 5000)
+    
+    Response: StudentChangeFeedResponse
+        {
+            "since": 120,
+            "next_since": 125,
+            "has_more": false,
+            "changes": [
+                {"version": 123, "op": "upsert", "student_id": 5, "student_code": "SV005", "student": {...}},
+                {"version": 125, "op": "delete", "student_id": 9, "student_code": "SV009", "student": null}
+            ]
+        }
+    
+    Errors:
+        - 410: Change log cũ đã bị compact, client phải đồng bộ lại từ since=0
+    
+    Use case:
+        - Service khác đồng bộ incremental thay vì tải lại toàn bộ
+          GET /api/students/ mỗi vài phút
+    """
+    service = StudentService(db)
+    body = service.get_changes_json(since=since, limit=limit)
+    return Response(content=body, media_type="application/json")
+
+
+@router.post("/batch-get", response_model=StudentBatchGetResponse)
+@query_budget(2)
+def batch_get_students(
+    request: StudentBatchGetRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    API: Lấy nhiều sinh viên theo danh sách id và/hoặc mã sinh viên
+    
+    Method: POST
+    Endpoint: /api/students/batch-get
+    
+    Request Body: StudentBatchGetRequest (tối đa 1000 khóa)
+        {
+            "ids": [1, 5],
+            "student_codes": ["SV20240001", "SV99999999"]
+        }
+    
+    Response: StudentBatchGetResponse (đúng thứ tự request: ids trước, rồi student_codes)
+        {
+            "found": 3,
+            "not_found": 1,
+            "results": [
+                {"id": 1, "student_code": null, "found": true, "student": {...}},
+                {"id": 5, "student_code": null, "found": true, "student": {...}},
+                {"id": null, "student_code": "SV20240001", "found": true, "student": {...}},
+                {"id": null, "student_code": "SV99999999", "found": false, "student": null}
+            ]
+        }
+    
+    Errors:
+        - 422: Không có khóa nào / quá 1000 khóa
+    
+    Use case:
+        - Service khác resolve danh sách mã sinh viên trong 1 request
+          thay vì gọi GET /api/students/{id} cho từng sinh viên
+    """
+    service = StudentService(db)
+    body = service.batch_get_students_json(request)
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/by-code/{student_code}", response_model=StudentResponse)
+@query_budget(1)
+def get_student_by_code(
+    student_code: str,
+    db: Session = Depends(get_db)
+):
+    """
+    API: Lấy thông tin 1 sinh viên theo mã sinh viên
+    
+    Method: GET
+    Endpoint: /api/students/by-code/{student_code}
+    
+    Errors:
+        - 404: Không tìm thấy sinh viên
+    
+    Example:
+        GET /api/students/by-code/SV20240001
+    """
+    service = StudentService(db)
+    return service.get_student_by_code(student_code)
 
 
 @router.get("/{student_id}", response_model=StudentResponse)
+@query_budget(1)
 def get_student(
     student_id: int,
     db: Session = Depends(get_db)
@@ -170,6 +341,7 @@ def get_student(
 
 
 @router.put("/{student_id}", response_model=StudentResponse)
+@query_budget(3)  # INSERT quê quán mới + UPDATE + change log
 def update_student(
     student_id: int,
     student: StudentUpdate,
@@ -215,6 +387,7 @@ def update_student(
 
 
 @router.delete("/{student_id}", response_model=MessageResponse)
+@query_budget(2)  # DELETE + change log
 def delete_student(
     student_id: int,
     db: Session = Depends(get_db)
@@ -245,6 +418,7 @@ def delete_student(
 
 
 @router.post("/bulk", response_model=MessageResponse)
+@query_budget(4)  # SELECT mã đã có + INSERT quê quán mới + INSERT + change log (mỗi chunk thêm được cộng vào)
 def bulk_create_students(
     students: list[StudentCreate],
     db: Session = Depends(get_db)
@@ -295,29 +469,109 @@ def bulk_create_students(
     return MessageResponse(message=message)
 
 
-@router.post("/crawl-students")
-def crawl_students_api():
-    # Step 1: Crawl data and export to CSV
-    url = os.getenv("STUDENTS_URL", "http://localhost:3000/students")
-    raw_filename = crawl_students(url)
-
-    # Step 2: Clean data
-    cleaned_filename = clean_student_data(raw_filename)
+@router.patch("/bulk", response_model=BulkOperationResponse)
+@query_budget(4)  # INSERT quê quán mới + SELECT id theo mã + UPDATE + change log
+def bulk_update_students(
+    items: list[StudentBulkUpdateItem],
+    db: Session = Depends(get_db)
+):
+    """
+    API: Cập nhật nhiều sinh viên cùng lúc (bulk update)
+    
+    Method: PATCH
+    Endpoint: /api/students/bulk
+    
+    Request Body: Array, mỗi phần tử xác định sinh viên bằng id HOẶC student_code
+        [
+            {"student_code": "SV001", "fields": {"math_score": 9.5}},
+            {"id": 2, "fields": {"english_score": 8.0, "literature_score": 7.0}}
+        ]
+    
+    Toàn bộ request chạy trong 1 transaction, dùng executemany UPDATE theo chunk.
+    Sinh viên không tồn tại được bỏ qua (không tính vào affected).
+    
+    Query budget (4) tính cho 1 tập field và không quá BULK_CHUNK_SIZE phần tử
+    (student_code được đổi sang id bằng 1 SELECT trước, nên trộn id và
+    student_code không tốn thêm câu nào). Mỗi tập field / chunk thêm vào tốn
+    thêm 1 câu và được cộng vào budget của request (extend_query_budget).
+    
+    Response: BulkOperationResponse
+        {
+            "affected": 2,
+            "message": "Đã cập nhật 2 sinh viên"
+        }
+    
+    Errors:
+        - 400: Sinh viên bị lặp trong danh sách / mã sinh viên mới bị trùng
+        - 422: Dữ liệu không hợp lệ
+    
+    Use case:
+        - Nhập điểm cuối kỳ cho cả khóa trong 1 request
+    """
+    service = StudentService(db)
+    affected = service.bulk_update_students(items)
+    return BulkOperationResponse(affected=affected, message=f"Đã cập nhật {affected} sinh viên")
 
-    # Step 3: Analyze data and export images
-    analysis_data(cleaned_filename)
 
-    # Step 4: Zip images
-    image_dir = os.path.join("app", "crawling", "img")
-    zip_path = "exported_images.zip"
-    with ZipFile(zip_path, "w") as zipf:
-        for root, _, files in os.walk(image_dir):
-            for file in files:
-                zipf.write(os.path.join(root, file), arcname=file)
+@router.post("/bulk-delete", response_model=BulkOperationResponse)
+@query_budget(2)  # change log + DELETE (mỗi chunk thêm được cộng vào)
+def bulk_delete_students(
+    request: StudentBulkDeleteRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    API: Xóa nhiều sinh viên cùng lúc (bulk delete)
+    
+    Method: POST
+    Endpoint: /api/students/bulk-delete
+    
+    Request Body: StudentBulkDeleteRequest (cần ít nhất 1 điều kiện)
+        {"ids": [1, 2, 3]}
+        {"student_codes": ["SV001", "SV002"]}
+        {"search": "K65"}
+        {"ids": [1, 2, 3], "search": "Nguyen"}  // chỉ xóa id trong list VÀ khớp search
+    
+    Toàn bộ request chạy trong 1 transaction.
+    
+    Response: BulkOperationResponse
+        {
+            "affected": 3,
+            "message": "Đã xóa 3 sinh viên"
+        }
+    
+    Errors:
+        - 422: Không có điều kiện nào / dữ liệu không hợp lệ
+    """
+    service = StudentService(db)
+    affected = service.bulk_delete_students(request)
+    return BulkOperationResponse(affected=affected, message=f"Đã xóa {affected} sinh viên")
 
-    # Step 5: Return zip file
-    with open(zip_path, "rb") as f:
-        zip_bytes = f.read()
-    os.remove(zip_path)
-    return Response(content=zip_bytes, media_type="application/zip")
 
+@router.post("/crawl-students")
+def crawl_students_api():
+    """
+    API: Crawl dữ liệu sinh viên, phân tích và trả về ảnh biểu đồ (zip)
+    
+    Method: POST
+    Endpoint: /api/students/crawl-students
+    
+    Crawl trang STUDENTS_URL (env), làm sạch dữ liệu, vẽ biểu đồ rồi trả về
+    file zip chứa các ảnh. Stack crawling/analysis chỉ được load ở lần gọi đầu.
+    
+    Response: application/zip
+    
+    Headers:
+        Server-Timing: crawl;dur=15320.40, clean;dur=41.20, analyze;dur=2310.80, zip;dur=3.10
+        X-Trace-Id: id của trace chi tiết (TRACE_DIR/<trace_id>.json, OTLP JSON)
+    
+    Errors:
+        - 503: Không có WebDriver rảnh sau CRAWL_DRIVER_CHECKOUT_TIMEOUT (kèm Retry-After)
+        - 500: Crawl lỗi (không mở được trang / đọc được bảng)
+    """
+    url = os.getenv("STUDENTS_URL", "http://localhost:3000/students")
+    result = CrawlService().run_pipeline(url)
+    response = Response(content=result.zip_bytes, media_type="application/zip")
+    response.headers["X-Trace-Id"] = result.trace_id
+    for stage, duration in result.timings.items():
+        response.headers.append("Server-Timing", f"{stage};dur={duration:.2f}")
+    return response
@@ -1,13 +1,24 @@
+import logging
 import os
 import pandas as pd
 import numpy as np
 import seaborn as sns
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from datetime import datetime
 
+from app.crawling.clean_data import log_dataframe
+from app.monitoring.tracing import span
+
+logger = logging.getLogger("app.crawling")
+
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 CSV_DIR = os.path.join(BASE_DIR, '../data')
 
+def _new_chart(figsize):
+    """Figure + Axes riêng cho 1 biểu đồ, không đăng ký vào pyplot (không có "figure hiện tại" dùng chung)"""
+    fig = Figure(figsize=figsize)
+    return fig, fig.subplots()
+
 def plot_avgscore_by_hometown_and_subject(df, dir, filename):
     #plt.style.use('seaborn-v0_8-darkgrid')
 
@@ -16,15 +27,15 @@ def plot_avgscore_by_hometown_and_subject(df, dir, filename):
     avg_score = df_top.groupby('hometown')[
                                             ['math_score', 'literature_score', 'english_score']
                                             ].mean().reindex(top_5_hometown)
-    avg_score.plot(kind='bar', figsize=(10, 6), color=['#3498db', '#1abc9c', '#e67e22'])
-    plt.title("Average Scores by Hometown and Subjects")
-    plt.ylabel("Average Scores")
-    plt.xlabel("Hometown")
-    plt.xticks(rotation=0)
-    plt.legend(title="Subject", loc='upper left', bbox_to_anchor=(1.02, 1), borderaxespad=0)
-    plt.tight_layout()
-    plt.savefig(os.path.join(dir, filename))
-    # plt.show()
+    fig, ax = _new_chart((10, 6))
+    avg_score.plot(kind='bar', ax=ax, color=['#3498db', '#1abc9c', '#e67e22'])
+    ax.set_title("Average Scores by Hometown and Subjects")
+    ax.set_ylabel("Average Scores")
+    ax.set_xlabel("Hometown")
+    ax.tick_params(axis='x', labelrotation=0)
+    ax.legend(title="Subject", loc='upper left', bbox_to_anchor=(1.02, 1), borderaxespad=0)
+    fig.tight_layout()
+    fig.savefig(os.path.join(dir, filename))
 
 def plot_avgscore_and_ages(df, dir, filename):
     # Add column age
@@ -48,94 +59,224 @@ def plot_avgscore_and_ages(df, dir, filename):
     df_age = df.groupby('age', sort=True)[['math_score', 'literature_score', 'english_score']].mean().reset_index()
     
     df_melted = df_age.melt(id_vars='age', var_name='subject', value_name='score')
-    plt.figure(figsize=(10, 6))
-    sns.lineplot(data=df_melted, x='age', y='score', hue='subject', markers='o')
-    plt.title("Average Scores by Ages")
-    plt.xlabel("Age (years)")
-    plt.ylabel("Scores")
-    plt.grid(alpha=0.3)
-    plt.xticks(df_age['age'])
-    plt.savefig(os.path.join(dir, filename))
-    # plt.show()
+    fig, ax = _new_chart((10, 6))
+    sns.lineplot(data=df_melted, x='age', y='score', hue='subject', markers='o', ax=ax)
+    ax.set_title("Average Scores by Ages")
+    ax.set_xlabel("Age (years)")
+    ax.set_ylabel("Scores")
+    ax.grid(alpha=0.3)
+    ax.set_xticks(df_age['age'])
+    fig.savefig(os.path.join(dir, filename))
 
 def plot_correlation_matrix(df, dir, filename):
     corr = df.corr(numeric_only=True)
-    plt.figure(figsize=(8, 6))
-    sns.heatmap(corr, annot=True, cmap='coolwarm', center=0, linewidths=0.5)
-    plt.title("Correlation Matrix between Scores and other factors")
-    plt.savefig(os.path.join(dir, filename))
-    # plt.show()
+    fig, ax = _new_chart((8, 6))
+    sns.heatmap(corr, annot=True, cmap='coolwarm', center=0, linewidths=0.5, ax=ax)
+    ax.set_title("Correlation Matrix between Scores and other factors")
+    fig.savefig(os.path.join(dir, filename))
 
 def plot_score_box(df, dir, filename):
-    ax = df[['math_score', 'literature_score', 'english_score']].plot.box(figsize=(8, 6))
-    print("plot score box df data  : \n")
-    print(df[['math_score', 'literature_score', 'english_score']])
+    fig, ax = _new_chart((8, 6))
+    df[['math_score', 'literature_score', 'english_score']].plot.box(ax=ax)
     ax.set_title("Score Distribution among Students")
     ax.set_ylabel("Score")
     ax.set_xticklabels(["Math Score", "Literature Score", "English Score"])
     ax.grid(axis='y')
 
-    plt.savefig(os.path.join(dir, filename))
-    # plt.show()
+    fig.savefig(os.path.join(dir, filename))
 
 def plot_score_scatter(df, dir, filename):
-    ax = df.plot.scatter(x='math_score', y='english_score', alpha=0.5, figsize=(8, 6))
+    fig, ax = _new_chart((8, 6))
+    df.plot.scatter(x='math_score', y='english_score', alpha=0.5, ax=ax)
     ax.set_title("Correlation between Math and English Scores")
     ax.set_xlabel("Math Scores")
     ax.set_ylabel("English Scores")
     ax.grid(True)
 
-    plt.savefig(os.path.join(dir, filename))
-    # plt.show()
+    fig.savefig(os.path.join(dir, filename))
 
 def plot_avg_english_by_hometown(df, dir, filename):
 
-    plt.figure()
     avg_scores = df.groupby('hometown', observed=True)['english_score'].mean().sort_values()
-    ax = avg_scores.plot(kind='barh',
-                         figsize=(12, 8),
-                         color='skyblue')
+    fig, ax = _new_chart((12, 8))
+    avg_scores.plot(kind='barh', ax=ax, color='skyblue')
     ax.set_title('Average English Scores by Hometown')
     ax.set_xlabel('English Scores')
     ax.set_ylabel('Hometown')
     ax.grid(axis='x')
-    plt.tight_layout()
+    fig.tight_layout()
+
+    fig.savefig(os.path.join(dir, filename))
 
-    plt.savefig(os.path.join(dir, filename))
-    # plt.show()
+# Thứ tự vẽ các biểu đồ: (hàm vẽ, tên file ảnh)
+CHARTS = [
+    (plot_score_box, "score_box.png"),
+    (plot_avg_english_by_hometown, "english_by_hometown.png"),
+    (plot_avgscore_by_hometown_and_subject, "avg_by_hns.png"),
+    (plot_correlation_matrix, "c_matrix.png"),
+    (plot_avgscore_and_ages, "avgs_and_ages.png"),
+    (plot_score_scatter, "scatter_math_english.png"),
+]
 
-def analysis_data(input_filepath):
-    img_dir = 'img'
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    img_dir = os.path.join(base_dir, img_dir)
+# Số row đọc từ database mỗi lần (bộ nhớ tạm tỉ lệ với số này, không phải kích thước bảng)
+DB_CHUNK_SIZE = 100_000
+
+SCORE_COLUMNS = ['math_score', 'literature_score', 'english_score']
+
+def _image_dir(img_dir):
+    if img_dir is None:
+        img_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'img')
     os.makedirs(img_dir, exist_ok=True)
+    return img_dir
+
+def render_charts(df, img_dir):
+    """
+    Vẽ lần lượt các biểu đồ trong CHARTS vào img_dir
+
+    Mỗi biểu đồ vẽ trên Figure riêng (không qua pyplot), nên các lần chạy
+    pipeline đồng thời trong 1 worker không vẽ / đóng nhầm figure của nhau.
+    """
+    for plot, filename in CHARTS:
+        with span("analyze.chart", chart=filename):
+            plot(df, img_dir, filename)
+    logger.info("Saved %d charts to '%s'", len(CHARTS), img_dir)
+
+def analysis_data(input_filepath, img_dir=None):
+    """
+    Vẽ các biểu đồ trong CHARTS từ file CSV đã làm sạch
+
+    Args:
+        input_filepath: File CSV đã làm sạch
+        img_dir: Thư mục ghi ảnh (mặc định app/crawling/img); mỗi lần chạy
+            pipeline dùng 1 thư mục riêng để các lần chạy đồng thời không ghi đè nhau
+
+    Returns:
+        img_dir nếu vẽ xong tất cả biểu đồ, None nếu có lỗi
+    """
+    img_dir = _image_dir(img_dir)
     try:
         # Read file
-        df = pd.read_csv(input_filepath)
-        print("--- Data Analysis ---")
-        print(df.info())
-        print("\nFirst 5 rows of data:")
-        print(df.head())
+        with span("analyze.read_csv", path=input_filepath) as read_span:
+            df = pd.read_csv(input_filepath)
+            read_span.set(rows=len(df))
+        log_dataframe("Data Analysis", df)
 
         # Encode Categorical Variables
         df['hometown'] = df['hometown'].astype('category')
 
         # Create plots
-        plot_score_box(df, img_dir, "score_box.png")
-        plot_avg_english_by_hometown(df, img_dir, "english_by_hometown.png")
-        plot_avgscore_by_hometown_and_subject(df, img_dir, "avg_by_hns.png")
-        plot_correlation_matrix(df, img_dir, "c_matrix.png")
-        plot_avgscore_and_ages(df, img_dir, "avgs_and_ages.png")
-        plot_score_scatter(df, img_dir, "scatter_math_english.png")
-        
+        render_charts(df, img_dir)
+        return img_dir
+
+    except Exception:
+        logger.exception("An unexpected error occurred while analyzing '%s'", input_filepath)
+
+def load_students_from_db(engine=None, chunksize=DB_CHUNK_SIZE):
+    """
+    Đọc các cột cần cho biểu đồ từ bảng students theo từng chunk, với dtype gọn
+
+    - hometown: category, đọc hometown_id (số nguyên) rồi tra mã category theo
+      bảng hometowns (vài chục row, đọc 1 lần), không đọc / so sánh chuỗi từng row
+    - date_of_birth: datetime64 (đọc chuỗi thô rồi parse vectorized, không tạo date object)
+    - điểm: float32, avg_score = trung bình các môn có điểm (như bước clean)
+
+    Mỗi lúc chỉ có 1 chunk ở dạng thô (chuỗi / object), phần đã đọc giữ ở dạng gọn
+    (~25 bytes / sinh viên so với > 100 bytes khi đọc CSV), nên bảng vài triệu
+    sinh viên vẫn đọc được với bộ nhớ giới hạn.
+
+    Args:
+        engine: SQLAlchemy engine (mặc định engine của app)
+        chunksize: Số row mỗi chunk
+
+    Returns:
+        DataFrame các cột hometown, date_of_birth, 3 cột điểm, avg_score
+
+    Example:
+        df = load_students_from_db(chunksize=50_000)
+    """
+    from sqlalchemy import select
+
+    from app.models import Hometown, Student
+
+    if engine is None:
+        from app.database import engine
+
+    # Câu SQL dạng chuỗi, chạy qua DBAPI connection: pandas đọc thẳng từ cursor,
+    # không tạo Row / xử lý type của SQLAlchemy cho từng row (ngày sinh là chuỗi 'YYYY-MM-DD')
+    stmt = select(Student.hometown_id, Student.date_of_birth, *(getattr(Student, name) for name in SCORE_COLUMNS))
+    sql = str(stmt.compile(dialect=engine.dialect))
+
+    chunks, codes = [], []
+    with engine.connect() as conn:
+        # hometown_id -> mã category (vị trí tên trong danh sách đã sắp xếp), -1 = không có quê quán
+        hometowns = conn.execute(select(Hometown.id, Hometown.name)).all()
+        categories = sorted({name for _, name in hometowns})
+        position = {name: index for index, name in enumerate(categories)}
+        code_of = np.full(max((hometown_id for hometown_id, _ in hometowns), default=0) + 1, -1, dtype=np.int16)
+        for hometown_id, name in hometowns:
+            code_of[hometown_id] = position[name]
+
+        # pandas chỉ hỗ trợ trực tiếp DBAPI của sqlite3, database khác đi qua SQLAlchemy
+        source = conn.connection.driver_connection if engine.dialect.name == 'sqlite' else conn
+        for chunk in pd.read_sql(sql, source, chunksize=chunksize):
+            # id 0 = NULL (id bắt đầu từ 1); id tạo sau khi đọc bảng tra coi như không có quê quán
+            ids = chunk.pop('hometown_id').fillna(0).to_numpy(dtype=np.int64)
+            ids[ids >= len(code_of)] = 0
+            codes.append(code_of[ids])
+            chunk['date_of_birth'] = pd.to_datetime(chunk['date_of_birth'], format='%Y-%m-%d', errors='coerce')
+            chunk[SCORE_COLUMNS] = chunk[SCORE_COLUMNS].astype('float32')
+            chunk['avg_score'] = chunk[SCORE_COLUMNS].mean(axis=1).round(2).astype('float32')
+            chunks.append(chunk)
+
+    if not chunks:
+        return pd.DataFrame({
+            'hometown': pd.Series(dtype='category'),
+            'date_of_birth': pd.Series(dtype='datetime64[ns]'),
+            **{name: pd.Series(dtype='float32') for name in SCORE_COLUMNS + ['avg_score']},
+        })
+
+    hometown = pd.Categorical.from_codes(np.concatenate(codes), categories=categories)
+    codes.clear()
+    df = pd.concat(chunks, ignore_index=True)
+    chunks.clear()
+    # Quê quán trong bảng tra nhưng không còn sinh viên nào: bỏ khỏi category (như đọc từ CSV)
+    df.insert(0, 'hometown', hometown.remove_unused_categories())
+    logger.info("Loaded %d students from database in chunks of %d (%.1f MB)",
+                len(df), chunksize, df.memory_usage(deep=True).sum() / 1e6)
+    return df
+
+def analysis_data_from_db(img_dir=None, engine=None, chunksize=DB_CHUNK_SIZE):
+    """
+    Vẽ các biểu đồ trong CHARTS trực tiếp từ bảng students (không cần export CSV)
+
+    Args:
+        img_dir: Thư mục ghi ảnh (mặc định app/crawling/img)
+        engine: SQLAlchemy engine (mặc định engine của app)
+        chunksize: Số row đọc mỗi lần
+
+    Returns:
+        img_dir nếu vẽ xong tất cả biểu đồ, None nếu có lỗi
+
+    Example:
+        analysis_data_from_db("/tmp/charts")
+    """
+    img_dir = _image_dir(img_dir)
+    try:
+        with span("analyze.read_sql", chunksize=chunksize) as read_span:
+            df = load_students_from_db(engine, chunksize)
+            read_span.set(rows=len(df))
+        log_dataframe("Data Analysis (database)", df)
 
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+        render_charts(df, img_dir)
+        return img_dir
 
+    except Exception:
+        logger.exception("An unexpected error occurred while analyzing the students table")
 
 if __name__ == '__main__':
     # It is recommended to run main.py
     # This is for running the script directly from the 'analysis' directory
     # analysis_data("cleaned_student_data.csv")
+    logging.basicConfig(level=logging.INFO)
     input_path = os.path.join(CSV_DIR, "students_data.csv")
     analysis_data(input_path)
@@ -0,0 +1,175 @@
+"""
+Chart Cache
+Cache ảnh biểu đồ theo nội dung (content-addressed): dữ liệu đã làm sạch không đổi thì
+không vẽ lại
+
+- Key = sha256(phiên bản code vẽ biểu đồ + nội dung file CSV đã làm sạch)
+- Phiên bản code = sha256 của analysis_data.py: sửa code vẽ -> key mới, entry cũ tự bị đẩy ra
+- Mỗi entry là 1 thư mục <key>/ chứa các file PNG, được ghi vào thư mục tạm rồi rename
+  (atomic), nên nhiều worker / nhiều lần chạy đồng thời không đọc phải entry ghi dở
+- Giới hạn tổng dung lượng CHART_CACHE_MAX_BYTES, vượt quá thì xóa entry ít dùng nhất
+  (LRU theo mtime của thư mục entry, được cập nhật mỗi lần hit)
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import uuid
+from typing import List, Optional
+
+from app.monitoring import record_cache_lookup
+
+logger = logging.getLogger("app.crawling")
+
+CRAWLING_DIR = os.path.dirname(os.path.abspath(__file__))
+CHART_CACHE_DIR = os.getenv("CHART_CACHE_DIR", os.path.join(CRAWLING_DIR, "chart_cache"))
+CHART_CACHE_MAX_BYTES = int(os.getenv("CHART_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def chart_code_version() -> str:
+    """Hash của module vẽ biểu đồ (analysis_data.py), đọc file nên không cần import matplotlib"""
+    return _file_digest(os.path.join(CRAWLING_DIR, "analysis_data.py"))
+
+
+def _directory_size(path: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+class ChartCache:
+    """
+    Chart Cache Class
+
+    Example:
+        cache = ChartCache("/var/cache/charts", max_bytes=100 * 1024 * 1024)
+        key = cache.key_for("cleaned_students_data.csv")
+        if not cache.restore(key, run_dir):
+            analysis_data("cleaned_students_data.csv", run_dir)
+            cache.store(key, run_dir)
+    """
+
+    def __init__(self, directory: str = CHART_CACHE_DIR, max_bytes: int = CHART_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.code_version = chart_code_version()
+        self._lock = threading.Lock()
+
+    def key_for(self, dataset_path: str) -> str:
+        """
+        Key của bộ biểu đồ vẽ từ dataset_path
+
+        Args:
+            dataset_path: File CSV đã làm sạch
+
+        Returns:
+            sha256 hex của (phiên bản code vẽ + nội dung file)
+        """
+        digest = hashlib.sha256(self.code_version.encode())
+        digest.update(_file_digest(dataset_path).encode())
+        return digest.hexdigest()
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def restore(self, key: str, output_dir: str) -> Optional[List[str]]:
+        """
+        Copy các ảnh của entry `key` vào output_dir (hard link nếu được)
+
+        Returns:
+            Danh sách file đã copy, None nếu cache miss
+        """
+        entry = self._entry(key)
+        try:
+            names = sorted(os.listdir(entry))
+            os.makedirs(output_dir, exist_ok=True)
+            paths = []
+            for name in names:
+                source, target = os.path.join(entry, name), os.path.join(output_dir, name)
+                try:
+                    os.link(source, target)
+                except OSError:
+                    shutil.copyfile(source, target)
+                paths.append(target)
+            # Đánh dấu vừa dùng (LRU)
+            os.utime(entry)
+        except FileNotFoundError:
+            # Chưa có entry, hoặc entry vừa bị evict trong lúc copy
+            record_cache_lookup("charts", hit=False)
+            return None
+        record_cache_lookup("charts", hit=True)
+        return paths
+
+    def store(self, key: str, source_dir: str):
+        """
+        Lưu các ảnh trong source_dir thành entry `key`, sau đó evict nếu vượt dung lượng
+
+        Args:
+            key: Key từ key_for()
+            source_dir: Thư mục chứa ảnh vừa vẽ
+        """
+        entry = self._entry(key)
+        if os.path.isdir(entry):
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        staging = os.path.join(self.directory, f".tmp-{uuid.uuid4().hex}")
+        shutil.copytree(source_dir, staging)
+        try:
+            os.rename(staging, entry)
+        except OSError:
+            # Lần chạy khác vừa lưu cùng key (nội dung giống nhau)
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+        self.evict(keep=key)
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Xóa các entry ít dùng nhất cho tới khi tổng dung lượng <= max_bytes
+
+        Args:
+            keep: Entry không được xóa (entry vừa lưu)
+
+        Returns:
+            Số entry đã xóa
+        """
+        with self._lock:
+            entries = []
+            for item in os.scandir(self.directory):
+                if item.is_dir() and not item.name.startswith("."):
+                    entries.append((item.stat().st_mtime, _directory_size(item.path), item.name))
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if name == keep:
+                    continue
+                shutil.rmtree(self._entry(name), ignore_errors=True)
+                total -= size
+                removed += 1
+        if removed:
+            logger.info("Chart cache: evicted %d entries (%d bytes left)", removed, total)
+        return removed
+
+
+_cache: Optional[ChartCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_chart_cache() -> ChartCache:
+    """Chart cache dùng chung của process (tạo ở lần gọi đầu)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ChartCache()
+        return _cache
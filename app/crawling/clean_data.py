@@ -1,89 +1,120 @@
+import io
+import logging
 import os
 
 import pandas as pd
 
+from app.monitoring.tracing import span
+
+logger = logging.getLogger("app.crawling")
+
 CSV_OUTPUT = 'cleaned_students_data.csv'
 
-def clean_student_data(input_filepath):
+def log_dataframe(title, df):
+    """Log df.info() + 5 dòng đầu ở mức DEBUG (không tốn công format khi tắt DEBUG)"""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    buffer = io.StringIO()
+    df.info(buf=buffer)
+    logger.debug("--- %s ---\n%s\nFirst 5 rows:\n%s", title, buffer.getvalue(), df.head())
+
+CLEANED_DATA_DIR = os.path.join(os.path.dirname(__file__), 'cleaned_data')
+
+def clean_student_data(input_filepath, output_csv=None):
+    """
+    Làm sạch file CSV crawl được
+
+    Args:
+        input_filepath: File CSV thô
+        output_csv: File CSV ghi ra (mặc định cleaned_data/cleaned_students_data.csv); mỗi
+            lần chạy pipeline dùng 1 file riêng để các lần chạy đồng thời không ghi đè nhau
+
+    Returns:
+        Đường dẫn file đã làm sạch, None nếu lỗi
+    """
 
     try:
-        # Read file / inspect dataprint / print first 5 rows
-        df = pd.read_csv(input_filepath)
-        print("--- Data Before Cleaning ---")
-        print(df.info())
-        print("\nFirst 5 rows of original data:")
-        print(df.head())
-
-        # Drop unnecessary columns if exist
-        unnecessary_columns = ['STT', 'Thao tác', 'TB']
-        df.drop(columns=[col for col in unnecessary_columns if col in df.columns], inplace=True)
-
-        # Drop column with too many NaNs(> 50% data is NaN)
-        columns_to_drop = df.columns[df.isnull().mean() > 0.5]
-        if not columns_to_drop.empty:
-            print("\nColumns to drop:" + str(columns_to_drop))
-        df.drop(columns=columns_to_drop, inplace=True)
+        # Read file / inspect data
+        with span("clean.read_csv", path=input_filepath) as read_span:
+            df = pd.read_csv(input_filepath)
+            read_span.set(rows=len(df), columns=len(df.columns))
+        log_dataframe("Data Before Cleaning", df)
+
+        with span("clean.drop_columns") as drop_span:
+            # Drop unnecessary columns if exist
+            unnecessary_columns = ['STT', 'Thao tác', 'TB']
+            df.drop(columns=[col for col in unnecessary_columns if col in df.columns], inplace=True)
+
+            # Drop column with too many NaNs(> 50% data is NaN)
+            columns_to_drop = df.columns[df.isnull().mean() > 0.5]
+            if not columns_to_drop.empty:
+                logger.info("Columns to drop: %s", list(columns_to_drop))
+            df.drop(columns=columns_to_drop, inplace=True)
+            drop_span.set(dropped=len(columns_to_drop))
 
         # Clean string columns by stripping leading/trailing whitespace
-        for col in df.select_dtypes(include=['object']).columns:
-            df[col] = df[col].str.strip()
+        with span("clean.strip"):
+            for col in df.select_dtypes(include=['object']).columns:
+                df[col] = df[col].str.strip()
 
         # Rename all columns
-        df.rename(columns={'Mã SV': 'student_code',
-                           'Họ tên': 'full_name',
-                           'Email': 'email',
-                           'Ngày sinh': 'date_of_birth',
-                           'Quê quán': 'hometown',
-                           'Toán': 'math_score',
-                           'Văn': 'literature_score',
-                           'Anh': 'english_score'
-                           }, inplace=True)
+        with span("clean.rename"):
+            df.rename(columns={'Mã SV': 'student_code',
+                               'Họ tên': 'full_name',
+                               'Email': 'email',
+                               'Ngày sinh': 'date_of_birth',
+                               'Quê quán': 'hometown',
+                               'Toán': 'math_score',
+                               'Văn': 'literature_score',
+                               'Anh': 'english_score'
+                               }, inplace=True)
 
         # Clean score columns
         score_columns = ['math_score', 'literature_score', 'english_score']
-        for col in score_columns:
-            # convert column to numeric, coercing errors into NaN
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+        with span("clean.scores") as scores_span:
+            for col in score_columns:
+                # convert column to numeric, coercing errors into NaN
+                df[col] = pd.to_numeric(df[col], errors='coerce')
 
-            # Convert value not in [0, 10] to NaN
-            valid_number_condition = df[col].between(0, 10)
-            df[col] = df[col].where(valid_number_condition)
+                # Convert value not in [0, 10] to NaN
+                valid_number_condition = df[col].between(0, 10)
+                df[col] = df[col].where(valid_number_condition)
 
-            #  Remove row if all scores is NaN
-            df.dropna(subset=score_columns, how='all', inplace=True)
+                #  Remove row if all scores is NaN
+                df.dropna(subset=score_columns, how='all', inplace=True)
 
-            # Fill missing values (NaN) with the mean of the column
-            mean_score = df[col].mean()
-            df[col].fillna(mean_score, inplace=True)
+                # Fill missing values (NaN) with the mean of the column
+                mean_score = df[col].mean()
+                df[col].fillna(mean_score, inplace=True)
 
-            df[col] = df[col].round(2)
+                df[col] = df[col].round(2)
+            scores_span.set(rows=len(df))
 
         # Adding new Features: Fullname & Avg_Score
         # df.insert(1, 'full_name', df['first_name'] + ' ' + df['last_name'])
         # df.drop(columns=['first_name', 'last_name'], inplace=True)
 
-        df['avg_score'] = df[score_columns].mean(axis=1)
-        df['avg_score'] = df['avg_score'].round(2)
+        with span("clean.features"):
+            df['avg_score'] = df[score_columns].mean(axis=1)
+            df['avg_score'] = df['avg_score'].round(2)
 
-        print("\n--- Data After Cleaning ---")
-        print(df.info())
-        print("\nFirst 5 rows of cleaned data:")
-        print(df.head())
+        log_dataframe("Data After Cleaning", df)
 
         #  Save to a new CSV file
-        raw_data_dir = os.path.join(os.path.dirname(__file__), 'cleaned_data')
-        os.makedirs(raw_data_dir, exist_ok=True)
-        output_csv = os.path.join(raw_data_dir, CSV_OUTPUT)
-        df.to_csv(output_csv, index=False, encoding='utf-8-sig')
+        output_csv = output_csv or os.path.join(CLEANED_DATA_DIR, CSV_OUTPUT)
+        os.makedirs(os.path.dirname(output_csv), exist_ok=True)
+        with span("clean.write_csv", rows=len(df)):
+            df.to_csv(output_csv, index=False, encoding='utf-8-sig')
 
-        print(f"\n✅ Data cleaning complete. Cleaned file saved to '{output_csv}'")
+        logger.info("Data cleaning complete (%d rows). Cleaned file saved to '%s'", len(df), output_csv)
         return output_csv
     except FileNotFoundError:
-        print(f"Error: The file '{input_filepath}' was not found.")
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+        logger.error("The file '%s' was not found.", input_filepath)
+    except Exception:
+        logger.exception("An unexpected error occurred while cleaning '%s'", input_filepath)
 
 if __name__ == "__main__":
     # Example usage
+    logging.basicConfig(level=logging.INFO)
     input_filepath = os.path.join(os.path.dirname(__file__), 'raw_data', 'raw_students_data.csv')
     clean_student_data(input_filepath)
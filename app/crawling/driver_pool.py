@@ -0,0 +1,235 @@
+"""
+WebDriver Pool
+Pool các Chrome WebDriver headless khởi động sẵn, dùng lại giữa các lần crawl
+
+- Mỗi lần crawl checkout 1 driver riêng (không còn biến global dùng chung)
+- Health check trước khi giao driver, driver hỏng được thay bằng driver mới
+- Driver bị đóng và tạo lại sau CRAWL_DRIVER_MAX_USES lần dùng (tránh rò rỉ bộ nhớ của Chrome)
+- Số driver tối đa cố định, crawl thứ N+1 chờ tới khi có driver rảnh
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from selenium import webdriver
+from selenium.webdriver.remote.webdriver import WebDriver
+
+logger = logging.getLogger("app.crawling")
+
+CRAWL_DRIVER_POOL_SIZE = int(os.getenv("CRAWL_DRIVER_POOL_SIZE", "2"))
+CRAWL_DRIVER_MAX_USES = int(os.getenv("CRAWL_DRIVER_MAX_USES", "20"))
+CRAWL_DRIVER_CHECKOUT_TIMEOUT = float(os.getenv("CRAWL_DRIVER_CHECKOUT_TIMEOUT", "120"))
+CRAWL_HEADLESS = os.getenv("CRAWL_HEADLESS", "1") == "1"
+
+
+class DriverPoolTimeout(TimeoutError):
+    """Không có driver rảnh sau checkout_timeout giây (phân biệt với timeout khi đang crawl)"""
+
+
+def create_driver() -> WebDriver:
+    """
+    Khởi động 1 Chrome WebDriver (headless mặc định, CRAWL_HEADLESS=0 để xem trình duyệt)
+
+    Returns:
+        WebDriver đã cấu hình window size và page load timeout
+    """
+    options = webdriver.ChromeOptions()
+
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option("useAutomationExtension", False)
+
+    # Opens the browser in the incognito mode.
+    options.add_argument("--incognito")
+
+    if CRAWL_HEADLESS:
+        options.add_argument("--headless=new")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--window-size=1400,900")
+
+    driver = webdriver.Chrome(options=options)
+    driver.set_page_load_timeout(30)
+    return driver
+
+
+class _PooledDriver:
+    """Driver kèm số lần đã dùng"""
+
+    def __init__(self, driver: WebDriver):
+        self.driver = driver
+        self.uses = 0
+
+
+class WebDriverPool:
+    """
+    WebDriver Pool Class
+
+    Example:
+        pool = WebDriverPool(size=2, max_uses=20)
+        pool.warm_up()
+        with pool.driver() as driver:
+            driver.get(url)
+        pool.close()
+    """
+
+    def __init__(
+        self,
+        size: int = CRAWL_DRIVER_POOL_SIZE,
+        max_uses: int = CRAWL_DRIVER_MAX_USES,
+        checkout_timeout: float = CRAWL_DRIVER_CHECKOUT_TIMEOUT,
+        factory: Callable[[], WebDriver] = create_driver,
+    ):
+        self.size = size
+        self.max_uses = max_uses
+        self.checkout_timeout = checkout_timeout
+        self.factory = factory
+        self._idle: "queue.LifoQueue[_PooledDriver]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def warm_up(self, count: Optional[int] = None):
+        """
+        Khởi động sẵn driver để lần crawl đầu không phải chờ Chrome
+
+        Args:
+            count: Số driver khởi động (mặc định: bằng size của pool)
+        """
+        started = []
+        for _ in range(min(count or self.size, self.size)):
+            entry = self._create()
+            if entry is None:
+                break
+            started.append(entry)
+        for entry in started:
+            self._idle.put(entry)
+
+    @contextmanager
+    def driver(self) -> Iterator[WebDriver]:
+        """
+        Checkout 1 driver, trả lại pool khi xong
+
+        Driver được reset (xóa cookie, về about:blank) trước khi trả lại;
+        nếu block bên trong raise exception thì driver bị bỏ và tạo lại sau.
+
+        Raises:
+            DriverPoolTimeout: Không có driver rảnh sau checkout_timeout giây
+        """
+        entry = self._checkout()
+        healthy = False
+        try:
+            yield entry.driver
+            healthy = True
+        finally:
+            entry.uses += 1
+            self._checkin(entry, healthy)
+
+    def close(self):
+        """Đóng tất cả driver đang rảnh (driver đang được dùng sẽ bị đóng khi trả lại)"""
+        self._closed = True
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(entry)
+
+    def _create(self) -> Optional[_PooledDriver]:
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+        try:
+            return _PooledDriver(self.factory())
+        except BaseException:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _checkout(self) -> _PooledDriver:
+        if self._closed:
+            raise RuntimeError("WebDriver pool đã bị đóng")
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                entry = self._create()
+            if entry is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DriverPoolTimeout(
+                        f"Không có WebDriver rảnh sau {self.checkout_timeout:g}s "
+                        f"(pool size {self.size})"
+                    )
+                # Chờ từng khoảng ngắn: driver bị bỏ (hỏng / hết lượt) giải phóng
+                # slot tạo mới mà không đưa gì vào hàng đợi idle
+                try:
+                    entry = self._idle.get(timeout=min(remaining, 1.0))
+                except queue.Empty:
+                    continue
+
+            if self._is_healthy(entry.driver):
+                return entry
+            logger.warning("Discarding unhealthy WebDriver after %d uses", entry.uses)
+            self._discard(entry)
+
+    def _checkin(self, entry: _PooledDriver, healthy: bool):
+        if self._closed or not healthy or entry.uses >= self.max_uses:
+            if entry.uses >= self.max_uses:
+                logger.info("Recycling WebDriver after %d uses", entry.uses)
+            self._discard(entry)
+            return
+        try:
+            entry.driver.delete_all_cookies()
+            entry.driver.get("about:blank")
+        except Exception:
+            self._discard(entry)
+            return
+        self._idle.put(entry)
+
+    def _discard(self, entry: _PooledDriver):
+        try:
+            entry.driver.quit()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    @staticmethod
+    def _is_healthy(driver: WebDriver) -> bool:
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+
+_pool: Optional[WebDriverPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool() -> WebDriverPool:
+    """Pool dùng chung của process (tạo ở lần gọi đầu, tự đóng khi process thoát)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WebDriverPool()
+            atexit.register(_pool.close)
+        return _pool
+
+
+def close_driver_pool():
+    """Đóng pool dùng chung (nếu đã được tạo)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -1,42 +1,31 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webdriver import WebDriver
 import time
 import csv
+import logging
 import os
-import sys
 
-driver = None
+from app.crawling.driver_pool import DriverPoolTimeout, WebDriverPool, get_driver_pool
+from app.crawling.table_parser import parse_table
+from app.monitoring.tracing import span
+
+logger = logging.getLogger("app.crawling")
 
 CSV_OUTPUT = 'raw_students_data.csv'
 
-def connect_webdriver(url):
-    global driver
-    try:
-        # Creates an options object.
-        options = webdriver.ChromeOptions()
+RAW_DATA_DIR = os.path.join(os.path.dirname(__file__), 'raw_data')
 
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option("useAutomationExtension", False)
 
-        # Opens the browser in the incognito mode.
-        options.add_argument("--incognito")
+class CrawlError(Exception):
+    """Crawl thất bại (mở trang / đọc bảng / phân trang lỗi)"""
 
-        driver = webdriver.Chrome(options=options)
 
-        # Sets window size.
-        driver.set_window_size(1400, 900)
+class CrawlBusyError(CrawlError):
+    """Không có WebDriver rảnh trong pool sau CRAWL_DRIVER_CHECKOUT_TIMEOUT giây"""
 
-        # Sets window position.
-        driver.set_window_position(500, 0)
 
-        # Sets timeout threshold.
-        driver.set_page_load_timeout(30)
-        print(f"Opening {url} ...")
-        driver.get(url)
-    except Exception as e:
-        print("Failed to start Chrome WebDriver:", e)
-        raise
+# Cách đọc bảng mỗi trang: page_source (1 round trip + parse lxml) | webdriver (1 round trip mỗi ô)
+CRAWL_EXTRACT_MODE = os.getenv("CRAWL_EXTRACT_MODE", "page_source")
 
 def write_to_csv(file_path, rows):
     with open(file_path, 'a', newline='', encoding='utf-8') as f:
@@ -44,70 +33,106 @@ def write_to_csv(file_path, rows):
         for cells in rows:
             writer.writerow(cells)
 
-def scrape_students(output_csv: str = CSV_OUTPUT):
-    global driver
-    try:
-        time.sleep(2)
-        tbody_th = driver.find_elements(By.CSS_SELECTOR, 'table thead tr th')
-        headers = [th.text.strip() for th in tbody_th if th.text.strip()]
-        write_to_csv(output_csv, [headers])
-        rows_written = 0
-        while True:
-            time.sleep(3)
-            rows = driver.find_elements(By.CSS_SELECTOR, 'table tbody tr')
-
-            page_rows = []
-            for tr in rows:
-                tds = tr.find_elements(By.TAG_NAME, 'td')
-                cells = [td.text for td in tds]
-                page_rows.append(cells)
-
-            # Append rows to CSV
-            with open(output_csv, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                for cells in page_rows:
-                    writer.writerow(cells)
-                    rows_written += 1
-
-            print(f"Wrote {len(page_rows)} rows (total {rows_written}).")
+def read_table_webdriver(driver: WebDriver):
+    """Đọc header + các dòng của bảng qua WebDriver (mỗi ô 1 HTTP round trip)"""
+    tbody_th = driver.find_elements(By.CSS_SELECTOR, 'table thead tr th')
+    headers = [th.text.strip() for th in tbody_th if th.text.strip()]
+
+    rows = driver.find_elements(By.CSS_SELECTOR, 'table tbody tr')
+    page_rows = []
+    for tr in rows:
+        tds = tr.find_elements(By.TAG_NAME, 'td')
+        cells = [td.text for td in tds]
+        page_rows.append(cells)
+    return headers, page_rows
+
+def read_table_page_source(driver: WebDriver):
+    """Đọc header + các dòng của bảng từ page_source (1 round trip, parse bằng lxml)"""
+    return parse_table(driver.page_source)
+
+TABLE_READERS = {
+    "page_source": read_table_page_source,
+    "webdriver": read_table_webdriver,
+}
+
+def scrape_students(driver: WebDriver, output_csv: str = CSV_OUTPUT, extract_mode: str = CRAWL_EXTRACT_MODE):
+    read_table = TABLE_READERS[extract_mode]
+    time.sleep(2)
+    rows_written = 0
+    page_number = 0
+    while True:
+        with span("crawl.page", page=page_number + 1) as page_span:
+            with span("crawl.page.wait"):
+                time.sleep(3)
+            with span("crawl.page.extract", mode=extract_mode) as extract_span:
+                headers, page_rows = read_table(driver)
+                extract_span.set(rows=len(page_rows))
+
+            with span("crawl.page.write"):
+                # Header chỉ ghi 1 lần, lấy từ trang đầu tiên
+                if page_number == 0:
+                    write_to_csv(output_csv, [headers])
+                write_to_csv(output_csv, page_rows)
+            page_number += 1
+            rows_written += len(page_rows)
+            page_span.set(rows=len(page_rows))
+
+            logger.info("Page %d: wrote %d rows (total %d)", page_number, len(page_rows), rows_written)
 
             next_btn = driver.find_element(By.XPATH, "//button[text()='Sau']")
 
             # If the button is disabled via attribute or not enabled, stop
             disabled_attr = next_btn.get_attribute('disabled')
             if disabled_attr is not None and disabled_attr != 'false':
-                print("Next button is disabled; finished paging.")
+                logger.info("Next button is disabled; finished paging.")
                 break
             if not next_btn.is_enabled():
-                print("Next button is not enabled; finished paging.")
+                logger.info("Next button is not enabled; finished paging.")
                 break
 
             # Click Next
             next_btn.click()
 
-            time.sleep(0.3)
+        time.sleep(0.3)
+
+    logger.info("Done. Total rows written: %d. CSV saved to: %s", rows_written, output_csv)
+    return rows_written
+
+def crawl_students(url: str, output_csv: str = None, pool: WebDriverPool = None):
+    """
+    Crawl bảng sinh viên ở url (mọi trang) ra file CSV
 
-        print(f"Done. Total rows written: {rows_written}. CSV saved to: {output_csv}")
-        return rows_written
+    Args:
+        url: Trang danh sách sinh viên
+        output_csv: File CSV ghi ra (mặc định raw_data/raw_students_data.csv); mỗi lần
+            chạy pipeline dùng 1 file riêng để các lần crawl đồng thời không ghi đè nhau
+        pool: WebDriver pool (mặc định pool dùng chung của process)
 
-    finally:
-        if driver:
-            driver.quit()
+    Returns:
+        Đường dẫn file CSV
 
-def crawl_students(url: str, output_csv: str = CSV_OUTPUT):
-    global driver
-    raw_data_dir = os.path.join(os.path.dirname(__file__), 'raw_data')
-    os.makedirs(raw_data_dir, exist_ok=True)
-    output_csv = os.path.join(raw_data_dir, CSV_OUTPUT)
+    Raises:
+        CrawlBusyError: Không có driver rảnh trong pool
+        CrawlError: Crawl lỗi (chi tiết trong log và exception gốc)
+    """
+    output_csv = output_csv or os.path.join(RAW_DATA_DIR, CSV_OUTPUT)
+    os.makedirs(os.path.dirname(output_csv), exist_ok=True)
     # clear existing CSV
     if os.path.exists(output_csv):
         os.remove(output_csv)
 
     try:
-        connect_webdriver(url)
-        count = scrape_students(output_csv)
-        print(f"Scraped {count} rows")
+        # Mỗi lần crawl checkout 1 driver riêng từ pool (headless, đã khởi động sẵn)
+        with (pool or get_driver_pool()).driver() as driver:
+            logger.info("Opening %s ...", url)
+            with span("crawl.open", url=url):
+                driver.get(url)
+            count = scrape_students(driver, output_csv)
+        logger.info("Scraped %d rows", count)
         return output_csv
-    except Exception as e:
-        print("Error during scraping:", e)
-        sys.exit(1)
+    except DriverPoolTimeout as exc:
+        logger.warning("No WebDriver available: %s", exc)
+        raise CrawlBusyError(str(exc)) from exc
+    except Exception as exc:
+        logger.exception("Error during scraping")
+        raise CrawlError(f"Crawl {url} thất bại: {exc}") from exc
@@ -0,0 +1,78 @@
+"""
+Table Parser
+Đọc bảng sinh viên từ HTML (driver.page_source) bằng lxml
+
+Lấy page_source 1 lần cho mỗi trang rồi parse cục bộ, thay vì gọi
+WebDriver cho từng ô (tr.find_elements + td.text: mỗi ô 1 HTTP round trip).
+"""
+
+from typing import List, Tuple
+
+from lxml import html as lxml_html
+
+
+# Thẻ xuống dòng / khối: text 2 bên là 2 từ khác nhau (WebElement.text xuống dòng ở đây)
+SEPARATOR_TAGS = frozenset({
+    "br", "p", "div", "li", "ul", "ol", "dl", "dt", "dd", "tr", "td", "th", "table",
+    "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "hr", "section", "article",
+})
+
+# Thẻ không hiển thị: bỏ cả nội dung
+HIDDEN_TAGS = frozenset({"script", "style", "template"})
+
+
+def _collect_text(element, parts: List[str]):
+    if element.text:
+        parts.append(element.text)
+    for child in element:
+        # Comment / processing instruction (tag không phải chuỗi): chỉ giữ tail
+        if isinstance(child.tag, str) and child.tag not in HIDDEN_TAGS:
+            separator = child.tag in SEPARATOR_TAGS
+            if separator:
+                parts.append(" ")
+            _collect_text(child, parts)
+            if separator:
+                parts.append(" ")
+        if child.tail:
+            parts.append(child.tail)
+
+
+def _cell_text(element) -> str:
+    """
+    Text hiển thị của 1 ô, gộp khoảng trắng (giống WebElement.text)
+
+    Thẻ inline nối liền không thêm khoảng trắng (<b>Ng</b>uyễn -> "Nguyễn"),
+    <br> / thẻ khối được tính là khoảng trắng.
+    """
+    parts: List[str] = []
+    _collect_text(element, parts)
+    return " ".join("".join(parts).split())
+
+
+def parse_table(page_source: str) -> Tuple[List[str], List[List[str]]]:
+    """
+    Parse header và các dòng của bảng trong HTML
+
+    Cùng selector với cách đọc bằng WebDriver:
+    header = `table thead tr th` (bỏ header rỗng), dòng = `table tbody tr`,
+    ô = các `td` bên trong dòng.
+
+    Args:
+        page_source: HTML của trang (driver.page_source)
+
+    Returns:
+        (headers, rows) - rows là list các dòng, mỗi dòng là list text của từng ô
+
+    Example:
+        headers, rows = parse_table(driver.page_source)
+    """
+    document = lxml_html.fromstring(page_source)
+
+    headers = [_cell_text(th) for th in document.xpath("//table//thead//tr//th")]
+    headers = [header for header in headers if header]
+
+    rows = [
+        [_cell_text(td) for td in tr.xpath(".//td")]
+        for tr in document.xpath("//table//tbody//tr")
+    ]
+    return headers, rows
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -13,7 +13,27 @@ engine = create_engine(
     connect_args={"check_same_thread": False}  # Only needed for SQLite
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# SQLite: WAL để transaction đọc dài (export streaming, snapshot analytics) không chặn
+# writer và ngược lại; journal mode lưu trong file database nên chỉ cần đặt 1 lần
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+
+
+@event.listens_for(engine, "connect")
+def _configure_sqlite(dbapi_connection, connection_record):
+    if engine.dialect.name != "sqlite" or not SQLITE_JOURNAL_MODE:
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        # WAL: fsync khi checkpoint thay vì mỗi commit (vẫn an toàn khi process crash)
+        if SQLITE_JOURNAL_MODE.upper() == "WAL":
+            cursor.execute("PRAGMA synchronous=NORMAL")
+    finally:
+        cursor.close()
+
+# expire_on_commit=False: object trả về từ INSERT/UPDATE ... RETURNING vẫn dùng được
+# sau commit mà không phải SELECT lại (refresh)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 Base = declarative_base()
 
@@ -26,3 +46,80 @@ def get_db():
         db.close()
 
 
+def warm_up_pool(connections: int = 5):
+    """
+    Mở sẵn connection trong pool trước khi nhận request
+    
+    Request đầu tiên không phải trả chi phí mở connection mới.
+    
+    Args:
+        connections: Số connection mở sẵn (mặc định bằng pool_size của QueuePool)
+    """
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in opened:
+            conn.close()
+
+
+def add_missing_columns(table):
+    """
+    Thêm vào database các cột (và index) có trong model nhưng chưa có trong bảng
+    
+    create_all chỉ tạo bảng mới, không sửa bảng đã tồn tại; hàm này bổ sung
+    cột nullable mới thêm vào model (ALTER TABLE ... ADD COLUMN) cho database cũ.
+    
+    Args:
+        table: Bảng SQLAlchemy (ví dụ Student.__table__)
+        
+    Returns:
+        Tên các cột đã thêm
+    """
+    existing = {column["name"] for column in inspect(engine).get_columns(table.name)}
+    added = []
+    with engine.begin() as conn:
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            name = engine.dialect.identifier_preparer.quote(column.name)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}"))
+            added.append(column.name)
+        for index in table.indexes:
+            if any(column.name in added for column in index.columns):
+                index.create(bind=conn, checkfirst=True)
+    return added
+
+
+def drop_columns(table, columns):
+    """
+    Xóa khỏi bảng các cột không còn trong model (cùng các index trên cột đó)
+    
+    Dùng sau khi dữ liệu của cột cũ đã được chuyển sang cột mới
+    (SQLite >= 3.35 cho ALTER TABLE ... DROP COLUMN). Dung lượng file chỉ
+    giảm sau VACUUM.
+    
+    Args:
+        table: Bảng SQLAlchemy (ví dụ Student.__table__)
+        columns: Tên các cột cần xóa (cột không có trong bảng được bỏ qua)
+        
+    Returns:
+        Tên các cột đã xóa
+    """
+    inspector = inspect(engine)
+    existing = {column["name"] for column in inspector.get_columns(table.name)}
+    dropped = [name for name in columns if name in existing and name not in table.columns]
+    if not dropped:
+        return []
+    quote = engine.dialect.identifier_preparer.quote
+    with engine.begin() as conn:
+        for index in inspector.get_indexes(table.name):
+            if set(index["column_names"]) & set(dropped):
+                conn.execute(text(f"DROP INDEX {quote(index['name'])}"))
+        for name in dropped:
+            conn.execute(text(f"ALTER TABLE {table.name} DROP COLUMN {quote(name)}"))
+    return dropped
@@ -3,13 +3,119 @@ Main Application File
 Khởi tạo FastAPI application và cấu hình middleware
 """
 
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
-from app.controllers import student_router
+from app.database import engine, Base, SessionLocal, add_missing_columns, warm_up_pool
+from app.controllers import student_router, metrics_router, analytics_router
+from app.middleware import AdmissionControlMiddleware, CompressionMiddleware, ProfilingMiddleware
+from app.middleware.profiling import profiling_enabled
+from app.models import HOMETOWN_CACHE, Student
+from app.services import StudentService, CrawlService
+from app.services.analytics_service import get_student_snapshot
+from app.monitoring import (
+    install_query_hooks,
+    instrument_pool,
+    mark_process_dead,
+    metrics_middleware,
+    query_stats_middleware,
+)
+
+APP_ENV = os.getenv("APP_ENV", "development")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+
+def configure_logging():
+    """
+    Cấu hình logger "app" (app.db, app.crawling, app.tracing, ...) theo LOG_LEVEL
+
+    uvicorn chỉ cấu hình logger của nó, nên log của app cần handler riêng.
+    LOG_LEVEL=DEBUG: in thêm df.info() / 5 dòng đầu ở các bước clean / analyze
+    và thời gian từng span của pipeline crawl.
+    """
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(LOG_LEVEL)
+    if not app_logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        app_logger.addHandler(handler)
+        app_logger.propagate = False
+
+
+configure_logging()
+
+
+def prepare_database():
+    """
+    Tạo / nâng cấp schema và điền dữ liệu còn thiếu cho database cũ (idempotent)
+
+    Chạy trong lifespan (1 worker) hoặc 1 lần ở process cha trước khi khởi động
+    các worker (run.py, PREPARE_DATABASE_ON_STARTUP=0); script đọc thẳng database
+    (benchmark) cũng gọi hàm này.
+    """
+    # Tạo tất cả các tables trong database (nếu chưa tồn tại)
+    Base.metadata.create_all(bind=engine)
+    # Database cũ: thêm các cột tìm kiếm không dấu (*_folded) rồi tính giá trị cho dữ liệu có sẵn
+    add_missing_columns(Student.__table__)
+    with SessionLocal() as db:
+        StudentService(db).backfill_search_columns()
+
+    # Database cũ: quê quán dạng chuỗi -> hometown_id chuyển bằng scripts/migrate_hometowns.py
+    # (có xóa cột), không chạy DDL phá hủy lúc khởi động
+    with SessionLocal() as db:
+        unmigrated = StudentService(db).count_unmigrated_hometowns()
+    if unmigrated:
+        logging.getLogger("app.db").warning(
+            "%d students still have their hometown only in the legacy column; "
+            "run `python scripts/migrate_hometowns.py`", unmigrated
+        )
+
+    # Change feed: sinh viên có từ trước (chưa có entry) được ghi vào change log
+    with SessionLocal() as db:
+        StudentService(db).backfill_change_log()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Lifespan hook: chạy 1 lần khi worker khởi động (trước khi nhận request)
+    
+    Tạo schema ở đây thay vì lúc import module, để import app.main
+    không đụng tới database.
+    """
+    # Nhiều worker: process cha đã chạy (run.py), worker không chạy lại cùng lúc với nhau
+    if os.getenv("PREPARE_DATABASE_ON_STARTUP", "1") == "1":
+        prepare_database()
+
+    # Bảng tra quê quán (vài chục row): nạp sẵn, request đầu tiên không phải đọc
+    with SessionLocal() as db:
+        HOMETOWN_CACHE.load(db)
+
+    # Warm-up (mặc định bật ở production): mở sẵn connection, chạy trước query chính
+    if os.getenv("WARMUP_ON_STARTUP", "1" if APP_ENV == "production" else "0") == "1":
+        warm_up_pool(int(os.getenv("WARMUP_CONNECTIONS", 5)))
+        with SessionLocal() as db:
+            StudentService(db).warm_up()
+
+    # Khởi động sẵn Chrome cho crawl ở background (không chặn startup)
+    if os.getenv("CRAWL_DRIVER_PREWARM", "0") == "1":
+        threading.Thread(target=CrawlService.warm_up_driver_pool, name="driver-pool-warmup", daemon=True).start()
+
+    # Snapshot dạng cột cho API analytics: nạp ở background, tới lúc nạp xong API dùng SQL
+    snapshot = get_student_snapshot()
+    if snapshot is not None:
+        snapshot.rebuild_in_background()
+
+    yield
+
+    CrawlService.shutdown()
+    # Nhiều worker (PROMETHEUS_MULTIPROC_DIR): gauge của worker đã dừng không còn tính vào /metrics
+    mark_process_dead()
 
-# Tạo tất cả các tables trong database (nếu chưa tồn tại)
-Base.metadata.create_all(bind=engine)
 
 # Khởi tạo FastAPI application
 app = FastAPI(
@@ -33,9 +139,20 @@ app = FastAPI(
     """,
     version="2.0.0",
     docs_url="/docs",  # Swagger UI
-    redoc_url="/redoc"  # ReDoc
+    redoc_url="/redoc",  # ReDoc
+    lifespan=lifespan
 )
 
+# Profile theo yêu cầu (header X-Profile = PROFILING_TOKEN hoặc PROFILING_SAMPLE_RATE), đăng ký
+# đầu tiên nên nằm trong cùng: profile chỉ gồm routing, dependency, validation, handler, serialize
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
+
+# Admission control: giới hạn request đồng thời theo nhóm route, quá tải -> 503 + Retry-After
+# (đăng ký trước CORS nên nằm bên trong CORS: response 503 vẫn có header CORS)
+if os.getenv("ADMISSION_CONTROL_ENABLED", "1") == "1":
+    app.add_middleware(AdmissionControlMiddleware)
+
 # Cấu hình CORS (Cross-Origin Resource Sharing)
 # Cho phép frontend từ domain khác gọi API
 app.add_middleware(
@@ -46,8 +163,22 @@ app.add_middleware(
     allow_headers=["*"],  # Cho phép tất cả headers
 )
 
+# Nén gzip/br cho response dạng text lớn hơn COMPRESSION_MIN_SIZE (xem app/utils/compression.py)
+app.add_middleware(CompressionMiddleware)
+
+# Đếm số câu SQL / thời gian DB cho mỗi request (header Server-Timing, slow-query log)
+install_query_hooks(engine)
+app.middleware("http")(query_stats_middleware)
+
+# Prometheus metrics: latency/in-flight theo route, connection pool (đăng ký sau cùng
+# nên là middleware ngoài cùng, đo được cả thời gian của các middleware khác)
+instrument_pool(engine)
+app.middleware("http")(metrics_middleware)
+
 # Đăng ký router
 app.include_router(student_router)
+app.include_router(analytics_router)
+app.include_router(metrics_router)
 
 
 @app.get("/", tags=["Root"])
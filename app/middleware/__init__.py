@@ -0,0 +1,9 @@
+"""
+Middleware package
+Contains ASGI middleware của ứng dụng
+"""
+from .admission import AdmissionControlMiddleware, AdmissionLimit
+from .compression import CompressionMiddleware
+from .profiling import ProfilingMiddleware
+
+__all__ = ["AdmissionControlMiddleware", "AdmissionLimit", "CompressionMiddleware", "ProfilingMiddleware"]
@@ -0,0 +1,217 @@
+"""
+Admission Control Middleware
+Giới hạn số request đồng thời theo nhóm route và từ chối sớm khi quá tải
+
+Mỗi nhóm route (crawl, bulk, search, point) có:
+- concurrency: số request được xử lý cùng lúc
+- queue: số request được xếp hàng chờ slot (đầy -> 503 ngay lập tức)
+- timeout: thời gian chờ slot tối đa (quá hạn -> 503)
+
+Request bị từ chối nhận 503 kèm header Retry-After thay vì chờ trong
+threadpool dùng chung, nên vài request crawl / search nặng không làm
+nghẽn CRUD. Giới hạn áp dụng cho từng worker process.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+import orjson
+from starlette.requests import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.monitoring import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_QUEUE_WAIT,
+    ADMISSION_REJECTED,
+)
+from app.monitoring.routes import route_template
+
+# (method, route template) -> nhóm route. Route không có trong bảng không bị giới hạn
+ROUTE_GROUPS = {
+    ("POST", "/api/students/crawl-students"): "crawl",
+    ("POST", "/api/students/bulk"): "bulk",
+    ("PATCH", "/api/students/bulk"): "bulk",
+    ("POST", "/api/students/bulk-delete"): "bulk",
+    ("POST", "/api/students/batch-get"): "bulk",
+    ("GET", "/api/students/export"): "bulk",
+    ("GET", "/api/students/"): "search",
+    ("GET", "/api/students/changes"): "search",
+    # Cache miss là 1 lần quét cả bảng, cache hit chỉ 1 câu SQL
+    ("GET", "/api/analytics/hometown-scores"): "search",
+    ("GET", "/api/analytics/english-by-hometown"): "search",
+    ("GET", "/api/analytics/scores-by-age"): "search",
+    ("GET", "/api/analytics/correlation"): "search",
+    ("GET", "/api/analytics/score-distribution"): "search",
+    ("POST", "/api/students/"): "point",
+    ("GET", "/api/students/{student_id}"): "point",
+    ("PUT", "/api/students/{student_id}"): "point",
+    ("DELETE", "/api/students/{student_id}"): "point",
+    ("GET", "/api/students/by-code/{student_code}"): "point",
+}
+
+
+@dataclass(frozen=True)
+class AdmissionLimit:
+    """
+    Giới hạn của 1 nhóm route
+
+    Attributes:
+        concurrency: Số request xử lý đồng thời
+        queue: Số request được xếp hàng chờ
+        timeout: Thời gian chờ slot tối đa (giây)
+    """
+    concurrency: int
+    queue: int
+    timeout: float
+
+    @property
+    def retry_after(self) -> int:
+        """Giá trị header Retry-After (giây) gửi kèm 503"""
+        return max(1, math.ceil(self.timeout))
+
+    @classmethod
+    def from_env(cls, group: str, concurrency: int, queue: int, timeout: float) -> "AdmissionLimit":
+        """Đọc ADMISSION_<GROUP>_CONCURRENCY / _QUEUE / _TIMEOUT_SECONDS, mặc định theo tham số"""
+        prefix = f"ADMISSION_{group.upper()}_"
+        return cls(
+            concurrency=int(os.getenv(prefix + "CONCURRENCY", concurrency)),
+            queue=int(os.getenv(prefix + "QUEUE", queue)),
+            timeout=float(os.getenv(prefix + "TIMEOUT_SECONDS", timeout)),
+        )
+
+
+def default_limits() -> Dict[str, AdmissionLimit]:
+    """Giới hạn mặc định của từng nhóm (override bằng biến môi trường, xem .env.example)"""
+    return {
+        # Mỗi request crawl chạy 1 Chrome: ít slot, hàng chờ ngắn
+        "crawl": AdmissionLimit.from_env("crawl", concurrency=1, queue=2, timeout=30),
+        "bulk": AdmissionLimit.from_env("bulk", concurrency=4, queue=16, timeout=5),
+        "search": AdmissionLimit.from_env("search", concurrency=16, queue=64, timeout=2),
+        "point": AdmissionLimit.from_env("point", concurrency=32, queue=256, timeout=1),
+    }
+
+
+class _GroupLimiter:
+    """
+    Semaphore FIFO có giới hạn hàng chờ cho 1 nhóm route
+
+    Chỉ dùng trong event loop (không cần lock): slot được chuyển thẳng cho
+    request đứng đầu hàng chờ khi có request khác trả slot.
+    """
+
+    def __init__(self, group: str, limit: AdmissionLimit):
+        self.group = group
+        self.limit = limit
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> Optional[str]:
+        """
+        Lấy 1 slot
+
+        Returns:
+            None nếu được nhận, hoặc lý do từ chối ("queue_full" | "timeout")
+        """
+        if self.active < self.limit.concurrency and not self.waiters:
+            self.active += 1
+            ADMISSION_IN_FLIGHT.labels(group=self.group).set(self.active)
+            ADMISSION_QUEUE_WAIT.labels(group=self.group).observe(0.0)
+            return None
+
+        if len(self.waiters) >= self.limit.queue:
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        ADMISSION_QUEUE_DEPTH.labels(group=self.group).set(len(self.waiters))
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.limit.timeout)
+        except asyncio.TimeoutError:
+            # release() có thể đã chuyển slot ngay trước khi timeout
+            if not (waiter.done() and not waiter.cancelled()):
+                return "timeout"
+        except asyncio.CancelledError:
+            # Client ngắt kết nối: slot đã được chuyển cho waiter này thì trả lại,
+            # không thì nhóm mất vĩnh viễn 1 slot
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+            ADMISSION_QUEUE_DEPTH.labels(group=self.group).set(len(self.waiters))
+
+        ADMISSION_QUEUE_WAIT.labels(group=self.group).observe(time.perf_counter() - start)
+        return None
+
+    def release(self):
+        """Trả slot: chuyển cho request đầu hàng chờ (nếu còn chờ), không thì giảm active"""
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                ADMISSION_QUEUE_DEPTH.labels(group=self.group).set(len(self.waiters))
+                return
+        self.active -= 1
+        ADMISSION_IN_FLIGHT.labels(group=self.group).set(self.active)
+
+
+class AdmissionControlMiddleware:
+    """
+    Admission Control Middleware Class
+
+    Slot được giữ tới khi response gửi xong (kể cả StreamingResponse).
+
+    Example:
+        app.add_middleware(AdmissionControlMiddleware)
+        app.add_middleware(AdmissionControlMiddleware, limits={"crawl": AdmissionLimit(1, 0, 0)})
+    """
+
+    def __init__(self, app: ASGIApp, limits: Optional[Dict[str, AdmissionLimit]] = None):
+        self.app = app
+        limits = default_limits() if limits is None else limits
+        self.limiters = {group: _GroupLimiter(group, limit) for group, limit in limits.items()}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        group = ROUTE_GROUPS.get((request.method, route_template(request)))
+        limiter = self.limiters.get(group)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        reason = await limiter.acquire()
+        if reason is not None:
+            ADMISSION_REJECTED.labels(group=group, reason=reason).inc()
+            await self._reject(send, group, limiter.limit)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    @staticmethod
+    async def _reject(send: Send, group: str, limit: AdmissionLimit):
+        body = orjson.dumps({"detail": f"Server đang quá tải ({group}), vui lòng thử lại sau"})
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(limit.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,119 @@
+"""
+Compression Middleware
+Nén response bằng gzip / brotli theo Accept-Encoding (pure ASGI middleware)
+
+- Chỉ nén Content-Type dạng text (JSON, NDJSON, CSV...), bỏ qua zip/parquet/ảnh
+- Response nhỏ hơn minimum_size không được nén
+- Response đã có Content-Encoding (vd. body nén sẵn lấy từ cache) được giữ nguyên
+- StreamingResponse được nén theo từng chunk, không buffer toàn bộ body
+"""
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.compression import (
+    COMPRESSION_MIN_SIZE,
+    StreamCompressor,
+    compress,
+    is_compressible,
+    negotiate_encoding,
+)
+
+
+class CompressionMiddleware:
+    """
+    Compression Middleware Class
+
+    Example:
+        app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder)
+
+
+class _CompressionResponder:
+    """Bọc hàm send của 1 request: giữ lại response start cho tới khi biết body"""
+
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message: Message = {}
+        self.compressor = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        if self.compressor is not None:
+            await self._send_stream_chunk(message)
+            return
+
+        # Body message đầu tiên: quyết định có nén hay không
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        headers = MutableHeaders(raw=self.start_message["headers"])
+
+        if "content-encoding" in headers or not is_compressible(headers.get("content-type", "")):
+            self.passthrough = True
+            await self.send(self.start_message)
+            await self.send(message)
+            return
+
+        if "accept-encoding" not in headers.get("vary", "").lower():
+            headers.add_vary_header("Accept-Encoding")
+
+        if not more_body:
+            if len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            body = compress(body, self.encoding)
+            headers["Content-Encoding"] = self.encoding
+            headers["Content-Length"] = str(len(body))
+            await self.send(self.start_message)
+            await self.send({"type": "http.response.body", "body": body})
+            return
+
+        # Streaming: không biết trước kích thước -> luôn nén, bỏ Content-Length
+        headers["Content-Encoding"] = self.encoding
+        if "content-length" in headers:
+            del headers["content-length"]
+        self.compressor = StreamCompressor(self.encoding)
+        await self.send(self.start_message)
+        await self._send_stream_chunk(message)
+
+    async def _send_stream_chunk(self, message: Message):
+        body = self.compressor.compress(message.get("body", b""))
+        if message.get("more_body", False):
+            if body:
+                await self.send({"type": "http.response.body", "body": body, "more_body": True})
+            return
+        body += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": body})
@@ -0,0 +1,140 @@
+"""
+Profiling Middleware
+Profile theo yêu cầu cho từng request (opt-in), dùng để tìm chỗ chậm trên production
+
+Request được profile khi:
+- có header X-Profile khớp PROFILING_TOKEN (PROFILING_TOKEN rỗng -> tắt cách này), hoặc
+- được chọn ngẫu nhiên theo PROFILING_SAMPLE_RATE (0 = tắt, 0.01 = 1% request)
+
+Profile (speedscope JSON + collapsed stacks) được ghi vào PROFILING_DIR, response có
+header X-Profile-Id là tên file (không kèm đuôi). Mỗi process chỉ profile 1 request tại
+1 thời điểm; profiler lấy mẫu mọi thread đang xử lý nên request chạy song song cũng có
+thể xuất hiện trong profile. Chỉ giữ PROFILING_MAX_FILES profile mới nhất.
+"""
+
+import asyncio
+import hmac
+import logging
+import os
+import random
+import threading
+import uuid
+from datetime import datetime
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.monitoring.profiler import SamplingProfiler
+
+logger = logging.getLogger("app.profiling")
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "x-profile-id"
+
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_DIR = os.getenv("PROFILING_DIR", "profiles")
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "2"))
+PROFILING_MAX_FILES = int(os.getenv("PROFILING_MAX_FILES", "200"))
+
+
+def profiling_enabled() -> bool:
+    """Có cấu hình PROFILING_TOKEN hoặc PROFILING_SAMPLE_RATE (không thì không cần đăng ký middleware)"""
+    return bool(PROFILING_TOKEN) or PROFILING_SAMPLE_RATE > 0
+
+
+class ProfilingMiddleware:
+    """
+    Profiling Middleware Class
+
+    Đăng ký trong cùng (trước các middleware khác) để profile chỉ gồm phần xử lý
+    của app: routing, dependency, validation, handler, serialize.
+
+    Example:
+        app.add_middleware(ProfilingMiddleware)
+        app.add_middleware(ProfilingMiddleware, token="secret", sample_rate=0.01, directory="/tmp/profiles")
+
+        curl -H "X-Profile: secret" "http://localhost:8000/api/students/?search=nguyen" -D -
+        # X-Profile-Id: 20250101T120000-1a2b3c4d -> profiles/20250101T120000-1a2b3c4d.speedscope.json
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        token: str = PROFILING_TOKEN,
+        sample_rate: float = PROFILING_SAMPLE_RATE,
+        directory: str = PROFILING_DIR,
+        interval_ms: float = PROFILING_INTERVAL_MS,
+        max_files: int = PROFILING_MAX_FILES,
+    ):
+        self.app = app
+        self.token = token
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.interval = interval_ms / 1000
+        self.max_files = max_files
+        self._busy = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token) or self.sample_rate > 0
+
+    def _wants_profile(self, scope: Scope) -> bool:
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER.encode() and hmac.compare_digest(value, self.token.encode()):
+                    return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.enabled or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        # Đang có request khác được profile: xử lý bình thường, không chờ
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+        async def send_with_id(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(PROFILE_ID_HEADER, profile_id)
+            await send(message)
+
+        profiler = SamplingProfiler(interval=self.interval)
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.stop()
+            self._busy.release()
+            name = self._describe(scope, profiler)
+            # Ghi file ở threadpool, không chặn event loop
+            await asyncio.get_running_loop().run_in_executor(None, self._save, profiler, profile_id, name)
+
+    @staticmethod
+    def _describe(scope: Scope, profiler: SamplingProfiler) -> str:
+        path = scope["path"]
+        if scope.get("query_string"):
+            path += "?" + scope["query_string"].decode("latin-1")
+        return f"{scope['method']} {path} - {profiler.duration * 1000:.1f} ms, {profiler.sample_count} samples"
+
+    def _save(self, profiler: SamplingProfiler, profile_id: str, name: str):
+        try:
+            profiler.write(self.directory, profile_id, name)
+            self._prune()
+        except OSError:
+            logger.exception("Không ghi được profile %s", profile_id)
+            return
+        logger.info("Profile %s: %s", profile_id, name)
+
+    def _prune(self):
+        """Chỉ giữ max_files profile mới nhất (mỗi profile gồm nhiều file cùng id)"""
+        ids = sorted({name.split(".", 1)[0] for name in os.listdir(self.directory)})
+        for stale in ids[:-self.max_files] if self.max_files > 0 else []:
+            for name in os.listdir(self.directory):
+                if name.split(".", 1)[0] == stale:
+                    os.remove(os.path.join(self.directory, name))
+
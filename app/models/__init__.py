@@ -2,7 +2,23 @@
 Models package
 Contains database models (SQLAlchemy ORM models)
 """
-from .student import Student
-
-__all__ = ["Student"]
+from .hometown import HOMETOWN_CACHE, Hometown
+from .student import FOLDED_COLUMNS, LEGACY_HOMETOWN_COLUMNS, Student
+from .student_change import (
+    CHANGE_DELETE,
+    CHANGE_UPSERT,
+    StudentChange,
+    StudentChangeCompaction
+)
 
+__all__ = [
+    "Student",
+    "Hometown",
+    "HOMETOWN_CACHE",
+    "FOLDED_COLUMNS",
+    "LEGACY_HOMETOWN_COLUMNS",
+    "StudentChange",
+    "StudentChangeCompaction",
+    "CHANGE_UPSERT",
+    "CHANGE_DELETE"
+]
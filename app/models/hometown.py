@@ -0,0 +1,99 @@
+"""
+Hometown Model
+Định nghĩa bảng hometowns (bảng tra quê quán, students tham chiếu bằng hometown_id)
+"""
+
+import threading
+from typing import Dict, Tuple
+
+from sqlalchemy import Column, Integer, String, select
+from sqlalchemy.orm import Session
+from app.database import Base
+
+
+class Hometown(Base):
+    """
+    Hometown ORM Model
+
+    Mỗi quê quán lưu 1 lần, bảng students chỉ lưu hometown_id (số nguyên)
+    thay vì lặp lại chuỗi trên từng sinh viên. Các cách viết khác nhau của
+    cùng 1 nơi có cùng name_key (hometown_key) nên dùng chung 1 row.
+    Row được HometownRepository tạo khi gặp quê quán mới, không bao giờ bị xóa
+    (id ổn định, cache trong process không bao giờ sai).
+
+    Attributes:
+        id (int): Primary key
+        name (str): Tên hiển thị (cách viết đầu tiên gặp, hoặc tên chuẩn trong
+            HometownRepository.CANONICAL_NAMES), API trả về trong field hometown
+        name_key (str): Khóa chuẩn (hometown_key), unique
+        name_folded (str): Tên không dấu, chữ thường (fold_for_search), dùng cho tìm kiếm
+    """
+
+    __tablename__ = "hometowns"
+
+    id = Column(Integer, primary_key=True, comment="ID quê quán")
+    name = Column(String, nullable=False, comment="Tên quê quán (hiển thị)")
+    name_key = Column(String, nullable=False, unique=True, comment="Khóa chuẩn (hometown_key)")
+    name_folded = Column(String, nullable=False, comment="Tên không dấu (tìm kiếm)")
+
+    def __repr__(self):
+        """String representation của Hometown object"""
+        return f"<Hometown {self.id}: {self.name}>"
+
+
+class HometownCache:
+    """
+    Bảng tra quê quán trong process: id -> tên, khóa chuẩn -> id
+
+    Bảng hometowns chỉ có vài chục row và id không bao giờ đổi, nên cả bảng
+    được giữ trong bộ nhớ; đọc là tra dict, không khóa. Nạp cả bảng 1 lần khi
+    worker khởi động; quê quán do worker này tạo được thêm vào sau khi
+    transaction commit (add), id chưa có (do worker khác tạo) thì đọc lại cả bảng.
+
+    Example:
+        HOMETOWN_CACHE.load(db)
+        HOMETOWN_CACHE.names.get(1)  # "Hà Nội"
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.names: Dict[int, str] = {}
+        self.ids: Dict[str, int] = {}
+        self.loaded = False
+
+    def load(self, db: Session):
+        """
+        Đọc lại toàn bộ bảng hometowns (1 câu SELECT) rồi thay dict mới
+
+        Args:
+            db: SQLAlchemy session
+        """
+        rows = db.execute(select(Hometown.id, Hometown.name, Hometown.name_key)).all()
+        with self._lock:
+            # Thay cả dict (không sửa tại chỗ): thread đang đọc không thấy dict dở dang
+            self.names = {row.id: row.name for row in rows}
+            self.ids = {row.name_key: row.id for row in rows}
+            self.loaded = True
+
+    def add(self, hometowns: Dict[str, Tuple[int, str]]):
+        """
+        Thêm các quê quán vừa tạo (chỉ gọi sau khi transaction tạo chúng đã commit)
+
+        Args:
+            hometowns: Khóa chuẩn -> (id, tên hiển thị)
+        """
+        with self._lock:
+            names, ids = dict(self.names), dict(self.ids)
+            for key, (hometown_id, name) in hometowns.items():
+                names[hometown_id] = name
+                ids[key] = hometown_id
+            self.names, self.ids = names, ids
+
+    def clear(self):
+        """Xóa cache (database được thay bằng database khác)"""
+        with self._lock:
+            self.names, self.ids = {}, {}
+            self.loaded = False
+
+
+HOMETOWN_CACHE = HometownCache()
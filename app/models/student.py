@@ -3,8 +3,23 @@ Student Model
 Định nghĩa cấu trúc bảng students trong database
 """
 
-from sqlalchemy import Column, Integer, String, Float, Date
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, select
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import object_session
 from app.database import Base
+from app.models.hometown import HOMETOWN_CACHE, Hometown
+
+
+# Cột gốc -> cột không dấu tương ứng
+# (quê quán tìm kiếm qua hometowns.name_folded, không lưu trên từng sinh viên)
+FOLDED_COLUMNS = {
+    "first_name": "first_name_folded",
+    "last_name": "last_name_folded",
+}
+
+# Cột cũ của bảng students trước khi quê quán tách ra bảng hometowns
+# (scripts/migrate_hometowns.py chuyển dữ liệu sang hometown_id rồi xóa các cột này)
+LEGACY_HOMETOWN_COLUMNS = ("hometown", "hometown_folded")
 
 
 class Student(Base):
@@ -21,10 +36,17 @@ class Student(Base):
         last_name (str): Họ sinh viên (optional)
         email (str): Email sinh viên (optional)
         date_of_birth (date): Ngày sinh (optional)
-        hometown (str): Quê quán (optional)
+        hometown_id (int): Quê quán, khóa ngoại tới hometowns.id (optional)
+        hometown (str): Tên quê quán (chỉ đọc) theo hometown_id: trên object tra
+            HOMETOWN_CACHE, trong query là subquery tới hometowns; khi ghi,
+            StudentRepository đổi chuỗi quê quán sang hometown_id
         math_score (float): Điểm Toán 0-10 (optional)
         literature_score (float): Điểm Văn 0-10 (optional)
         english_score (float): Điểm Anh 0-10 (optional)
+        first_name_folded, last_name_folded (str):
+            Bản không dấu, chữ thường của tên / họ (fold_for_search),
+            do StudentRepository ghi cùng lúc với cột gốc, dùng cho tìm kiếm
+            không phân biệt dấu
     """
     
     __tablename__ = "students"
@@ -46,13 +68,44 @@ class Student(Base):
     last_name = Column(String, nullable=True, comment="Họ sinh viên")
     email = Column(String, nullable=True, comment="Email sinh viên")
     date_of_birth = Column(Date, nullable=True, comment="Ngày sinh")
-    hometown = Column(String, nullable=True, comment="Quê quán")
+    hometown_id = Column(
+        Integer,
+        ForeignKey("hometowns.id"),
+        nullable=True,
+        index=True,
+        comment="Quê quán (hometowns.id)"
+    )
     
     # Điểm số - tất cả đều optional
     math_score = Column(Float, nullable=True, comment="Điểm Toán (0-10)")
     literature_score = Column(Float, nullable=True, comment="Điểm Văn (0-10)")
     english_score = Column(Float, nullable=True, comment="Điểm Anh (0-10)")
 
+    # Cột tìm kiếm không dấu - suy ra từ cột gốc, không nhận từ client
+    first_name_folded = Column(String, nullable=True, index=True, comment="Tên không dấu (tìm kiếm)")
+    last_name_folded = Column(String, nullable=True, index=True, comment="Họ không dấu (tìm kiếm)")
+
+    @hybrid_property
+    def hometown(self):
+        """Tên quê quán, tra trong HOMETOWN_CACHE (đọc lại bảng hometowns nếu id chưa có)"""
+        if self.hometown_id is None:
+            return None
+        name = HOMETOWN_CACHE.names.get(self.hometown_id)
+        if name is None:
+            session = object_session(self)
+            if session is not None:
+                HOMETOWN_CACHE.load(session)
+                name = HOMETOWN_CACHE.names.get(self.hometown_id)
+        return name
+
+    @hometown.inplace.expression
+    @classmethod
+    def _hometown_expression(cls):
+        # Trong query: subquery theo primary key của hometowns, nên các query
+        # Core (STUDENT_RESPONSE_COLUMNS, export, change feed) vẫn có cột hometown
+        # mà không phải thêm JOIN
+        return select(Hometown.name).where(Hometown.id == cls.hometown_id).scalar_subquery().label("hometown")
+
     def __repr__(self):
         """String representation của Student object"""
         return f"<Student {self.student_code}: {self.last_name} {self.first_name}>"
@@ -0,0 +1,66 @@
+"""
+Student Change Log Model
+Định nghĩa bảng student_changes (change feed) và student_change_compactions
+"""
+
+from sqlalchemy import Column, DateTime, Integer, String, func
+from app.database import Base
+
+# Loại thay đổi trong change log
+CHANGE_UPSERT = "upsert"
+CHANGE_DELETE = "delete"
+
+
+class StudentChange(Base):
+    """
+    Student Change ORM Model
+    
+    Mỗi row ghi nhận 1 lần sinh viên được tạo/sửa (upsert) hoặc bị xóa (delete).
+    Được StudentRepository ghi trong cùng transaction với thay đổi trên bảng
+    students, nên change log luôn khớp với dữ liệu.
+    
+    Attributes:
+        version (int): Số thứ tự thay đổi, tăng dần và không bao giờ bị dùng lại
+        student_id (int): ID sinh viên bị thay đổi
+        student_code (str): Mã sinh viên tại thời điểm thay đổi
+        op (str): "upsert" hoặc "delete"
+        changed_at (datetime): Thời điểm ghi nhận (UTC)
+    """
+    
+    __tablename__ = "student_changes"
+    # AUTOINCREMENT: SQLite không dùng lại version đã bị xóa (sau compaction)
+    # changed_at dùng server default để INSERT ... SELECT cũng tự điền
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    version = Column(Integer, primary_key=True, autoincrement=True, comment="Version tăng dần")
+    student_id = Column(Integer, nullable=False, index=True, comment="ID sinh viên")
+    student_code = Column(String, nullable=False, comment="Mã sinh viên")
+    op = Column(String, nullable=False, comment="upsert | delete")
+    changed_at = Column(DateTime, nullable=False, server_default=func.current_timestamp(), comment="Thời điểm thay đổi (UTC)")
+
+    def __repr__(self):
+        """String representation của StudentChange object"""
+        return f"<StudentChange v{self.version} {self.op} {self.student_code}>"
+
+
+class StudentChangeCompaction(Base):
+    """
+    Student Change Compaction ORM Model
+    
+    Lịch sử các lần compact change log. purged_through là version lớn nhất
+    của các tombstone đã bị xóa: client sync từ version nhỏ hơn giá trị này
+    có thể đã bỏ lỡ 1 lần xóa, nên phải đồng bộ lại từ đầu.
+    
+    Attributes:
+        id (int): Primary key
+        purged_through (int): Version lớn nhất của tombstone đã bị xóa
+        removed (int): Số entry đã xóa trong lần compact này
+        compacted_at (datetime): Thời điểm compact (UTC)
+    """
+    
+    __tablename__ = "student_change_compactions"
+
+    id = Column(Integer, primary_key=True)
+    purged_through = Column(Integer, nullable=False, comment="Version lớn nhất của tombstone đã xóa")
+    removed = Column(Integer, nullable=False, comment="Số entry đã xóa")
+    compacted_at = Column(DateTime, nullable=False, server_default=func.current_timestamp(), comment="Thời điểm compact (UTC)")
@@ -0,0 +1,64 @@
+"""
+Monitoring package
+Contains instrumentation hooks và middleware đo đạc hiệu năng
+"""
+from .metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_QUEUE_WAIT,
+    ADMISSION_REJECTED,
+    ANALYTICS_SNAPSHOT_BYTES,
+    ANALYTICS_SNAPSHOT_REBUILDS,
+    ANALYTICS_SNAPSHOT_ROWS,
+    CACHE_REQUESTS,
+    COALESCED_REQUESTS,
+    CRAWL_STAGE_DURATION,
+    clear_multiprocess_dir,
+    instrument_pool,
+    mark_process_dead,
+    metrics_middleware,
+    record_cache_lookup,
+    record_coalesced_request,
+    render_metrics,
+)
+from .query_stats import (
+    QueryBudgetExceeded,
+    QueryStats,
+    count_queries,
+    extend_query_budget,
+    install_query_hooks,
+    query_budget,
+    query_stats_middleware,
+)
+from .tracing import Span, Trace, span, trace
+
+__all__ = [
+    "ADMISSION_IN_FLIGHT",
+    "ADMISSION_QUEUE_DEPTH",
+    "ADMISSION_QUEUE_WAIT",
+    "ADMISSION_REJECTED",
+    "ANALYTICS_SNAPSHOT_BYTES",
+    "ANALYTICS_SNAPSHOT_REBUILDS",
+    "ANALYTICS_SNAPSHOT_ROWS",
+    "CACHE_REQUESTS",
+    "COALESCED_REQUESTS",
+    "CRAWL_STAGE_DURATION",
+    "clear_multiprocess_dir",
+    "instrument_pool",
+    "mark_process_dead",
+    "metrics_middleware",
+    "record_cache_lookup",
+    "record_coalesced_request",
+    "render_metrics",
+    "QueryBudgetExceeded",
+    "QueryStats",
+    "count_queries",
+    "extend_query_budget",
+    "install_query_hooks",
+    "query_budget",
+    "query_stats_middleware",
+    "Span",
+    "Trace",
+    "span",
+    "trace",
+]
@@ -0,0 +1,319 @@
+"""
+Metrics
+Prometheus metrics của ứng dụng (dùng prometheus_client)
+
+- Middleware đo latency / số request đang xử lý theo route template
+- Connection pool của SQLAlchemy qua event công khai (checkout / checkin / connect)
+  và event của Session (thời gian chờ lấy connection)
+
+Metrics được giữ trong bộ nhớ của từng process. Khi chạy nhiều worker
+(APP_ENV=production), đặt PROMETHEUS_MULTIPROC_DIR trước khi import app (run.py tự
+đặt): prometheus_client ghi giá trị của mỗi worker vào file mmap trong thư mục đó và
+/metrics (ở bất kỳ worker nào) cộng dồn mọi worker qua MultiProcessCollector.
+Không đặt thì /metrics chỉ có số liệu của worker nhận request.
+"""
+
+import os
+import threading
+import time
+import weakref
+
+from fastapi import Request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.monitoring.routes import route_template
+
+# Bucket cho các stage của crawl pipeline (vài giây tới vài phút)
+CRAWL_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+# ==================== Nhiều worker ====================
+
+# Thư mục chung của các worker (run.py đặt sẵn khi chạy nhiều worker), rỗng = metrics theo từng process.
+# prometheus_client đọc biến này lúc import: phải đặt trước khi import app
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+
+
+def render_metrics() -> bytes:
+    """
+    Metrics theo Prometheus text format
+
+    Có PROMETHEUS_MULTIPROC_DIR thì là tổng của mọi worker (counter / histogram
+    cộng dồn kể cả worker đã dừng, gauge cộng / lấy max của các worker đang chạy).
+
+    Returns:
+        Nội dung trả về cho /metrics (Content-Type: CONTENT_TYPE_LATEST)
+    """
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+def clear_multiprocess_dir():
+    """
+    Tạo PROMETHEUS_MULTIPROC_DIR và xóa file của lần chạy trước
+
+    Gọi 1 lần ở process cha (run.py) trước khi khởi động các worker.
+    """
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+    for filename in os.listdir(PROMETHEUS_MULTIPROC_DIR):
+        if filename.endswith(".db"):
+            os.remove(os.path.join(PROMETHEUS_MULTIPROC_DIR, filename))
+
+
+def mark_process_dead(pid: int = None):
+    """
+    Bỏ gauge của 1 process khỏi tổng của /metrics (counter / histogram vẫn được cộng)
+
+    Gọi khi worker dừng (lifespan), hoặc ở process cha sau khi đã dùng database.
+
+    Args:
+        pid: Process cần bỏ (mặc định process hiện tại)
+    """
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return
+    multiprocess.mark_process_dead(pid or os.getpid(), PROMETHEUS_MULTIPROC_DIR)
+
+
+# ==================== HTTP ====================
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency theo route template",
+    ("method", "route", "status"),
+)
+
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Số request đang được xử lý theo route template",
+    ("method", "route"),
+    multiprocess_mode="livesum",
+)
+
+# ==================== Admission control ====================
+
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth",
+    "Số request đang xếp hàng chờ slot theo nhóm route",
+    ("group",),
+    multiprocess_mode="livesum",
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight",
+    "Số request đang giữ slot theo nhóm route",
+    ("group",),
+    multiprocess_mode="livesum",
+)
+
+ADMISSION_QUEUE_WAIT = Histogram(
+    "admission_queue_wait_seconds",
+    "Thời gian chờ slot của các request được nhận",
+    ("group",),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total",
+    "Số request bị từ chối (503) theo nhóm route và lý do (queue_full, timeout)",
+    ("group", "reason"),
+)
+
+# ==================== Database pool ====================
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Thời gian từ câu SQL / flush đầu tiên của transaction tới khi Session lấy được connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Số connection cố định của pool",
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Số connection đang được sử dụng",
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Số connection đang dùng vượt pool_size (overflow)",
+    multiprocess_mode="livesum",
+)
+
+# ==================== Cache ====================
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Số lần tra cache theo kết quả (hit ratio = hit / (hit + miss))",
+    ("cache", "result"),
+)
+
+COALESCED_REQUESTS = Counter(
+    "cache_coalesced_requests_total",
+    "Số request dùng chung kết quả query đang chạy của request khác (single-flight)",
+    ("cache",),
+)
+
+# ==================== Analytics snapshot ====================
+
+ANALYTICS_SNAPSHOT_BYTES = Gauge(
+    "analytics_snapshot_bytes",
+    "Bộ nhớ các mảng NumPy của snapshot dạng cột (0 = chưa nạp / tắt)",
+    multiprocess_mode="livesum",
+)
+
+ANALYTICS_SNAPSHOT_ROWS = Gauge(
+    "analytics_snapshot_rows",
+    "Số sinh viên trong snapshot dạng cột",
+    multiprocess_mode="livemax",
+)
+
+ANALYTICS_SNAPSHOT_REBUILDS = Counter(
+    "analytics_snapshot_rebuilds_total",
+    "Số lần nạp lại toàn bộ snapshot theo lý do (startup, drift, compacted, ...)",
+    ("reason",),
+)
+
+# ==================== Crawl pipeline ====================
+
+CRAWL_STAGE_DURATION = Histogram(
+    "crawl_stage_duration_seconds",
+    "Thời gian chạy từng stage của crawl pipeline (crawl, clean, analyze, zip)",
+    ("stage",),
+    buckets=CRAWL_BUCKETS,
+)
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    """
+    Ghi nhận 1 lần tra cache
+
+    Args:
+        cache: Tên cache (label)
+        hit: True nếu cache hit
+    """
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def record_coalesced_request(cache: str):
+    """
+    Ghi nhận 1 request được gộp vào query đang chạy (single-flight)
+
+    Args:
+        cache: Tên cache (label)
+    """
+    COALESCED_REQUESTS.labels(cache=cache).inc()
+
+
+# Session.info key: thời điểm Session bắt đầu cần connection (chưa lấy được)
+_CHECKOUT_START = "metrics_checkout_start"
+
+_instrumented_engines = weakref.WeakSet()
+
+
+def instrument_pool(engine: Engine):
+    """
+    Đo connection pool của engine bằng event công khai của SQLAlchemy
+
+    - checkout / checkin: số connection đang dùng, số connection vượt pool_size
+    - connect: kích thước pool (pool_size của QueuePool)
+    - Session do_orm_execute / before_flush -> after_begin: thời gian chờ lấy
+      connection (gồm cả mở connection mới) của câu SQL đầu tiên trong transaction
+
+    Args:
+        engine: SQLAlchemy engine của ứng dụng
+    """
+    if engine in _instrumented_engines:
+        return
+    _instrumented_engines.add(engine)
+
+    lock = threading.Lock()
+    checked_out = 0
+
+    def pool_size() -> int:
+        # size() chỉ có ở QueuePool; pool khác (SingletonThreadPool, StaticPool) không có overflow
+        size = getattr(engine.pool, "size", None)
+        return size() if size is not None else 0
+
+    def track_checkout(delta: int):
+        nonlocal checked_out
+        with lock:
+            checked_out += delta
+            DB_POOL_CHECKED_OUT.set(checked_out)
+            size = pool_size()
+            DB_POOL_OVERFLOW.set(max(0, checked_out - size) if size else 0)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        DB_POOL_SIZE.set(pool_size())
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        track_checkout(1)
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        track_checkout(-1)
+
+    def mark_checkout_start(session: Session):
+        session.info.setdefault(_CHECKOUT_START, time.perf_counter())
+
+    @event.listens_for(Session, "do_orm_execute")
+    def _on_execute(orm_execute_state):
+        mark_checkout_start(orm_execute_state.session)
+
+    @event.listens_for(Session, "before_flush")
+    def _on_flush(session, flush_context, instances):
+        mark_checkout_start(session)
+
+    @event.listens_for(Session, "after_begin")
+    def _on_begin(session, transaction, connection):
+        start = session.info.pop(_CHECKOUT_START, None)
+        if start is not None and connection.engine is engine:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+    @event.listens_for(Session, "after_transaction_end")
+    def _on_transaction_end(session, transaction):
+        # Câu SQL chạy trên connection đã có sẵn thì không có after_begin
+        if transaction.parent is None:
+            session.info.pop(_CHECKOUT_START, None)
+
+
+async def metrics_middleware(request: Request, call_next):
+    """
+    Middleware: đo latency và số request đang xử lý theo route template
+    """
+    method = request.method
+    route = route_template(request)
+    in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method=method, route=route)
+
+    in_flight.inc()
+    start = time.perf_counter()
+    status = "500"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        HTTP_REQUEST_DURATION.labels(method=method, route=route, status=status).observe(time.perf_counter() - start)
+        in_flight.dec()
@@ -0,0 +1,177 @@
+"""
+Sampling Profiler
+Lấy mẫu stack của các thread đang xử lý request theo chu kỳ, xuất ra định dạng flamegraph
+
+- Thread nền đọc sys._current_frames() mỗi `interval` giây (không cần thư viện ngoài,
+  không chèn hook vào từng lời gọi hàm như cProfile)
+- Lấy mẫu thread event loop (routing, dependency async, middleware) và các worker thread
+  của AnyIO (endpoint / dependency sync: validation, SQLAlchemy, serialize), bỏ qua
+  worker thread đang rảnh
+- Xuất speedscope JSON (mỗi thread 1 profile) và collapsed stacks
+  ("frame;frame;frame count", dùng với flamegraph.pl / speedscope)
+
+cProfile chỉ đo được thread đã gọi enable(), trong khi endpoint sync chạy ở
+threadpool, nên profiler lấy mẫu toàn bộ các thread liên quan thay vì dùng cProfile.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+
+# Tên thread của threadpool AnyIO (FastAPI chạy endpoint / dependency sync ở đây)
+WORKER_THREAD_PREFIX = "AnyIO worker thread"
+
+_WAIT_FILES = ("threading.py", "queue.py")
+
+Stack = Tuple[str, ...]
+
+
+# code object -> nhãn frame (tính 1 lần cho mỗi hàm)
+_labels: Dict[object, str] = {}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        for root in sorted((p for p in sys.path if p), key=len, reverse=True):
+            if filename.startswith(root + os.sep):
+                filename = filename[len(root) + 1:]
+                break
+        label = _labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+    return label
+
+
+def _is_idle_worker(frame) -> bool:
+    """Worker thread đang chờ việc: queue.get / Condition.wait được gọi từ vòng lặp của AnyIO"""
+    while frame is not None and frame.f_code.co_filename.endswith(_WAIT_FILES):
+        frame = frame.f_back
+    return frame is not None and "anyio" in frame.f_code.co_filename and frame.f_code.co_name == "run"
+
+
+def _stack(frame) -> Stack:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return tuple(labels)
+
+
+class SamplingProfiler:
+    """
+    Sampling Profiler Class
+
+    Example:
+        profiler = SamplingProfiler(interval=0.002)
+        profiler.start()
+        ...  # xử lý request
+        profiler.stop()
+        profiler.write("profiles", "abc", name="GET /api/students/")
+    """
+
+    def __init__(self, interval: float = 0.002, thread_ids: Optional[List[int]] = None):
+        self.interval = interval
+        # Thread luôn được lấy mẫu (mặc định: thread gọi start(), tức event loop)
+        self.thread_ids = thread_ids
+        self.samples: Dict[str, Counter] = {}
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+
+    def start(self):
+        if self.thread_ids is None:
+            self.thread_ids = [threading.get_ident()]
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._started_at
+
+    @property
+    def sample_count(self) -> int:
+        return sum(sum(counter.values()) for counter in self.samples.values())
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                name = names.get(thread_id, str(thread_id))
+                if thread_id in self.thread_ids:
+                    name = f"{name} (event loop)"
+                elif not name.startswith(WORKER_THREAD_PREFIX) or _is_idle_worker(frame):
+                    continue
+                self.samples.setdefault(name, Counter())[_stack(frame)] += 1
+
+    def collapsed(self) -> str:
+        """Collapsed stacks: mỗi dòng "thread;frame;...;frame số_mẫu" (root trước)"""
+        lines = []
+        for thread, counter in sorted(self.samples.items()):
+            for stack, count in counter.most_common():
+                frames = ";".join(label.replace(";", ":") for label in (thread, *stack))
+                lines.append(f"{frames} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str) -> bytes:
+        """Speedscope file format (https://www.speedscope.app/file-format-schema.json), 1 profile / thread"""
+        frames: List[dict] = []
+        index: Dict[str, int] = {}
+        profiles = []
+        weight = self.interval * 1000
+        for thread, counter in sorted(self.samples.items()):
+            samples, weights = [], []
+            for stack, count in counter.most_common():
+                ids = []
+                for label in stack:
+                    if label not in index:
+                        index[label] = len(frames)
+                        frames.append({"name": label})
+                    ids.append(index[label])
+                samples.append(ids)
+                weights.append(round(count * weight, 3))
+            profiles.append({
+                "type": "sampled",
+                "name": thread,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 3),
+                "samples": samples,
+                "weights": weights,
+            })
+        return orjson.dumps({
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "student-info-system sampling profiler",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        })
+
+    def write(self, directory: str, profile_id: str, name: str) -> List[str]:
+        """
+        Ghi <profile_id>.speedscope.json và <profile_id>.collapsed.txt vào directory
+
+        Returns:
+            Đường dẫn các file đã ghi
+        """
+        os.makedirs(directory, exist_ok=True)
+        speedscope_path = os.path.join(directory, f"{profile_id}.speedscope.json")
+        collapsed_path = os.path.join(directory, f"{profile_id}.collapsed.txt")
+        with open(speedscope_path, "wb") as f:
+            f.write(self.speedscope(name))
+        with open(collapsed_path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+        return [speedscope_path, collapsed_path]
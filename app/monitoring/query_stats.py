@@ -0,0 +1,214 @@
+"""
+Query Stats
+Đếm số câu SQL và tổng thời gian DB cho mỗi request
+
+- SQLAlchemy before/after_cursor_execute hooks ghi nhận từng câu lệnh
+- Middleware gắn kết quả vào header Server-Timing
+- Slow-query log cho câu lệnh vượt ngưỡng
+- Phát hiện N+1 (cùng một câu SQL lặp lại nhiều lần trong 1 request)
+- Query budget cho từng endpoint, strict mode dùng khi chạy test
+"""
+
+import logging
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.monitoring.routes import route_template
+
+logger = logging.getLogger("app.db")
+
+# Câu lệnh chạy lâu hơn ngưỡng này (ms) sẽ được ghi vào slow-query log
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+
+# Cùng một câu SQL lặp lại từ ngần này lần trong 1 request -> cảnh báo N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+# Strict mode: request vượt query budget sẽ raise lỗi thay vì chỉ log (bật khi chạy test)
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "0") == "1"
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Endpoint chạy nhiều câu SQL hơn query budget đã khai báo (strict mode)"""
+
+
+@dataclass
+class QueryStats:
+    """
+    Thống kê câu SQL trong phạm vi 1 request (hoặc 1 block count_queries)
+
+    Attributes:
+        count: Số câu lệnh đã chạy (executemany tính là 1)
+        total_time: Tổng thời gian chạy trong database (giây)
+        statements: Số lần chạy của từng câu SQL (dùng phát hiện N+1)
+        budget_extra: Số câu SQL được khai báo thêm ngoài query budget của
+            endpoint (extend_query_budget, cho thao tác có số câu tăng theo input)
+    """
+    count: int = 0
+    total_time: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+    budget_extra: int = 0
+
+    @property
+    def total_ms(self) -> float:
+        return self.total_time * 1000
+
+    def repeated_statements(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        """Các câu SQL lặp lại >= threshold lần (nghi ngờ N+1)"""
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+# Stats của request hiện tại. Sync endpoint chạy trong threadpool vẫn thấy
+# được object này vì Starlette copy context khi chuyển sang thread.
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record(statement, time.perf_counter() - conn.info["query_start_time"].pop())
+
+
+def _handle_error(exception_context):
+    # Câu lệnh lỗi (vd: IntegrityError) không đi qua after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time") and exception_context.statement:
+        _record(exception_context.statement, time.perf_counter() - conn.info["query_start_time"].pop())
+
+
+def _record(statement: str, elapsed: float):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.total_time += elapsed
+        stats.statements[statement] += 1
+
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, " ".join(statement.split()))
+
+
+def install_query_hooks(engine: Engine):
+    """
+    Gắn hooks đo câu SQL vào engine
+
+    Args:
+        engine: SQLAlchemy engine của ứng dụng
+
+    Example:
+        from app.database import engine
+        install_query_hooks(engine)
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """
+    Đếm câu SQL chạy trong block (dùng trong test/benchmark)
+
+    Example:
+        with count_queries() as stats:
+            service.update_student(1, StudentUpdate(math_score=9))
+        assert stats.count <= 2
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def query_budget(max_queries: int):
+    """
+    Khai báo số câu SQL tối đa cho 1 endpoint
+
+    Đặt bên dưới decorator của router. Vượt budget sẽ ghi warning log,
+    hoặc raise QueryBudgetExceeded khi QUERY_BUDGET_STRICT=1.
+
+    Args:
+        max_queries: Số câu SQL tối đa cho mỗi request
+
+    Example:
+        @router.get("/{student_id}")
+        @query_budget(1)
+        def get_student(...):
+            ...
+    """
+    def decorator(endpoint):
+        endpoint.__query_budget__ = max_queries
+        return endpoint
+    return decorator
+
+
+def extend_query_budget(extra_queries: int):
+    """
+    Tăng query budget của request hiện tại
+
+    Dùng cho thao tác có số câu SQL tăng theo input (vd: bulk update chạy
+    1 executemany cho mỗi nhóm field / chunk): query_budget của endpoint
+    tính cho trường hợp cơ bản, phần tăng thêm được khai báo tại nơi chạy.
+    Ngoài request (không có QueryStats) thì không làm gì.
+
+    Args:
+        extra_queries: Số câu SQL chạy thêm ngoài budget cơ bản
+
+    Example:
+        extend_query_budget(len(batches) - 1)
+    """
+    stats = _current_stats.get()
+    if stats is not None and extra_queries > 0:
+        stats.budget_extra += extra_queries
+
+
+async def query_stats_middleware(request: Request, call_next):
+    """
+    Middleware: thu thập QueryStats cho từng request
+
+    Response có header:
+        Server-Timing: db;dur=<tổng ms>;desc="<n> queries"
+        X-DB-Query-Count: <n>
+
+    Lưu ý: với StreamingResponse, các câu SQL chạy sau khi header đã gửi
+    (trong lúc stream body) không được tính vào header.
+    """
+    with count_queries() as stats:
+        response = await call_next(request)
+
+    response.headers.append("Server-Timing", f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries"')
+    response.headers["X-DB-Query-Count"] = str(stats.count)
+
+    route_path = route_template(request)
+
+    for statement, times in stats.repeated_statements():
+        logger.warning(
+            "Possible N+1 on %s %s: statement executed %d times: %s",
+            request.method, route_path, times, " ".join(statement.split())
+        )
+
+    budget = getattr(request.scope.get("endpoint"), "__query_budget__", None)
+    if budget is not None:
+        budget += stats.budget_extra
+    if budget is not None and stats.count > budget:
+        message = (
+            f"{request.method} {route_path} ran {stats.count} queries "
+            f"(budget {budget})"
+        )
+        if QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning("Query budget exceeded: %s", message)
+
+    return response
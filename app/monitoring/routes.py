@@ -0,0 +1,41 @@
+"""
+Route helpers
+Tìm route template (vd: /api/students/{student_id}) cho 1 request
+"""
+
+from starlette.requests import Request
+from starlette.routing import Match
+
+# Label dùng cho request không khớp route nào (tránh mỗi URL lạ thành 1 time series)
+UNMATCHED_ROUTE = "unmatched"
+
+
+def route_template(request: Request) -> str:
+    """
+    Lấy route template của request trước khi router xử lý
+
+    Dùng template thay vì URL thật để label metrics không bị bùng nổ
+    theo từng student_id.
+
+    Args:
+        request: Starlette/FastAPI request
+
+    Returns:
+        Path template của route khớp, hoặc UNMATCHED_ROUTE
+
+    Example:
+        route_template(request)  # "/api/students/{student_id}"
+    """
+    route = request.scope.get("route")
+    if route is not None:
+        return route.path
+
+    partial = None
+    for candidate in request.app.router.routes:
+        match, _ = candidate.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(candidate, "path", UNMATCHED_ROUTE)
+        if match == Match.PARTIAL and partial is None:
+            partial = getattr(candidate, "path", None)
+
+    return partial or UNMATCHED_ROUTE
@@ -0,0 +1,203 @@
+"""
+Tracing
+Span tracing cho pipeline crawl / clean / analyze, xuất file JSON theo định dạng OTLP
+
+- trace(name): mở 1 trace (root span), các span() lồng bên trong tự gắn parent
+  qua contextvar, kể cả khi được gọi sâu trong các module crawling
+- span() ngoài trace nào thì không ghi lại gì (module chạy độc lập vẫn dùng được)
+- Trace.to_otlp(): OpenTelemetry JSON (resourceSpans / scopeSpans / spans, giống
+  payload OTLP/HTTP JSON), mở được bằng các tool đọc OTLP (Jaeger, otel-cli, ...)
+- Trace.summary(): thời gian (ms) của các span con trực tiếp của root
+"""
+
+import logging
+import os
+import secrets
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+import orjson
+
+logger = logging.getLogger("app.tracing")
+
+TRACE_DIR = os.getenv("TRACE_DIR", "traces")
+SERVICE_NAME = "student-info-system"
+
+# Mã status của OTLP
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+@dataclass
+class Span:
+    """
+    1 đoạn thời gian có tên trong trace
+
+    Attributes:
+        name: Tên span (ví dụ "crawl.page", "analyze.chart")
+        span_id: 16 ký tự hex
+        parent_id: span_id của span cha (None nếu là root)
+        start_ns / end_ns: Thời điểm bắt đầu / kết thúc (Unix nano giây)
+        attributes: Thuộc tính đính kèm (số trang, số dòng, tên biểu đồ, ...)
+    """
+    name: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def set(self, **attributes):
+        """Thêm thuộc tính cho span (trong lúc span đang chạy)"""
+        self.attributes.update(attributes)
+
+
+class Trace:
+    """
+    Trace Class - tập các span của 1 lần chạy pipeline
+
+    Example:
+        with trace("crawl_pipeline", url=url) as current:
+            with span("crawl"):
+                ...
+        current.summary()           # {"crawl": 1234.5}
+        current.write()             # traces/<trace_id>.json
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self.root: Optional[Span] = None
+
+    def summary(self) -> Dict[str, float]:
+        """Thời gian (ms) của từng span con trực tiếp của root, cộng dồn nếu trùng tên"""
+        if self.root is None:
+            return {}
+        totals: Dict[str, float] = {}
+        for item in self.spans:
+            if item.parent_id == self.root.span_id:
+                totals[item.name] = round(totals.get(item.name, 0.0) + item.duration_ms, 2)
+        return totals
+
+    def to_otlp(self) -> dict:
+        """Trace theo định dạng OTLP JSON (ExportTraceServiceRequest)"""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{
+                    "scope": {"name": "app.tracing"},
+                    "spans": [self._otlp_span(item) for item in self.spans],
+                }],
+            }],
+        }
+
+    def _otlp_span(self, item: Span) -> dict:
+        data = {
+            "traceId": self.trace_id,
+            "spanId": item.span_id,
+            "name": item.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(item.start_ns),
+            "endTimeUnixNano": str(item.end_ns),
+            "attributes": [_attribute(key, value) for key, value in item.attributes.items()],
+            "status": {"code": STATUS_ERROR, "message": item.error} if item.error else {"code": STATUS_OK},
+        }
+        if item.parent_id:
+            data["parentSpanId"] = item.parent_id
+        return data
+
+    def write(self, directory: str = TRACE_DIR) -> str:
+        """
+        Ghi trace ra <directory>/<trace_id>.json
+
+        Returns:
+            Đường dẫn file đã ghi
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.trace_id}.json")
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(self.to_otlp()))
+        return path
+
+
+def _attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """
+    Đo 1 đoạn code thành span con của span hiện tại
+
+    Ngoài trace() thì span vẫn được tạo (để code gọi .set() không phải kiểm tra)
+    nhưng không được ghi lại.
+
+    Example:
+        with span("clean.read_csv", path=path) as current:
+            df = pd.read_csv(path)
+            current.set(rows=len(df))
+    """
+    active_trace = _current_trace.get()
+    parent = _current_span.get()
+    item = Span(
+        name=name,
+        span_id=secrets.token_hex(8),
+        parent_id=parent.span_id if parent else None,
+        start_ns=time.time_ns(),
+        attributes=dict(attributes),
+    )
+    token = _current_span.set(item)
+    try:
+        yield item
+    except BaseException as error:
+        item.error = f"{type(error).__name__}: {error}"
+        raise
+    finally:
+        _current_span.reset(token)
+        item.end_ns = time.time_ns()
+        if active_trace is not None:
+            active_trace.spans.append(item)
+            logger.debug("span %s %.1f ms %s", name, item.duration_ms, item.attributes)
+
+
+@contextmanager
+def trace(name: str, **attributes) -> Iterator[Trace]:
+    """
+    Mở trace mới với root span `name`
+
+    Example:
+        with trace("crawl_pipeline") as current:
+            run_stages()
+        print(current.summary())
+    """
+    current = Trace(name)
+    trace_token = _current_trace.set(current)
+    span_token = _current_span.set(None)
+    try:
+        with span(name, **attributes) as root:
+            current.root = root
+            yield current
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
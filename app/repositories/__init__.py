@@ -3,6 +3,8 @@ Repositories package
 Contains data access layer - tương tác trực tiếp với database
 """
 from .student_repository import StudentRepository
+from .change_log_repository import ChangeLogRepository
+from .analytics_repository import AnalyticsRepository
+from .hometown_repository import HometownRepository
 
-__all__ = ["StudentRepository"]
-
+__all__ = ["StudentRepository", "ChangeLogRepository", "AnalyticsRepository", "HometownRepository"]
@@ -0,0 +1,218 @@
+"""
+Analytics Repository
+Các câu SQL tổng hợp (GROUP BY / SUM / COUNT) trên bảng students cho API dữ liệu biểu đồ
+
+Mỗi method trả về kết quả đã gộp (vài chục đến vài nghìn row) thay vì đọc toàn bộ
+sinh viên lên Python; phần tính toán cuối (tuổi, tứ phân vị, hệ số tương quan) do
+AnalyticsService làm trên kết quả gộp.
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import case, func, literal, select, union_all
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.models import Hometown, Student
+from app.repositories.student_repository import _chunks
+
+# Các cột điểm (thứ tự dùng trong mọi kết quả)
+SCORE_COLUMNS = ("math_score", "literature_score", "english_score")
+
+# Các cột trong ma trận tương quan: 3 cột điểm + điểm trung bình
+CORRELATION_COLUMNS = SCORE_COLUMNS + ("avg_score",)
+
+# Các cột nạp vào snapshot dạng cột (StudentSnapshot), đúng thứ tự trong mỗi tuple
+SNAPSHOT_COLUMNS = ("id", "hometown_id", "date_of_birth") + SCORE_COLUMNS
+
+
+def _avg_score():
+    """Điểm trung bình của các môn có điểm trên từng row (NULL nếu không có môn nào)"""
+    scores = [getattr(Student, name) for name in SCORE_COLUMNS]
+    total = sum(func.coalesce(score, 0.0) for score in scores)
+    present = sum(case((score.isnot(None), 1), else_=0) for score in scores)
+    return total / func.nullif(present, 0)
+
+
+class AnalyticsRepository:
+    """
+    Analytics Repository Class
+
+    Chỉ chạy các câu SQL tổng hợp, không chứa business logic.
+    """
+
+    def __init__(self, db: Session):
+        """
+        Initialize repository với database session
+
+        Args:
+            db: SQLAlchemy database session
+        """
+        self.db = db
+
+    def scores_by_hometown(self) -> List[Row]:
+        """
+        Số sinh viên và điểm trung bình từng môn theo quê quán
+
+        Returns:
+            List Row (hometown, students, math_score, literature_score, english_score),
+            sắp xếp theo số sinh viên giảm dần. Điểm trung bình bỏ qua NULL
+            (NULL nếu cả quê quán không có điểm môn đó)
+        """
+        # Gộp theo hometown_id (số nguyên), tên lấy từ bảng hometowns sau khi gộp
+        # (JOIN bỏ luôn nhóm NULL). "+ 0": không cho SQLite gộp theo thứ tự index
+        # hometown_id, vì đi theo index rồi đọc từng row ngẫu nhiên chậm hơn quét tuần tự
+        hometown_id = (Student.hometown_id + 0).label("hometown_id")
+        totals = (
+            select(
+                hometown_id,
+                func.count().label("students"),
+                *(func.avg(getattr(Student, name)).label(name) for name in SCORE_COLUMNS),
+            )
+            .group_by(hometown_id)
+            .subquery()
+        )
+        stmt = (
+            select(
+                Hometown.name.label("hometown"),
+                totals.c.students,
+                *(totals.c[name] for name in SCORE_COLUMNS),
+            )
+            .join(totals, totals.c.hometown_id == Hometown.id)
+            .order_by(totals.c.students.desc(), Hometown.name)
+        )
+        return self.db.execute(stmt).all()
+
+    def score_sums_by_birth_date(self) -> List[Row]:
+        """
+        Tổng điểm và số điểm (khác NULL) từng môn theo ngày sinh
+
+        Gộp theo ngày sinh thay vì theo tuổi để SQL không phụ thuộc ngày hiện
+        tại; service quy đổi ngày sinh -> tuổi rồi gộp tiếp (tối đa vài nghìn row).
+
+        Returns:
+            List Row (date_of_birth, students, <môn>_count, <môn>_sum cho từng môn)
+        """
+        columns = [func.count().label("students")]
+        for name in SCORE_COLUMNS:
+            score = getattr(Student, name)
+            columns += [func.count(score).label(f"{name}_count"), func.sum(score).label(f"{name}_sum")]
+        stmt = (
+            select(Student.date_of_birth, *columns)
+            .where(Student.date_of_birth.isnot(None))
+            .group_by(Student.date_of_birth)
+        )
+        return self.db.execute(stmt).all()
+
+    def score_histograms(self) -> Dict[str, List[Tuple[float, int]]]:
+        """
+        Phân bố điểm từng môn: (giá trị điểm, số sinh viên), giá trị tăng dần
+
+        Điểm chỉ có vài trăm giá trị khác nhau (0-10, 2 chữ số thập phân), nên
+        histogram nhỏ nhưng đủ để tính chính xác tứ phân vị / whisker của box plot.
+        1 câu SQL (UNION ALL) cho cả 3 môn.
+
+        Returns:
+            Dict môn -> list (điểm, số lượng)
+        """
+        parts = []
+        for name in SCORE_COLUMNS:
+            score = getattr(Student, name)
+            parts.append(
+                select(literal(name).label("subject"), score.label("score"), func.count().label("students"))
+                .where(score.isnot(None))
+                .group_by(score)
+            )
+        subquery = union_all(*parts).subquery()
+        stmt = select(subquery).order_by(subquery.c.subject, subquery.c.score)
+
+        histograms: Dict[str, List[Tuple[float, int]]] = {name: [] for name in SCORE_COLUMNS}
+        for subject, score, students in self.db.execute(stmt):
+            histograms[subject].append((score, students))
+        return histograms
+
+    def correlation_sums(self) -> List[Row]:
+        """
+        Các tổng cần cho hệ số tương quan Pearson giữa các cột trong CORRELATION_COLUMNS
+
+        Gộp theo "cột nào có giá trị" (tối đa 2^4 nhóm) thay vì CASE WHEN cho
+        từng cặp cột: trong mỗi nhóm, các cột có giá trị đều khác NULL trên mọi
+        row, nên tổng của cặp (i, j) chỉ tính trên các row có cả 2 giá trị
+        (giống pandas DataFrame.corr) bằng cách cộng các nhóm có cả i và j.
+
+        Returns:
+            List Row, mỗi Row 1 nhóm: has_<i> (0/1), n, s_<i>, ss_<i>_<j> (i <= j),
+            i, j là vị trí cột trong CORRELATION_COLUMNS
+        """
+        values = select(
+            *(getattr(Student, name).label(name) for name in SCORE_COLUMNS),
+            _avg_score().label("avg_score"),
+        ).subquery()
+        columns = [values.c[name] for name in CORRELATION_COLUMNS]
+
+        flags = [case((column.isnot(None), 1), else_=0).label(f"has_{i}") for i, column in enumerate(columns)]
+        aggregates = [func.count().label("n")]
+        aggregates += [func.sum(column).label(f"s_{i}") for i, column in enumerate(columns)]
+        for i, x in enumerate(columns):
+            for j in range(i, len(columns)):
+                aggregates.append(func.sum(x * columns[j]).label(f"ss_{i}_{j}"))
+
+        stmt = select(*flags, *aggregates).group_by(*flags)
+        return self.db.execute(stmt).all()
+
+    def iter_snapshot_rows(self, ids: Optional[List[int]] = None, batch_size: int = 100_000) -> Iterator[List[tuple]]:
+        """
+        Đọc các cột SNAPSHOT_COLUMNS theo từng batch
+
+        Trên SQLite chạy qua DBAPI cursor (tuple thô, ngày sinh là chuỗi 'YYYY-MM-DD'),
+        không tạo Row / xử lý type của SQLAlchemy cho từng row.
+
+        Args:
+            ids: Chỉ đọc các sinh viên này (None = cả bảng, sắp xếp theo id),
+                chia chunk mệnh đề IN
+            batch_size: Số row mỗi batch
+
+        Yields:
+            List tuple (id, hometown_id, date_of_birth, math_score, literature_score, english_score)
+        """
+        stmt = select(*(getattr(Student, name) for name in SNAPSHOT_COLUMNS))
+        if ids is None:
+            statements = [stmt.order_by(Student.id)]
+        else:
+            statements = [stmt.where(Student.id.in_(chunk)) for chunk in _chunks(ids)]
+
+        connection = self.db.connection()
+        if connection.dialect.name != "sqlite":
+            for statement in statements:
+                for rows in self.db.execute(statement).partitions(batch_size):
+                    yield [tuple(row) for row in rows]
+            return
+
+        cursor = connection.connection.driver_connection.cursor()
+        try:
+            for statement in statements:
+                # Tham số chỉ là id số nguyên: render thẳng vào câu SQL
+                cursor.execute(str(statement.compile(
+                    dialect=connection.dialect, compile_kwargs={"literal_binds": True}
+                )))
+                while rows := cursor.fetchmany(batch_size):
+                    yield rows
+        finally:
+            cursor.close()
+
+    def snapshot_totals(self) -> Row:
+        """
+        Các tổng để kiểm tra snapshot còn khớp với bảng students (drift check)
+
+        Returns:
+            Row (students, hometowns, birth_dates, <môn>_count, <môn>_sum cho từng môn)
+        """
+        columns = [
+            func.count().label("students"),
+            func.count(Student.hometown_id).label("hometowns"),
+            func.count(Student.date_of_birth).label("birth_dates"),
+        ]
+        for name in SCORE_COLUMNS:
+            score = getattr(Student, name)
+            columns += [func.count(score).label(f"{name}_count"), func.coalesce(func.sum(score), 0.0).label(f"{name}_sum")]
+        return self.db.execute(select(*columns)).one()
@@ -0,0 +1,201 @@
+"""
+Change Log Repository
+Đọc change feed và compact bảng student_changes
+
+Các entry được StudentRepository ghi trong cùng transaction với thay đổi
+trên bảng students; repository này chỉ đọc / dọn dẹp change log.
+"""
+
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+from sqlalchemy import and_, delete, func, insert, literal, select, union_all
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.models import CHANGE_DELETE, CHANGE_UPSERT, Student, StudentChange, StudentChangeCompaction
+from app.repositories.student_repository import STUDENT_RESPONSE_COLUMNS
+
+# Các cột của change log trong kết quả get_changes (trước các cột STUDENT_RESPONSE_COLUMNS)
+CHANGE_COLUMNS = ("version", "op", "change_student_id", "change_student_code")
+
+
+class ChangeLogRepository:
+    """
+    Change Log Repository Class
+    
+    Version trong change log tăng dần theo thứ tự commit (SQLite chỉ có 1
+    writer tại một thời điểm), nên client đọc "các thay đổi sau version N"
+    không bao giờ bỏ lỡ thay đổi đã commit.
+    """
+    
+    def __init__(self, db: Session):
+        """
+        Initialize repository với database session
+        
+        Args:
+            db: SQLAlchemy database session
+        """
+        self.db = db
+    
+    def get_watermark(self) -> int:
+        """
+        Version lớn nhất của các tombstone đã bị compaction xóa
+        
+        Returns:
+            Watermark (0 nếu chưa compact lần nào)
+        """
+        return self.db.scalar(
+            select(func.coalesce(func.max(StudentChangeCompaction.purged_through), 0))
+        )
+    
+    def get_latest_version(self) -> int:
+        """
+        Version lớn nhất trong change log (tăng sau mỗi lần ghi của bất kỳ worker nào)
+        
+        MAX trên primary key nên chỉ đọc 1 entry của index. Dùng làm
+        generation cho cache cần hết hiệu lực ngay khi dữ liệu bị ghi, kể cả
+        khi ghi ở worker khác.
+        
+        Tính cả watermark: compaction có thể xóa tombstone mới nhất, khi đó
+        MAX(version) lùi về 1 version cũ (cache của version đó đã lỗi thời).
+        
+        Returns:
+            Version mới nhất, không bao giờ giảm (0 nếu change log rỗng)
+        """
+        latest = union_all(
+            select(func.max(StudentChange.version).label("version")),
+            select(func.max(StudentChangeCompaction.purged_through)),
+        ).subquery()
+        return self.db.scalar(select(func.coalesce(func.max(latest.c.version), 0)))
+    
+    def get_changed_student_ids(self, since: int, until: int) -> List[int]:
+        """
+        ID các sinh viên có thay đổi (upsert hoặc delete) với since < version <= until
+        
+        Args:
+            since: Version đã đồng bộ tới
+            until: Version mới nhất cần đồng bộ
+            
+        Returns:
+            List ID sinh viên (không trùng)
+            
+        Example:
+            ids = repository.get_changed_student_ids(since=120, until=180)
+        """
+        return list(self.db.scalars(
+            select(StudentChange.student_id)
+            .where(StudentChange.version > since, StudentChange.version <= until)
+            .distinct()
+        ))
+    
+    def get_changes(self, since: int, limit: int) -> List[Row]:
+        """
+        Lấy thay đổi mới nhất của mỗi sinh viên có version > since
+        
+        Mỗi sinh viên chỉ xuất hiện 1 lần (entry mới nhất), kèm dữ liệu hiện
+        tại của sinh viên (LEFT JOIN, null nếu đã bị xóa). Sắp xếp theo
+        version nên có thể phân trang bằng cách lấy version cuối làm since.
+        
+        Args:
+            since: Version client đã đồng bộ tới
+            limit: Số entry tối đa
+            
+        Returns:
+            List các Row: CHANGE_COLUMNS rồi tới STUDENT_RESPONSE_COLUMNS
+            
+        Example:
+            rows = repository.get_changes(since=120, limit=500)
+        """
+        latest = (
+            select(func.max(StudentChange.version).label("version"))
+            .where(StudentChange.version > since)
+            .group_by(StudentChange.student_id)
+            .subquery()
+        )
+        stmt = (
+            select(
+                StudentChange.version,
+                StudentChange.op,
+                StudentChange.student_id.label("change_student_id"),
+                StudentChange.student_code.label("change_student_code"),
+                *STUDENT_RESPONSE_COLUMNS
+            )
+            .join(latest, StudentChange.version == latest.c.version)
+            .outerjoin(Student, and_(
+                Student.id == StudentChange.student_id,
+                StudentChange.op == CHANGE_UPSERT
+            ))
+            .order_by(StudentChange.version)
+            .limit(limit)
+        )
+        return self.db.execute(stmt).all()
+    
+    def backfill(self) -> int:
+        """
+        Ghi entry upsert cho các sinh viên chưa có trong change log
+        
+        Dùng cho dữ liệu có từ trước khi có change log (hoặc được ghi thẳng
+        vào database), để client sync từ version 0 nhận đủ toàn bộ sinh viên.
+        
+        Returns:
+            Số entry đã ghi thêm
+        """
+        logged = select(StudentChange.version).where(StudentChange.student_id == Student.id)
+        result = self.db.execute(insert(StudentChange).from_select(
+            ["student_id", "student_code", "op"],
+            select(Student.id, Student.student_code, literal(CHANGE_UPSERT))
+            .where(~logged.exists())
+            .order_by(Student.id)
+        ))
+        self.db.commit()
+        return result.rowcount
+    
+    def compact(self, tombstone_before: datetime) -> Tuple[int, int]:
+        """
+        Compact change log (1 transaction)
+        
+        1. Xóa các entry đã bị entry mới hơn của cùng sinh viên thay thế
+           (feed chỉ trả entry mới nhất nên client không bị ảnh hưởng)
+        2. Xóa tombstone cũ hơn tombstone_before và ghi lại watermark: client
+           sync từ version nhỏ hơn watermark phải đồng bộ lại từ đầu
+        
+        Args:
+            tombstone_before: Tombstone ghi trước thời điểm này sẽ bị xóa
+                (datetime có timezone; datetime naive được hiểu là UTC)
+            
+        Returns:
+            (số entry đã xóa, watermark hiện tại)
+            
+        Example:
+            removed, watermark = repository.compact(datetime.now(timezone.utc) - timedelta(days=7))
+        """
+        # changed_at là CURRENT_TIMESTAMP của SQLite: UTC, lưu không kèm timezone
+        if tombstone_before.tzinfo is not None:
+            tombstone_before = tombstone_before.astimezone(timezone.utc).replace(tzinfo=None)
+        latest = select(func.max(StudentChange.version)).group_by(StudentChange.student_id)
+        removed = self.db.execute(
+            delete(StudentChange).where(StudentChange.version.not_in(latest))
+        ).rowcount
+        
+        purged_through = self.db.scalar(
+            select(func.max(StudentChange.version)).where(
+                StudentChange.op == CHANGE_DELETE,
+                StudentChange.changed_at < tombstone_before
+            )
+        )
+        watermark = self.get_watermark()
+        if purged_through:
+            removed += self.db.execute(
+                delete(StudentChange).where(
+                    StudentChange.op == CHANGE_DELETE,
+                    StudentChange.version <= purged_through
+                )
+            ).rowcount
+            watermark = max(watermark, purged_through)
+        
+        if removed:
+            self.db.add(StudentChangeCompaction(purged_through=watermark, removed=removed))
+        self.db.commit()
+        
+        return removed, watermark
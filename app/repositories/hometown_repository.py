@@ -0,0 +1,214 @@
+"""
+Hometown Repository
+Đổi chuỗi quê quán <-> hometown_id (bảng hometowns), có cache trong process
+
+Mọi đường ghi của StudentRepository đi qua with_hometown_id: quê quán đã gặp
+chỉ tốn 1 lần tra dict (HOMETOWN_CACHE), các quê quán mới của 1 lần ghi được
+tạo bằng 1 câu INSERT ... RETURNING trong cùng transaction ghi sinh viên.
+Id mới chỉ được đưa vào HOMETOWN_CACHE sau khi transaction commit: rollback
+thì SQLite có thể cấp lại id đó cho quê quán khác.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.models import HOMETOWN_CACHE, Hometown, Student
+from app.utils.text_normalization import fold_for_search, hometown_key
+
+# Key trong Session.info: quê quán đã INSERT trong transaction hiện tại, chưa commit
+_PENDING_KEY = "pending_hometowns"
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_hometowns(session: Session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        HOMETOWN_CACHE.add(pending)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_pending_hometowns(session: Session, transaction):
+    # Sau commit đã được publish ở trên; còn lại là rollback / close: bỏ id chưa commit
+    if transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+class HometownRepository:
+    """
+    Hometown Repository Class
+
+    Quê quán có cùng khóa chuẩn (hometown_key) dùng chung 1 row, tên hiển
+    thị là cách viết đầu tiên gặp (hoặc CANONICAL_NAMES nếu có).
+
+    Example:
+        hometowns = HometownRepository(db)
+        hometowns.resolve("TP. Hồ Chí Minh") == hometowns.resolve("TP.HCM")  # True
+    """
+
+    # Tên hiển thị cố định cho các khóa có nhiều cách viết phổ biến
+    CANONICAL_NAMES = {
+        "ho chi minh": "TP.HCM",
+        "ha noi": "Hà Nội",
+    }
+
+    def __init__(self, db: Session):
+        """
+        Initialize repository với database session
+
+        Args:
+            db: SQLAlchemy database session
+        """
+        self.db = db
+
+    def resolve(self, name: Optional[str]) -> Optional[int]:
+        """
+        hometown_id của 1 quê quán, tạo mới nếu chưa có
+
+        Quê quán mới được INSERT trong transaction hiện tại của session (commit
+        cùng dữ liệu sinh viên), không tốn câu SQL nào nếu đã có trong cache.
+
+        Args:
+            name: Quê quán do client gửi lên
+
+        Returns:
+            hometown_id, None nếu name là None / rỗng
+
+        Example:
+            hometown_id = repository.resolve("Hà Nội")
+        """
+        return self.resolve_many([name])[name]
+
+    def resolve_many(self, names: Iterable[Optional[str]]) -> Dict[Optional[str], Optional[int]]:
+        """
+        resolve cho nhiều quê quán: các quê quán mới được tạo bằng 1 câu INSERT
+
+        Example:
+            ids = repository.resolve_many(["Hà Nội", "Huế", "Hà Nội"])  # {"Hà Nội": 1, "Huế": 2}
+        """
+        keys = {name: hometown_key(name) for name in set(names)}
+        if not HOMETOWN_CACHE.loaded:
+            HOMETOWN_CACHE.load(self.db)
+
+        pending: Dict[str, Tuple[int, str]] = self.db.info.get(_PENDING_KEY, {})
+        missing = {}
+        for name, key in keys.items():
+            if key is not None and key not in HOMETOWN_CACHE.ids and key not in pending and key not in missing:
+                missing[key] = name
+        if missing:
+            self._create(missing)
+            pending = self.db.info.get(_PENDING_KEY, {})
+
+        def lookup(key):
+            if key is None:
+                return None
+            hometown_id = HOMETOWN_CACHE.ids.get(key)
+            return hometown_id if hometown_id is not None else pending[key][0]
+
+        return {name: lookup(key) for name, key in keys.items()}
+
+    def with_hometown_id(self, values: dict) -> dict:
+        """
+        Đổi key "hometown" (chuỗi) trong values thành "hometown_id"
+
+        Example:
+            repository.with_hometown_id({"first_name": "Lan", "hometown": "Huế"})
+            # {"first_name": "Lan", "hometown_id": 2}
+        """
+        if "hometown" not in values:
+            return values
+        converted = dict(values)
+        converted["hometown_id"] = self.resolve(converted.pop("hometown"))
+        return converted
+
+    def _create(self, names: Dict[str, str]):
+        """INSERT các quê quán chưa có (khóa chuẩn -> cách viết gặp đầu tiên) trong transaction hiện tại"""
+        rows = []
+        for key, name in names.items():
+            display = self.CANONICAL_NAMES.get(key) or " ".join(name.split())
+            rows.append({"name": display, "name_key": key, "name_folded": fold_for_search(display)})
+        stmt = (
+            insert(Hometown)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[Hometown.name_key])
+            .returning(Hometown.id, Hometown.name, Hometown.name_key)
+        )
+        created = {row.name_key: (row.id, row.name) for row in self.db.execute(stmt)}
+        self.db.info.setdefault(_PENDING_KEY, {}).update(created)
+
+        conflicts = [key for key in names if key not in created]
+        if conflicts:
+            # Worker khác đã tạo (và commit) cùng khóa: chỉ đọc các row đó, không nạp lại
+            # cả bảng (sẽ lẫn cả row chưa commit của transaction này vào cache)
+            existing = self.db.execute(
+                select(Hometown.id, Hometown.name, Hometown.name_key).where(Hometown.name_key.in_(conflicts))
+            )
+            HOMETOWN_CACHE.add({row.name_key: (row.id, row.name) for row in existing})
+
+    def backfill_from_legacy_column(self, column: str = "hometown") -> List[int]:
+        """
+        Điền hometown_id cho database cũ (quê quán còn lưu dạng chuỗi trên bảng students)
+
+        Mỗi giá trị khác nhau được resolve 1 lần, rồi 1 câu UPDATE cho cả bảng
+        tra theo bảng tạm (chuỗi cũ -> id) thay vì 1 câu UPDATE cho mỗi quê quán.
+        Chưa commit: caller ghi change log cho các sinh viên này rồi commit
+        (StudentRepository.backfill_hometowns).
+
+        Args:
+            column: Tên cột chuỗi cũ
+
+        Returns:
+            ID các sinh viên đã được điền hometown_id ([] nếu không còn cột cũ)
+
+        Example:
+            updated_ids = repository.backfill_from_legacy_column()
+        """
+        table = Student.__tablename__
+        if not self._has_legacy_column(column):
+            return []
+
+        pending = f"{column} IS NOT NULL AND hometown_id IS NULL"
+        values = self.db.execute(text(f"SELECT DISTINCT {column} FROM {table} WHERE {pending}")).scalars().all()
+        if not values:
+            return []
+        ids = self.resolve_many(values)
+
+        self.db.execute(text("CREATE TEMP TABLE hometown_backfill (value TEXT PRIMARY KEY, hometown_id INTEGER)"))
+        self.db.execute(
+            text("INSERT INTO hometown_backfill (value, hometown_id) VALUES (:value, :hometown_id)"),
+            [{"value": value, "hometown_id": hometown_id} for value, hometown_id in ids.items()]
+        )
+        updated_ids = self.db.execute(text(
+            f"UPDATE {table} SET hometown_id = "
+            f"(SELECT b.hometown_id FROM hometown_backfill b WHERE b.value = {table}.{column}) "
+            f"WHERE {pending} RETURNING id"
+        )).scalars().all()
+        self.db.execute(text("DROP TABLE hometown_backfill"))
+        return updated_ids
+
+    def count_legacy_pending(self, column: str = "hometown") -> Optional[int]:
+        """
+        Đếm sinh viên còn quê quán ở cột chuỗi cũ nhưng chưa có hometown_id
+
+        Args:
+            column: Tên cột chuỗi cũ
+
+        Returns:
+            Số sinh viên chưa chuyển, None nếu không còn cột cũ (đã migrate xong)
+
+        Example:
+            pending = repository.count_legacy_pending()
+        """
+        if not self._has_legacy_column(column):
+            return None
+        return self.db.execute(text(
+            f"SELECT COUNT(*) FROM {Student.__tablename__} "
+            f"WHERE {column} IS NOT NULL AND hometown_id IS NULL"
+        )).scalar_one()
+
+    def _has_legacy_column(self, column: str) -> bool:
+        """Bảng students còn cột cũ `column` (database tạo trước khi có bảng hometowns)"""
+        existing = inspect(self.db.get_bind()).get_columns(Student.__tablename__)
+        return any(item["name"] == column for item in existing)
@@ -5,10 +5,59 @@ Chứa các query và database operations
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from app.models import Student
-from app.schemas import StudentCreate, StudentUpdate
-from typing import Optional, List
+from sqlalchemy import and_, bindparam, delete, insert, literal, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.engine import Row
+from app.models import CHANGE_DELETE, CHANGE_UPSERT, FOLDED_COLUMNS, Hometown, Student, StudentChange
+from app.monitoring import extend_query_budget
+from app.repositories.hometown_repository import HometownRepository
+from app.schemas import StudentCreate, StudentUpdate, StudentBulkUpdateItem
+from app.utils.text_normalization import fold_for_search, hometown_key
+from typing import Iterator, Optional, List
+
+
+# Số phần tử tối đa trong 1 câu executemany / 1 mệnh đề IN
+# (SQLite giới hạn số bind parameter trong 1 câu lệnh)
+BULK_CHUNK_SIZE = 500
+
+
+def _chunks(items: list, size: int = BULK_CHUNK_SIZE):
+    """Chia list thành các đoạn tối đa `size` phần tử"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def with_folded(values: dict) -> dict:
+    """
+    Thêm giá trị các cột *_folded cho những cột gốc có trong values
+
+    Mọi đường ghi (create/update/bulk) đi qua hàm này (xem
+    StudentRepository._write_values), nên cột không dấu luôn khớp với cột gốc.
+
+    Example:
+        with_folded({"first_name": "Đức"})  # {"first_name": "Đức", "first_name_folded": "duc"}
+    """
+    folded = dict(values)
+    for source, target in FOLDED_COLUMNS.items():
+        if source in values:
+            folded[target] = fold_for_search(values[source])
+    return folded
+
+
+# Các cột trả về cho client, đúng thứ tự field của StudentResponse
+# (dùng cho các query Core trả về Row tuple thay vì ORM object)
+STUDENT_RESPONSE_COLUMNS = (
+    Student.student_code,
+    Student.first_name,
+    Student.last_name,
+    Student.email,
+    Student.date_of_birth,
+    Student.hometown,
+    Student.math_score,
+    Student.literature_score,
+    Student.english_score,
+    Student.id,
+)
 
 
 class StudentRepository:
@@ -22,6 +71,14 @@ class StudentRepository:
         - Tách biệt logic truy vấn database khỏi business logic
         - Dễ dàng thay đổi database hoặc query mà không ảnh hưởng tầng trên
         - Dễ test (có thể mock repository)
+    
+    Change log:
+        Mọi method ghi (create/update/delete/bulk) đều ghi thêm entry vào
+        bảng student_changes trong cùng transaction (xem ChangeLogRepository).
+    
+    Quê quán:
+        Client gửi / nhận chuỗi hometown, bảng students lưu hometown_id
+        (HometownRepository đổi chuỗi -> id khi ghi, Student.hometown đổi ngược lại khi đọc).
     """
     
     def __init__(self, db: Session):
@@ -32,6 +89,11 @@ class StudentRepository:
             db: SQLAlchemy database session
         """
         self.db = db
+        self.hometowns = HometownRepository(db)
+    
+    def _write_values(self, values: dict) -> dict:
+        """Dữ liệu từ schema -> giá trị các cột: thêm cột *_folded, đổi hometown sang hometown_id"""
+        return self.hometowns.with_hometown_id(with_folded(values))
     
     def get_by_id(self, student_id: int) -> Optional[Student]:
         """
@@ -65,6 +127,42 @@ class StudentRepository:
         """
         return self.db.query(Student).filter(Student.student_code == student_code).first()
     
+    def get_rows_by_ids(self, ids: List[int]) -> List[Row]:
+        """
+        Lấy nhiều sinh viên theo ID bằng 1 câu IN trên primary key
+        
+        Args:
+            ids: Danh sách ID (tối đa vài nghìn, dưới giới hạn bind parameter của SQLite)
+            
+        Returns:
+            List các Row (thứ tự bất kỳ), cột theo STUDENT_RESPONSE_COLUMNS
+            
+        Example:
+            rows = repository.get_rows_by_ids([1, 2, 3])
+        """
+        if not ids:
+            return []
+        stmt = select(*STUDENT_RESPONSE_COLUMNS).where(Student.id.in_(set(ids)))
+        return self.db.execute(stmt).all()
+    
+    def get_rows_by_student_codes(self, student_codes: List[str]) -> List[Row]:
+        """
+        Lấy nhiều sinh viên theo mã sinh viên bằng 1 câu IN trên unique index
+        
+        Args:
+            student_codes: Danh sách mã sinh viên
+            
+        Returns:
+            List các Row (thứ tự bất kỳ), cột theo STUDENT_RESPONSE_COLUMNS
+            
+        Example:
+            rows = repository.get_rows_by_student_codes(["SV001", "SV002"])
+        """
+        if not student_codes:
+            return []
+        stmt = select(*STUDENT_RESPONSE_COLUMNS).where(Student.student_code.in_(set(student_codes)))
+        return self.db.execute(stmt).all()
+    
     def get_all(
         self, 
         skip: int = 0, 
@@ -96,17 +194,79 @@ class StudentRepository:
         
         # Nếu có search term, tìm kiếm trong nhiều trường
         if search:
-            search_filter = or_(
-                Student.student_code.contains(search),
-                Student.first_name.contains(search),
-                Student.last_name.contains(search),
-                Student.email.contains(search),
-                Student.hometown.contains(search)
-            )
-            query = query.filter(search_filter)
+            query = query.filter(self._search_filter(search))
         
         return query.offset(skip).limit(limit).all()
     
+    def get_all_rows(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        search: Optional[str] = None
+    ) -> List[Row]:
+        """
+        Lấy danh sách sinh viên dạng Row tuple (không tạo ORM object)
+        
+        Cùng semantics phân trang/tìm kiếm với get_all(), nhưng select thẳng
+        các cột qua SQLAlchemy Core nên không tốn chi phí identity map và
+        khởi tạo Student object. Dùng cho các đường đọc cần throughput cao.
+        
+        Args:
+            skip: Số lượng record bỏ qua (dùng cho pagination)
+            limit: Số lượng record tối đa trả về
+            search: Từ khóa tìm kiếm (tìm trong code, tên, email, quê quán)
+            
+        Returns:
+            List các Row, cột theo thứ tự STUDENT_RESPONSE_COLUMNS
+            
+        Example:
+            rows = repository.get_all_rows(skip=0, limit=10)
+            for row in rows:
+                print(row.student_code, row.math_score)
+        """
+        stmt = select(*STUDENT_RESPONSE_COLUMNS)
+        
+        if search:
+            stmt = stmt.where(self._search_filter(search))
+        
+        return self.db.execute(stmt.offset(skip).limit(limit)).all()
+    
+    def iter_rows(
+        self,
+        search: Optional[str] = None,
+        batch_size: int = 1000
+    ) -> Iterator[List[Row]]:
+        """
+        Duyệt toàn bộ sinh viên theo từng batch bằng server-side cursor
+        
+        Dùng yield_per nên SQLAlchemy chỉ giữ tối đa batch_size row trong
+        bộ nhớ tại một thời điểm, dù bảng có 1k hay 10M row.
+        Cùng điều kiện tìm kiếm với get_all()/count().
+        
+        Args:
+            search: Từ khóa tìm kiếm (nếu có)
+            batch_size: Số row mỗi batch
+            
+        Yields:
+            List các Row (tối đa batch_size), cột theo STUDENT_RESPONSE_COLUMNS
+            
+        Example:
+            for batch in repository.iter_rows(search="Nguyen", batch_size=500):
+                for row in batch:
+                    print(row.student_code)
+        """
+        stmt = select(*STUDENT_RESPONSE_COLUMNS).order_by(Student.id)
+        
+        if search:
+            stmt = stmt.where(self._search_filter(search))
+        
+        result = self.db.execute(stmt.execution_options(yield_per=batch_size))
+        try:
+            for partition in result.partitions():
+                yield partition
+        finally:
+            result.close()
+    
     def count(self, search: Optional[str] = None) -> int:
         """
         Đếm tổng số sinh viên
@@ -124,27 +284,56 @@ class StudentRepository:
         query = self.db.query(Student)
         
         if search:
-            search_filter = or_(
-                Student.student_code.contains(search),
-                Student.first_name.contains(search),
-                Student.last_name.contains(search),
-                Student.email.contains(search),
-                Student.hometown.contains(search)
-            )
-            query = query.filter(search_filter)
+            query = query.filter(self._search_filter(search))
         
         return query.count()
     
+    @staticmethod
+    def _search_filter(search: str):
+        """
+        Điều kiện tìm kiếm dùng chung cho list/count
+        
+        Args:
+            search: Từ khóa tìm kiếm
+            
+        Tên / quê quán so khớp trên các cột *_folded (không dấu, chữ thường),
+        nên "nguyen", "Nguyễn", "NGUYEN" cho cùng kết quả. Quê quán tìm trong
+        bảng hometowns (vài chục row) rồi lọc sinh viên theo index hometown_id:
+        khớp tên hiển thị hoặc khóa chuẩn (name_key), nên các cách viết đã gộp
+        vào 1 tên chuẩn vẫn tìm được ("Hồ Chí Minh", "Sài Gòn" -> "TP.HCM").
+        
+        Returns:
+            Biểu thức OR tìm trong mã SV, tên, email, quê quán
+        """
+        folded = fold_for_search(search)
+        hometown_match = Hometown.name_folded.contains(folded)
+        key = hometown_key(search)
+        if key:
+            hometown_match = or_(hometown_match, Hometown.name_key.contains(key))
+        return or_(
+            Student.student_code.contains(search),
+            Student.first_name_folded.contains(folded),
+            Student.last_name_folded.contains(folded),
+            Student.email.contains(search),
+            Student.hometown_id.in_(select(Hometown.id).where(hometown_match))
+        )
+    
     def create(self, student_data: StudentCreate) -> Student:
         """
         Tạo sinh viên mới trong database
         
+        INSERT ... RETURNING (SQLite >= 3.35), không cần SELECT lại sau khi
+        insert, cộng 1 câu INSERT vào change log trong cùng transaction.
+        
         Args:
             student_data: Dữ liệu sinh viên (StudentCreate schema)
             
         Returns:
             Student object vừa được tạo (có kèm ID)
             
+        Raises:
+            IntegrityError: Nếu student_code đã tồn tại (unique index)
+            
         Example:
             from app.schemas import StudentCreate
             
@@ -156,13 +345,15 @@ class StudentRepository:
             new_student = repository.create(student_data)
             print(new_student.id)  # ID tự động tạo
         """
-        # Convert Pydantic model sang dict
-        db_student = Student(**student_data.model_dump())
+        stmt = insert(Student).values(**self._write_values(student_data.model_dump())).returning(Student)
         
-        # Thêm vào database
-        self.db.add(db_student)
-        self.db.commit()  # Lưu vào database
-        self.db.refresh(db_student)  # Lấy data mới (bao gồm ID)
+        try:
+            db_student = self.db.scalars(stmt).one()
+            self._log_change(db_student, CHANGE_UPSERT)
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            raise
         
         return db_student
     
@@ -170,6 +361,9 @@ class StudentRepository:
         """
         Cập nhật thông tin sinh viên
         
+        UPDATE ... RETURNING (cộng 1 câu INSERT vào change log). Không tìm
+        thấy sinh viên thì RETURNING không trả về row nào.
+        
         Args:
             student_id: ID sinh viên cần update
             student_data: Dữ liệu cần update (StudentUpdate schema)
@@ -177,23 +371,35 @@ class StudentRepository:
         Returns:
             Student object sau khi update, None nếu không tìm thấy
             
+        Raises:
+            IntegrityError: Nếu student_code mới trùng với sinh viên khác
+            
         Example:
             from app.schemas import StudentUpdate
             
             update_data = StudentUpdate(math_score=9.5, english_score=8.0)
             updated_student = repository.update(1, update_data)
         """
-        db_student = self.get_by_id(student_id)
-        if db_student is None:
-            return None
-        
         # Chỉ update các trường được gửi lên (exclude_unset=True)
         update_data = student_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_student, field, value)
+        if not update_data:
+            return self.get_by_id(student_id)
         
-        self.db.commit()
-        self.db.refresh(db_student)
+        stmt = (
+            update(Student)
+            .where(Student.id == student_id)
+            .values(**self._write_values(update_data))
+            .returning(Student)
+        )
+        
+        try:
+            db_student = self.db.scalars(stmt).one_or_none()
+            if db_student:
+                self._log_change(db_student, CHANGE_UPSERT)
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            raise
         
         return db_student
     
@@ -201,6 +407,8 @@ class StudentRepository:
         """
         Xóa sinh viên khỏi database
         
+        DELETE ... RETURNING, cộng 1 câu INSERT tombstone vào change log.
+        
         Args:
             student_id: ID sinh viên cần xóa
             
@@ -212,11 +420,11 @@ class StudentRepository:
             if deleted_student:
                 print(f"Đã xóa {deleted_student.student_code}")
         """
-        db_student = self.get_by_id(student_id)
-        if db_student is None:
-            return None
+        stmt = delete(Student).where(Student.id == student_id).returning(Student)
         
-        self.db.delete(db_student)
+        db_student = self.db.scalars(stmt).one_or_none()
+        if db_student:
+            self._log_change(db_student, CHANGE_DELETE)
         self.db.commit()
         
         return db_student
@@ -239,12 +447,269 @@ class StudentRepository:
             count = repository.bulk_create(students)
             print(f"Đã tạo {count} sinh viên")
         """
+        # Quê quán mới của cả batch: 1 câu INSERT, sau đó _write_values chỉ tra cache
+        self.hometowns.resolve_many(student.hometown for student in students_data)
         # Convert list Pydantic models sang list ORM models
-        db_students = [Student(**student.model_dump()) for student in students_data]
+        db_students = [Student(**self._write_values(student.model_dump())) for student in students_data]
         
         # Bulk insert
         self.db.bulk_save_objects(db_students)
+        
+        # Change log: INSERT ... SELECT theo mã sinh viên vừa tạo (cùng transaction)
+        log_chunks = list(_chunks([student.student_code for student in db_students]))
+        extend_query_budget(max(len(log_chunks) - 1, 0))
+        for chunk in log_chunks:
+            self._log_changes_where(Student.student_code.in_(chunk), CHANGE_UPSERT)
         self.db.commit()
         
         return len(db_students)
-
+    
+    def get_existing_codes(self, student_codes: List[str]) -> List[str]:
+        """
+        Lọc ra các mã sinh viên đã tồn tại trong database
+        
+        Dùng mệnh đề IN trên unique index student_code (chia chunk),
+        thay vì 1 câu SELECT cho mỗi mã. Chunk thứ 2 trở đi được cộng vào
+        query budget của request.
+        
+        Args:
+            student_codes: Danh sách mã sinh viên cần kiểm tra
+            
+        Returns:
+            Các mã đã tồn tại
+            
+        Example:
+            existing = repository.get_existing_codes(["SV001", "SV002"])
+        """
+        chunks = list(_chunks(student_codes))
+        extend_query_budget(max(len(chunks) - 1, 0))
+        existing = []
+        for chunk in chunks:
+            existing.extend(self.db.scalars(
+                select(Student.student_code).where(Student.student_code.in_(chunk))
+            ))
+        return existing
+    
+    def bulk_update(self, items: List[StudentBulkUpdateItem]) -> int:
+        """
+        Cập nhật nhiều sinh viên trong 1 transaction (executemany UPDATE)
+        
+        Item theo student_code được đổi sang id trước (1 SELECT mỗi chunk mã),
+        rồi các item được gom nhóm theo tập trường cần update để mỗi nhóm
+        dùng chung 1 câu UPDATE ... WHERE id = ?, chạy executemany theo từng
+        chunk BULK_CHUNK_SIZE. Lỗi ở bất kỳ chunk nào sẽ rollback toàn bộ.
+        
+        Query budget của endpoint tính 1 chunk mã, 1 câu UPDATE và 1 chunk
+        change log; các nhóm / chunk thêm được khai báo qua extend_query_budget.
+        
+        Args:
+            items: List StudentBulkUpdateItem (id hoặc student_code + fields)
+            
+        Returns:
+            Số sinh viên đã được update
+            
+        Raises:
+            IntegrityError: Nếu có student_code mới bị trùng
+            
+        Example:
+            count = repository.bulk_update([
+                StudentBulkUpdateItem(student_code="SV001", fields=StudentUpdate(math_score=9)),
+                StudentBulkUpdateItem(id=2, fields=StudentUpdate(math_score=8)),
+            ])
+        """
+        table = Student.__table__
+        # Quê quán mới của cả request: 1 câu INSERT, sau đó _write_values chỉ tra cache
+        self.hometowns.resolve_many(
+            item.fields.hometown for item in items if "hometown" in item.fields.model_fields_set
+        )
+        # student_code -> id trước khi update: update có thể đổi chính student_code dùng làm khóa
+        code_chunks = list(_chunks([item.student_code for item in items if item.id is None]))
+        code_ids: dict[str, int] = {}
+        for chunk in code_chunks:
+            code_ids.update(self.db.execute(
+                select(Student.student_code, Student.id).where(Student.student_code.in_(chunk))
+            ).all())
+        
+        groups: dict[tuple, list[dict]] = {}
+        for item in items:
+            values = item.fields.model_dump(exclude_unset=True)
+            student_id = item.id if item.id is not None else code_ids.get(item.student_code)
+            if not values or student_id is None:
+                continue
+            values = self._write_values(values)
+            params = {f"v_{field}": value for field, value in values.items()}
+            params["k"] = student_id
+            groups.setdefault(tuple(sorted(values)), []).append(params)
+        
+        batches = [(fields, chunk) for fields, params_list in groups.items() for chunk in _chunks(params_list)]
+        updated_ids = sorted({params["k"] for params_list in groups.values() for params in params_list})
+        log_chunks = list(_chunks(updated_ids))
+        extend_query_budget(
+            max(len(code_chunks) - 1, 0) + max(len(batches) - 1, 0) + max(len(log_chunks) - 1, 0)
+        )
+        
+        affected = 0
+        try:
+            for fields, chunk in batches:
+                stmt = (
+                    update(table)
+                    .where(table.c.id == bindparam("k"))
+                    .values({field: bindparam(f"v_{field}") for field in fields})
+                )
+                affected += self.db.execute(stmt, chunk).rowcount
+            
+            # Change log ghi sau update (như create/update): entry mang student_code mới
+            for chunk in log_chunks:
+                self._log_changes_where(Student.id.in_(chunk), CHANGE_UPSERT)
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            raise
+        
+        return affected
+    
+    def bulk_delete(
+        self,
+        ids: Optional[List[int]] = None,
+        student_codes: Optional[List[str]] = None,
+        search: Optional[str] = None
+    ) -> int:
+        """
+        Xóa nhiều sinh viên trong 1 transaction
+        
+        - ids / student_codes: xóa sinh viên nằm trong 1 trong 2 danh sách
+          (mệnh đề IN trên index, chia chunk)
+        - search: chỉ xóa sinh viên khớp từ khóa (cùng điều kiện với get_all)
+        
+        Mỗi chunk tốn 2 câu (change log + DELETE); chunk thứ 2 trở đi được cộng
+        vào query budget của request.
+        
+        Args:
+            ids: Danh sách ID
+            student_codes: Danh sách mã sinh viên
+            search: Từ khóa tìm kiếm
+            
+        Returns:
+            Số sinh viên đã bị xóa
+            
+        Example:
+            count = repository.bulk_delete(ids=[1, 2, 3])
+            count = repository.bulk_delete(search="K65")
+        """
+        search_filter = self._search_filter(search) if search else None
+        
+        conditions = [Student.id.in_(chunk) for chunk in _chunks(ids or [])]
+        conditions += [Student.student_code.in_(chunk) for chunk in _chunks(student_codes or [])]
+        if search_filter is not None:
+            conditions = [and_(c, search_filter) for c in conditions] or [search_filter]
+        # Mỗi điều kiện: change log + DELETE
+        extend_query_budget(2 * max(len(conditions) - 1, 0))
+        
+        affected = 0
+        for condition in conditions:
+            self._log_changes_where(condition, CHANGE_DELETE)
+            affected += self.db.execute(delete(Student).where(condition)).rowcount
+        self.db.commit()
+        
+        return affected
+    
+    def backfill_folded_columns(self, batch_size: int = 5000) -> int:
+        """
+        Tính lại các cột *_folded còn thiếu (dữ liệu có từ trước khi có cột,
+        hoặc được ghi thẳng vào database không qua repository)
+        
+        Chạy theo batch, mỗi batch 1 SELECT + 1 executemany UPDATE rồi commit.
+        
+        Args:
+            batch_size: Số sinh viên mỗi batch
+            
+        Returns:
+            Số sinh viên đã được cập nhật
+            
+        Example:
+            updated = repository.backfill_folded_columns()
+        """
+        sources = list(FOLDED_COLUMNS)
+        missing = or_(*(
+            and_(getattr(Student, source).isnot(None), getattr(Student, target).is_(None))
+            for source, target in FOLDED_COLUMNS.items()
+        ))
+        table = Student.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("k"))
+            .values({target: bindparam(f"v_{target}") for target in FOLDED_COLUMNS.values()})
+        )
+        
+        updated = 0
+        last_id = 0
+        while True:
+            rows = self.db.execute(
+                select(Student.id, *(getattr(Student, source) for source in sources))
+                .where(Student.id > last_id, missing)
+                .order_by(Student.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            params = [
+                {"k": row[0], **{
+                    f"v_{FOLDED_COLUMNS[source]}": fold_for_search(value)
+                    for source, value in zip(sources, row[1:])
+                }}
+                for row in rows
+            ]
+            self.db.execute(stmt, params)
+            self.db.commit()
+            updated += len(rows)
+            last_id = rows[-1][0]
+        
+        return updated
+    
+    def _log_change(self, student: Student, op: str):
+        """
+        Ghi 1 entry vào change log (chưa commit, chạy trong transaction hiện tại)
+        
+        Args:
+            student: Sinh viên vừa thay đổi
+            op: CHANGE_UPSERT | CHANGE_DELETE
+        """
+        self.db.execute(insert(StudentChange).values(
+            student_id=student.id,
+            student_code=student.student_code,
+            op=op
+        ))
+    
+    def backfill_hometowns(self) -> int:
+        """
+        Điền hometown_id từ cột quê quán dạng chuỗi của database cũ (1 transaction)
+        
+        Tên quê quán API trả về đổi (cách viết gốc -> tên trong bảng hometowns),
+        nên các sinh viên được điền cũng được ghi vào change log: change feed
+        và cache theo version thấy được migration.
+        
+        Returns:
+            Số sinh viên đã được cập nhật (0 nếu không còn cột cũ)
+            
+        Example:
+            updated = repository.backfill_hometowns()
+        """
+        updated_ids = self.hometowns.backfill_from_legacy_column()
+        for chunk in _chunks(updated_ids):
+            self._log_changes_where(Student.id.in_(chunk), CHANGE_UPSERT)
+        self.db.commit()
+        return len(updated_ids)
+    
+    def _log_changes_where(self, condition, op: str):
+        """
+        Ghi change log cho mọi sinh viên khớp điều kiện bằng 1 câu INSERT ... SELECT
+        (chưa commit, chạy trong transaction hiện tại)
+        
+        Args:
+            condition: Điều kiện WHERE trên bảng students
+            op: CHANGE_UPSERT | CHANGE_DELETE
+        """
+        self.db.execute(insert(StudentChange).from_select(
+            ["student_id", "student_code", "op"],
+            select(Student.id, Student.student_code, literal(op)).where(condition)
+        ))
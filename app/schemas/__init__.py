@@ -8,7 +8,19 @@ from .student import (
     StudentUpdate,
     StudentResponse,
     StudentListResponse,
-    MessageResponse
+    MessageResponse,
+    StudentBulkUpdateItem,
+    StudentBulkDeleteRequest,
+    BulkOperationResponse,
+    StudentBatchGetRequest,
+    StudentBatchGetResponse,
+    StudentChangeFeedResponse
+)
+from .analytics import (
+    AgeScoresResponse,
+    CorrelationResponse,
+    HometownScoresResponse,
+    ScoreDistributionResponse
 )
 
 __all__ = [
@@ -17,6 +29,16 @@ __all__ = [
     "StudentUpdate",
     "StudentResponse",
     "StudentListResponse",
-    "MessageResponse"
+    "MessageResponse",
+    "StudentBulkUpdateItem",
+    "StudentBulkDeleteRequest",
+    "BulkOperationResponse",
+    "StudentBatchGetRequest",
+    "StudentBatchGetResponse",
+    "StudentChangeFeedResponse",
+    "AgeScoresResponse",
+    "CorrelationResponse",
+    "HometownScoresResponse",
+    "ScoreDistributionResponse"
 ]
 
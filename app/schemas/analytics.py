@@ -0,0 +1,115 @@
+"""
+Analytics Schemas
+Định nghĩa cấu trúc response của API dữ liệu biểu đồ (/api/analytics/...)
+
+Mỗi response là dữ liệu đã tổng hợp sẵn cho 1 biểu đồ, client tự vẽ.
+Điểm trung bình là null khi không có sinh viên nào có điểm môn đó.
+"""
+
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class AnalyticsResponse(BaseModel):
+    """
+    Base Analytics Response Schema
+
+    Attributes:
+        version: Version change log tại thời điểm tính (giá trị đổi = dữ liệu đã đổi)
+    """
+    version: int = Field(..., description="Version change log của dữ liệu được tổng hợp")
+
+
+class SubjectScores(BaseModel):
+    """Điểm trung bình 3 môn"""
+    math_score: Optional[float] = None
+    literature_score: Optional[float] = None
+    english_score: Optional[float] = None
+
+
+class HometownScores(SubjectScores):
+    """
+    Điểm trung bình theo quê quán
+
+    Attributes:
+        hometown: Quê quán
+        students: Số sinh viên
+    """
+    hometown: str
+    students: int
+
+
+class HometownScoresResponse(AnalyticsResponse):
+    """
+    Sử dụng trong:
+        - GET /api/analytics/hometown-scores (điểm trung bình từng môn, top quê quán đông nhất)
+        - GET /api/analytics/english-by-hometown (điểm Anh trung bình, tăng dần)
+    """
+    hometowns: list[HometownScores]
+
+
+class AgeScores(SubjectScores):
+    """
+    Điểm trung bình theo tuổi
+
+    Attributes:
+        age: Tuổi (năm, tính tới hôm nay)
+        students: Số sinh viên
+    """
+    age: int
+    students: int
+
+
+class AgeScoresResponse(AnalyticsResponse):
+    """
+    Sử dụng trong:
+        - GET /api/analytics/scores-by-age
+    """
+    ages: list[AgeScores]
+
+
+class CorrelationResponse(AnalyticsResponse):
+    """
+    Ma trận hệ số tương quan Pearson
+
+    Sử dụng trong:
+        - GET /api/analytics/correlation
+
+    Attributes:
+        columns: Tên các cột (thứ tự hàng / cột của matrix)
+        matrix: matrix[i][j] = hệ số tương quan giữa columns[i] và columns[j]
+            (null nếu không đủ dữ liệu hoặc cột không đổi)
+    """
+    columns: list[str]
+    matrix: list[list[Optional[float]]]
+
+
+class BoxStats(BaseModel):
+    """
+    Thống kê box plot của 1 môn (tứ phân vị nội suy tuyến tính, whisker 1.5 IQR như matplotlib)
+
+    Attributes:
+        subject: Tên cột điểm
+        count: Số sinh viên có điểm
+        whisker_low / whisker_high: Điểm nhỏ / lớn nhất nằm trong [q1 - 1.5 IQR, q3 + 1.5 IQR]
+        outliers: Các điểm nằm ngoài whisker và số sinh viên có điểm đó
+    """
+    subject: str
+    count: int
+    mean: Optional[float] = None
+    min: Optional[float] = None
+    q1: Optional[float] = None
+    median: Optional[float] = None
+    q3: Optional[float] = None
+    max: Optional[float] = None
+    whisker_low: Optional[float] = None
+    whisker_high: Optional[float] = None
+    outliers: list[list[float]] = Field(default_factory=list, description="[điểm, số sinh viên]")
+
+
+class ScoreDistributionResponse(AnalyticsResponse):
+    """
+    Sử dụng trong:
+        - GET /api/analytics/score-distribution
+    """
+    subjects: list[BoxStats]
@@ -4,8 +4,8 @@ Student Schemas
 Sử dụng Pydantic để validate dữ liệu đầu vào/đầu ra
 """
 
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Literal, Optional
 from datetime import date
 
 
@@ -171,3 +171,192 @@ class MessageResponse(BaseModel):
     """
     message: str = Field(..., description="Nội dung thông báo")
 
+
+class StudentBulkUpdateItem(BaseModel):
+    """
+    Student Bulk Update Item Schema
+    
+    1 phần tử trong request bulk update: xác định sinh viên bằng id HOẶC
+    student_code, kèm các trường cần update.
+    
+    Sử dụng trong:
+        - PATCH /api/students/bulk
+        
+    Example:
+        {"student_code": "SV20240001", "fields": {"math_score": 9.5}}
+        {"id": 12, "fields": {"english_score": 8.0, "literature_score": 7.0}}
+    """
+    id: Optional[int] = Field(None, description="ID sinh viên")
+    student_code: Optional[str] = Field(
+        None,
+        min_length=1,
+        max_length=20,
+        description="Mã sinh viên"
+    )
+    fields: StudentUpdate = Field(..., description="Các trường cần update")
+
+    @model_validator(mode="after")
+    def check_single_key(self):
+        if (self.id is None) == (self.student_code is None):
+            raise ValueError("Cần đúng 1 trong 2 trường: id hoặc student_code")
+        return self
+
+
+class StudentBulkDeleteRequest(BaseModel):
+    """
+    Student Bulk Delete Request Schema
+    
+    Chọn sinh viên cần xóa theo danh sách id / mã sinh viên và/hoặc theo
+    từ khóa tìm kiếm (cùng semantics với GET /api/students/?search=).
+    
+    - ids và student_codes: xóa các sinh viên nằm trong 1 trong 2 danh sách
+    - search: chỉ xóa sinh viên khớp từ khóa (nếu đi kèm danh sách thì
+      chỉ xóa những sinh viên trong danh sách VÀ khớp từ khóa)
+    
+    Sử dụng trong:
+        - POST /api/students/bulk-delete
+        
+    Example:
+        {"ids": [1, 2, 3]}
+        {"student_codes": ["SV001", "SV002"]}
+        {"search": "K65"}
+    """
+    ids: list[int] = Field(default_factory=list, description="Danh sách ID")
+    student_codes: list[str] = Field(default_factory=list, description="Danh sách mã sinh viên")
+    search: Optional[str] = Field(None, min_length=1, description="Từ khóa tìm kiếm")
+
+    @model_validator(mode="after")
+    def check_has_criteria(self):
+        if not self.ids and not self.student_codes and not self.search:
+            raise ValueError("Cần ít nhất 1 điều kiện: ids, student_codes hoặc search")
+        return self
+
+
+class BulkOperationResponse(BaseModel):
+    """
+    Bulk Operation Response Schema
+    
+    Kết quả của các thao tác bulk update/delete.
+    
+    Sử dụng trong:
+        - PATCH /api/students/bulk
+        - POST /api/students/bulk-delete
+        
+    Attributes:
+        affected: Số sinh viên bị ảnh hưởng
+        message: Nội dung thông báo
+    """
+    affected: int = Field(..., description="Số sinh viên bị ảnh hưởng")
+    message: str = Field(..., description="Nội dung thông báo")
+
+
+# Số khóa (ids + student_codes) tối đa trong 1 request batch-get
+BATCH_GET_MAX_KEYS = 1000
+
+
+class StudentBatchGetRequest(BaseModel):
+    """
+    Student Batch Get Request Schema
+    
+    Lấy nhiều sinh viên trong 1 request theo danh sách id và/hoặc mã sinh viên.
+    Tổng số khóa tối đa: BATCH_GET_MAX_KEYS.
+    
+    Sử dụng trong:
+        - POST /api/students/batch-get
+        
+    Example:
+        {"student_codes": ["SV001", "SV002"]}
+        {"ids": [1, 5, 9], "student_codes": ["SV100"]}
+    """
+    ids: list[int] = Field(default_factory=list, description="Danh sách ID")
+    student_codes: list[str] = Field(default_factory=list, description="Danh sách mã sinh viên")
+
+    @model_validator(mode="after")
+    def check_key_count(self):
+        total = len(self.ids) + len(self.student_codes)
+        if total == 0:
+            raise ValueError("Cần ít nhất 1 id hoặc student_code")
+        if total > BATCH_GET_MAX_KEYS:
+            raise ValueError(f"Tối đa {BATCH_GET_MAX_KEYS} id/student_code mỗi request")
+        return self
+
+
+class StudentBatchGetItem(BaseModel):
+    """
+    Student Batch Get Item Schema
+    
+    Kết quả cho 1 khóa trong request batch-get. Chỉ 1 trong 2 trường id /
+    student_code có giá trị (là khóa client đã gửi).
+    
+    Attributes:
+        id: ID được yêu cầu (nếu tra theo id)
+        student_code: Mã sinh viên được yêu cầu (nếu tra theo mã)
+        found: Có tìm thấy sinh viên không
+        student: Thông tin sinh viên, null nếu không tìm thấy
+    """
+    id: Optional[int] = None
+    student_code: Optional[str] = None
+    found: bool
+    student: Optional[StudentResponse] = None
+
+
+class StudentBatchGetResponse(BaseModel):
+    """
+    Student Batch Get Response Schema
+    
+    Kết quả theo đúng thứ tự request: các ids trước, rồi tới các student_codes.
+    
+    Sử dụng trong:
+        - POST /api/students/batch-get
+        
+    Attributes:
+        found: Số khóa tìm thấy
+        not_found: Số khóa không tìm thấy
+        results: Kết quả cho từng khóa
+    """
+    found: int
+    not_found: int
+    results: list[StudentBatchGetItem]
+
+
+# Số entry tối đa trong 1 trang change feed
+CHANGE_FEED_MAX_LIMIT = 5000
+
+
+class StudentChangeItem(BaseModel):
+    """
+    Student Change Item Schema
+    
+    1 entry trong change feed: thay đổi mới nhất của 1 sinh viên.
+    
+    Attributes:
+        version: Version của thay đổi
+        op: "upsert" (tạo/sửa) hoặc "delete" (tombstone)
+        student_id: ID sinh viên
+        student_code: Mã sinh viên
+        student: Dữ liệu hiện tại của sinh viên, null nếu op = "delete"
+    """
+    version: int
+    op: Literal["upsert", "delete"]
+    student_id: int
+    student_code: str
+    student: Optional[StudentResponse] = None
+
+
+class StudentChangeFeedResponse(BaseModel):
+    """
+    Student Change Feed Response Schema
+    
+    Sử dụng trong:
+        - GET /api/students/changes?since=N
+        
+    Attributes:
+        since: Version client gửi lên
+        next_since: Version dùng cho request tiếp theo
+        has_more: Còn thay đổi chưa trả về (gọi tiếp với since=next_since)
+        changes: Danh sách thay đổi, sắp xếp theo version
+    """
+    since: int
+    next_since: int
+    has_more: bool
+    changes: list[StudentChangeItem]
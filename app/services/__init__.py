@@ -3,6 +3,8 @@ Services package
 Contains business logic layer
 """
 from .student_service import StudentService
+from .crawl_service import CrawlService, PipelineResult
+from .analytics_service import AnalyticsService
 
-__all__ = ["StudentService"]
+__all__ = ["StudentService", "CrawlService", "PipelineResult", "AnalyticsService"]
 
@@ -0,0 +1,306 @@
+"""
+Analytics Service
+Dữ liệu đã tổng hợp cho các biểu đồ (thay cho ảnh PNG của pipeline crawl)
+
+- Dữ liệu lấy thẳng từ bảng students bằng SQL GROUP BY (AnalyticsRepository),
+  Python chỉ xử lý kết quả đã gộp (vài chục đến vài nghìn row)
+- JSON của từng biểu đồ được cache (kèm bản nén) với generation là version mới
+  nhất của change log: mọi lần ghi (ở bất kỳ worker nào) đều làm cache hết hiệu lực,
+  cache hit chỉ tốn 1 câu SQL đọc version
+- Cache miss: các request đồng thời cùng biểu đồ chỉ chạy query tổng hợp 1 lần
+- ANALYTICS_SNAPSHOT_ENABLED=1: cache miss tính bằng NumPy trên snapshot dạng cột
+  trong process (StudentSnapshot) thay vì quét bảng, SQL chỉ đọc các sinh viên
+  vừa thay đổi; snapshot chưa nạp xong thì vẫn dùng SQL
+"""
+
+import math
+import os
+from bisect import bisect_right
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import orjson
+from sqlalchemy.orm import Session
+
+from app.monitoring import record_cache_lookup, record_coalesced_request
+from app.repositories import AnalyticsRepository, ChangeLogRepository
+from app.repositories.analytics_repository import CORRELATION_COLUMNS, SCORE_COLUMNS
+from app.services.query_cache import SingleFlight, TTLCache
+from app.utils.compression import PrecompressedBody
+
+# Invalidation theo version change log, TTL chỉ giới hạn thời gian giữ entry ít dùng
+ANALYTICS_CACHE_TTL_SECONDS = float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "300"))
+
+# Snapshot dạng cột trong process (tắt mặc định: tốn ~44 bytes / sinh viên và cần NumPy)
+ANALYTICS_SNAPSHOT_ENABLED = os.getenv("ANALYTICS_SNAPSHOT_ENABLED", "0") == "1"
+
+# Giới hạn tuổi hợp lệ (giống plot_avgscore_and_ages)
+MAX_AGE = 120
+
+_analytics_cache = TTLCache(ANALYTICS_CACHE_TTL_SECONDS, max_entries=64)
+_analytics_flight = SingleFlight()
+
+
+def get_student_snapshot():
+    """
+    StudentSnapshot dùng chung của process, None nếu ANALYTICS_SNAPSHOT_ENABLED=0
+
+    Import app.services.student_snapshot (và NumPy) ở lần gọi đầu tiên,
+    không phải lúc import app.
+    """
+    if not ANALYTICS_SNAPSHOT_ENABLED:
+        return None
+    from app.services.student_snapshot import STUDENT_SNAPSHOT
+    return STUDENT_SNAPSHOT
+
+
+def _round(value: Optional[float], digits: int = 4) -> Optional[float]:
+    return None if value is None else round(value, digits)
+
+
+def _age(born: date, today: date) -> int:
+    return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+
+
+def _percentile(values: List[float], cumulative: List[int], count: int, q: float) -> float:
+    """
+    Percentile nội suy tuyến tính (như numpy.percentile mặc định) trên histogram
+
+    Args:
+        values: Các giá trị khác nhau, tăng dần
+        cumulative: cumulative[i] = số phần tử có giá trị <= values[i]
+        count: Tổng số phần tử
+        q: 0..1
+    """
+    position = q * (count - 1)
+    lower = math.floor(position)
+
+    def nth(k: int) -> float:
+        # Phần tử thứ k (từ 0) của dãy đã sắp xếp
+        return values[bisect_right(cumulative, k)]
+
+    low, high = nth(lower), nth(min(lower + 1, count - 1))
+    return low + (high - low) * (position - lower)
+
+
+def box_stats(subject: str, histogram: List[Tuple[float, int]]) -> dict:
+    """
+    Thống kê box plot từ histogram (điểm, số lượng) đã sắp xếp tăng dần
+
+    Tứ phân vị nội suy tuyến tính, whisker là giá trị xa nhất còn nằm trong
+    1.5 IQR tính từ hộp (giống matplotlib / pandas DataFrame.plot.box).
+
+    Example:
+        box_stats("math_score", [(5.0, 2), (7.5, 1), (9.0, 1)])
+    """
+    count = sum(students for _, students in histogram)
+    if count == 0:
+        return {"subject": subject, "count": 0, "outliers": []}
+
+    values = [score for score, _ in histogram]
+    cumulative, running = [], 0
+    for _, students in histogram:
+        running += students
+        cumulative.append(running)
+
+    q1, median, q3 = (_percentile(values, cumulative, count, q) for q in (0.25, 0.5, 0.75))
+    iqr = q3 - q1
+    low_limit, high_limit = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    inside = [score for score in values if low_limit <= score <= high_limit]
+    return {
+        "subject": subject,
+        "count": count,
+        "mean": _round(sum(score * students for score, students in histogram) / count),
+        "min": values[0],
+        "q1": _round(q1),
+        "median": _round(median),
+        "q3": _round(q3),
+        "max": values[-1],
+        # Hộp luôn nằm giữa 2 whisker (q1/q3 nội suy có thể vượt giá trị thật trong khoảng)
+        "whisker_low": _round(min(inside[0], q1)) if inside else _round(q1),
+        "whisker_high": _round(max(inside[-1], q3)) if inside else _round(q3),
+        "outliers": [[score, students] for score, students in histogram
+                     if not low_limit <= score <= high_limit],
+    }
+
+
+def _pearson(n, sx, sy, sxx, syy, sxy) -> Optional[float]:
+    """Hệ số tương quan Pearson từ các tổng (None nếu < 2 cặp hoặc 1 trong 2 cột không đổi)"""
+    if not n or n < 2:
+        return None
+    covariance = n * sxy - sx * sy
+    variance_x, variance_y = n * sxx - sx * sx, n * syy - sy * sy
+    if variance_x <= 0 or variance_y <= 0:
+        return None
+    return round(max(-1.0, min(1.0, covariance / math.sqrt(variance_x * variance_y))), 4)
+
+
+class AnalyticsService:
+    """
+    Analytics Service Class
+
+    Các method *_body trả PrecompressedBody (JSON + bản nén) đã cache,
+    controller trả thẳng bằng precompressed_response.
+
+    Example:
+        body = AnalyticsService(db).hometown_scores_body(top=5)
+    """
+
+    def __init__(self, db: Session):
+        """
+        Initialize service với database session
+
+        Args:
+            db: SQLAlchemy database session
+        """
+        self.db = db
+        self.repository = AnalyticsRepository(db)
+        self.change_log = ChangeLogRepository(db)
+
+    def _source(self, version: int) -> Any:
+        """
+        Nguồn dữ liệu tổng hợp: snapshot dạng cột (đã đồng bộ tới version) nếu bật
+        và đã nạp, ngược lại AnalyticsRepository (cùng các method, cùng kết quả)
+        """
+        snapshot = get_student_snapshot()
+        columns = snapshot.sync(self.db, version) if snapshot is not None else None
+        return columns if columns is not None else self.repository
+
+    def _cached(self, key: tuple, compute: Callable[[Any], dict]) -> PrecompressedBody:
+        """
+        Lấy JSON của 1 biểu đồ từ cache, miss thì tính (single-flight) rồi lưu cache
+
+        Args:
+            key: Tên biểu đồ + tham số
+            compute: Hàm nhận nguồn dữ liệu (xem _source), trả dict dữ liệu của
+                biểu đồ (chưa có "version")
+        """
+        version = self.change_log.get_latest_version()
+        body = _analytics_cache.get(key, version)
+        record_cache_lookup("analytics", hit=body is not None)
+        if body is not None:
+            return body
+
+        body, shared = _analytics_flight.do(
+            (key, version),
+            lambda: PrecompressedBody(orjson.dumps({"version": version, **compute(self._source(version))}))
+        )
+        if shared:
+            record_coalesced_request("analytics")
+        else:
+            _analytics_cache.set(key, body, version)
+        return body
+
+    @staticmethod
+    def _hometowns(source) -> List[dict]:
+        return [
+            {
+                "hometown": row.hometown,
+                "students": row.students,
+                **{name: _round(getattr(row, name)) for name in SCORE_COLUMNS},
+            }
+            for row in source.scores_by_hometown()
+        ]
+
+    def hometown_scores_body(self, top: int = 5) -> PrecompressedBody:
+        """
+        Điểm trung bình từng môn của `top` quê quán đông sinh viên nhất
+        (dữ liệu của plot_avgscore_by_hometown_and_subject)
+
+        Args:
+            top: Số quê quán (0 = tất cả), sắp xếp theo số sinh viên giảm dần
+
+        Returns:
+            PrecompressedBody của JSON theo HometownScoresResponse
+        """
+        def compute(source):
+            hometowns = self._hometowns(source)
+            return {"hometowns": hometowns[:top] if top else hometowns}
+        return self._cached(("hometown_scores", top), compute)
+
+    def english_by_hometown_body(self) -> PrecompressedBody:
+        """
+        Điểm Anh trung bình của tất cả quê quán, tăng dần, null ở cuối
+        (dữ liệu của plot_avg_english_by_hometown)
+
+        Returns:
+            PrecompressedBody của JSON theo HometownScoresResponse
+        """
+        def compute(source):
+            hometowns = sorted(
+                self._hometowns(source),
+                key=lambda item: (item["english_score"] is None, item["english_score"] or 0)
+            )
+            return {"hometowns": hometowns}
+        return self._cached(("english_by_hometown",), compute)
+
+    def scores_by_age_body(self) -> PrecompressedBody:
+        """
+        Điểm trung bình từng môn theo tuổi, tuổi tăng dần, chỉ tuổi 0-120
+        (dữ liệu của plot_avgscore_and_ages)
+
+        Tuổi tính tới hôm nay nên ngày hiện tại nằm trong cache key.
+
+        Returns:
+            PrecompressedBody của JSON theo AgeScoresResponse
+        """
+        today = date.today()
+
+        def compute(source):
+            # age -> [students, count, sum, count, sum, ...] theo thứ tự SCORE_COLUMNS
+            totals: Dict[int, List[float]] = {}
+            for row in source.score_sums_by_birth_date():
+                age = _age(row.date_of_birth, today)
+                if not 0 <= age <= MAX_AGE:
+                    continue
+                bucket = totals.setdefault(age, [0] * (1 + 2 * len(SCORE_COLUMNS)))
+                bucket[0] += row.students
+                for index, name in enumerate(SCORE_COLUMNS):
+                    bucket[1 + 2 * index] += getattr(row, f"{name}_count")
+                    bucket[2 + 2 * index] += getattr(row, f"{name}_sum") or 0.0
+
+            ages = []
+            for age in sorted(totals):
+                bucket = totals[age]
+                item = {"age": age, "students": bucket[0]}
+                for index, name in enumerate(SCORE_COLUMNS):
+                    count, total = bucket[1 + 2 * index], bucket[2 + 2 * index]
+                    item[name] = _round(total / count) if count else None
+                ages.append(item)
+            return {"ages": ages}
+        return self._cached(("scores_by_age", today), compute)
+
+    def correlation_body(self) -> PrecompressedBody:
+        """
+        Ma trận tương quan Pearson giữa 3 môn và điểm trung bình
+        (dữ liệu của plot_correlation_matrix, mỗi cặp tính trên các row có đủ 2 giá trị)
+
+        Returns:
+            PrecompressedBody của JSON theo CorrelationResponse
+        """
+        def compute(source):
+            groups = source.correlation_sums()
+            size = len(CORRELATION_COLUMNS)
+            matrix: List[List[Optional[float]]] = [[None] * size for _ in range(size)]
+            for i in range(size):
+                for j in range(i, size):
+                    # Các nhóm có cả cột i và j: mọi row trong nhóm đều có đủ 2 giá trị
+                    both = [group for group in groups if getattr(group, f"has_{i}") and getattr(group, f"has_{j}")]
+                    sums = [sum(getattr(group, name) for group in both) for name in
+                            ("n", f"s_{i}", f"s_{j}", f"ss_{i}_{i}", f"ss_{j}_{j}", f"ss_{i}_{j}")]
+                    matrix[i][j] = matrix[j][i] = _pearson(*sums)
+            return {"columns": list(CORRELATION_COLUMNS), "matrix": matrix}
+        return self._cached(("correlation",), compute)
+
+    def score_distribution_body(self) -> PrecompressedBody:
+        """
+        Thống kê box plot (tứ phân vị, whisker, outlier) của từng môn
+        (dữ liệu của plot_score_box)
+
+        Returns:
+            PrecompressedBody của JSON theo ScoreDistributionResponse
+        """
+        def compute(source):
+            histograms = source.score_histograms()
+            return {"subjects": [box_stats(name, histograms[name]) for name in SCORE_COLUMNS]}
+        return self._cached(("score_distribution",), compute)
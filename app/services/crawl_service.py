@@ -0,0 +1,177 @@
+"""
+Crawl Service
+Chạy pipeline crawl -> clean -> analyze -> zip ảnh biểu đồ
+
+Các module crawling (pandas, numpy, matplotlib, seaborn, selenium) chỉ được
+import khi pipeline chạy lần đầu, để API worker không phải load chúng lúc
+khởi động.
+
+Mỗi lần chạy dùng 1 thư mục riêng (runs/<trace_id>/: CSV thô, CSV đã làm sạch,
+ảnh trong img/), các lần chạy đồng thời không xóa / ghi xen / đọc file ghi dở
+của nhau. Ảnh được cache theo nội dung dữ liệu đã làm sạch
+(app/crawling/chart_cache.py).
+
+Mỗi lần chạy là 1 trace (span cho từng stage, từng trang crawl, từng bước clean,
+từng biểu đồ), ghi ra TRACE_DIR/<trace_id>.json theo định dạng OTLP JSON.
+"""
+
+import io
+import logging
+import math
+import os
+import shutil
+import sys
+from dataclasses import dataclass
+from typing import Dict, Optional
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+from fastapi import HTTPException
+
+from app.crawling.chart_cache import CRAWLING_DIR, get_chart_cache
+from app.monitoring import CRAWL_STAGE_DURATION, Span, span, trace
+
+logger = logging.getLogger("app.crawling")
+
+# Thư mục của từng lần chạy: runs/<trace_id>/ (xóa khi chạy xong)
+PIPELINE_RUNS_DIR = os.path.join(CRAWLING_DIR, "runs")
+
+
+@dataclass
+class PipelineResult:
+    """
+    Kết quả 1 lần chạy pipeline
+
+    Attributes:
+        zip_bytes: Nội dung file zip chứa các ảnh biểu đồ
+        trace_id: Id của trace (file TRACE_DIR/<trace_id>.json)
+        timings: Thời gian (ms) từng stage: crawl, clean, analyze, zip
+    """
+    zip_bytes: bytes
+    trace_id: str
+    timings: Dict[str, float]
+
+
+class CrawlService:
+    """
+    Crawl Service Class
+
+    Điều phối crawl pipeline cho endpoint /api/students/crawl-students.
+    """
+
+    @staticmethod
+    def warm_up_driver_pool():
+        """
+        Khởi động sẵn các Chrome WebDriver trong pool (chạy ở background lúc worker khởi động)
+
+        Import stack crawling (selenium) ngay lúc gọi, nên chỉ dùng khi bật
+        CRAWL_DRIVER_PREWARM.
+        """
+        from app.crawling.driver_pool import get_driver_pool
+        get_driver_pool().warm_up()
+
+    @staticmethod
+    def shutdown():
+        """Đóng WebDriver pool khi worker tắt (không import selenium nếu pool chưa từng được dùng)"""
+        driver_pool = sys.modules.get("app.crawling.driver_pool")
+        if driver_pool is not None:
+            driver_pool.close_driver_pool()
+
+    def run_pipeline(self, url: str) -> PipelineResult:
+        """
+        Crawl dữ liệu sinh viên, làm sạch, vẽ biểu đồ và nén ảnh thành zip
+
+        Args:
+            url: Trang danh sách sinh viên cần crawl
+
+        Returns:
+            PipelineResult: file zip + trace id + thời gian từng stage
+
+        Raises:
+            HTTPException 503: Không có WebDriver rảnh (kèm Retry-After)
+            HTTPException 500: Crawl lỗi
+
+        Example:
+            result = CrawlService().run_pipeline("http://localhost:3000/students")
+            result.timings  # {"crawl": 15320.4, "clean": 41.2, "analyze": 2310.8, "zip": 3.1}
+        """
+        # Import lazy: stack crawling/analysis rất nặng, chỉ load khi cần
+        from app.crawling.students_crawl import CrawlBusyError, CrawlError, crawl_students
+        from app.crawling.clean_data import clean_student_data
+
+        with trace("crawl_pipeline", url=url) as pipeline:
+            data_dir = os.path.join(PIPELINE_RUNS_DIR, pipeline.trace_id)
+            run_dir = os.path.join(data_dir, "img")
+            try:
+                # Step 1: Crawl data and export to CSV
+                with CRAWL_STAGE_DURATION.labels(stage="crawl").time(), span("crawl"):
+                    try:
+                        raw_filename = crawl_students(url, os.path.join(data_dir, "raw_students_data.csv"))
+                    except CrawlBusyError as exc:
+                        raise HTTPException(
+                            status_code=503,
+                            detail=f"Hệ thống đang crawl, thử lại sau: {exc}",
+                            headers={"Retry-After": str(self._retry_after())}
+                        ) from exc
+                    except CrawlError as exc:
+                        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+                # Step 2: Clean data
+                with CRAWL_STAGE_DURATION.labels(stage="clean").time(), span("clean"):
+                    cleaned_filename = clean_student_data(
+                        raw_filename, os.path.join(data_dir, "cleaned_students_data.csv")
+                    )
+
+                # Step 3: Analyze data and export images (vào thư mục của lần chạy này;
+                # dữ liệu đã làm sạch + code vẽ không đổi -> lấy ảnh từ chart cache, không vẽ lại)
+                with CRAWL_STAGE_DURATION.labels(stage="analyze").time(), span("analyze") as analyze_span:
+                    self._render_charts(cleaned_filename, run_dir, analyze_span)
+
+                # Step 4: Zip images
+                buffer = io.BytesIO()
+                with CRAWL_STAGE_DURATION.labels(stage="zip").time(), span("zip") as zip_span:
+                    with ZipFile(buffer, "w", compression=ZIP_DEFLATED) as zipf:
+                        for root, _, files in os.walk(run_dir):
+                            for file in files:
+                                # PNG đã nén sẵn, deflate lại chỉ tốn CPU
+                                compress_type = ZIP_STORED if file.lower().endswith(".png") else ZIP_DEFLATED
+                                zipf.write(os.path.join(root, file), arcname=file, compress_type=compress_type)
+                    zip_span.set(files=len(zipf.namelist()), bytes=buffer.tell())
+            finally:
+                shutil.rmtree(data_dir, ignore_errors=True)
+
+        timings = pipeline.summary()
+        try:
+            path = pipeline.write()
+        except OSError:
+            logger.exception("Không ghi được trace %s", pipeline.trace_id)
+        else:
+            logger.info("Pipeline %s xong: %s (trace: %s)", pipeline.trace_id, timings, path)
+
+        return PipelineResult(zip_bytes=buffer.getvalue(), trace_id=pipeline.trace_id, timings=timings)
+
+    @staticmethod
+    def _retry_after() -> int:
+        """Retry-After (giây) khi không có WebDriver rảnh: bằng thời gian chờ checkout của pool"""
+        from app.crawling.driver_pool import CRAWL_DRIVER_CHECKOUT_TIMEOUT
+        return max(1, math.ceil(CRAWL_DRIVER_CHECKOUT_TIMEOUT))
+
+    @staticmethod
+    def _render_charts(cleaned_filename: Optional[str], run_dir: str, analyze_span: Span):
+        """Lấy ảnh biểu đồ từ chart cache vào run_dir, cache miss thì vẽ rồi lưu vào cache"""
+        from app.crawling.analysis_data import analysis_data
+
+        if cleaned_filename is None:
+            # Bước clean lỗi: analysis_data tự log lỗi, không có gì để cache
+            analysis_data(cleaned_filename, run_dir)
+            return
+
+        cache = get_chart_cache()
+        key = cache.key_for(cleaned_filename)
+        analyze_span.set(cache_key=key)
+        if cache.restore(key, run_dir) is not None:
+            analyze_span.set(cache="hit")
+            return
+
+        analyze_span.set(cache="miss")
+        if analysis_data(cleaned_filename, run_dir) is not None:
+            cache.store(key, run_dir)
@@ -0,0 +1,126 @@
+"""
+Query Cache
+Cache kết quả query đọc trong bộ nhớ process và gộp các request giống nhau
+
+- TTLCache: cache LRU có thời gian sống ngắn, key là tham số đã chuẩn hóa,
+  mỗi entry gắn với version của dữ liệu lúc tạo (version mới nhất của
+  change log), entry của version cũ tự động hết hiệu lực
+- SingleFlight: các request đồng thời cùng key chỉ chạy 1 lần, các request
+  còn lại chờ và dùng chung kết quả
+
+Entry cache nằm trong từng process, nhưng version đọc từ database nên ghi ở
+worker này cũng làm cache của các worker khác hết hiệu lực ngay.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Cache LRU có TTL, mỗi entry gắn với version (generation) của dữ liệu lúc tạo
+
+    Entry chỉ được trả về khi chưa hết hạn và generation chưa thay đổi.
+
+    Example:
+        cache = TTLCache(ttl_seconds=2, max_entries=256)
+        cache.set(key, body, generation=3)
+        body = cache.get(key, generation=3)
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, key: Hashable, generation: int) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, entry_generation, value = entry
+            if entry_generation != generation or expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, generation: int):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, generation, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _Call:
+    """1 lần thực thi đang chạy trong SingleFlight"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Gộp các lời gọi đồng thời cùng key thành 1 lần thực thi
+
+    Endpoint sync của FastAPI chạy trong threadpool, nên dùng
+    threading.Event để các thread đến sau chờ kết quả của thread đầu tiên.
+    Lỗi của lần thực thi cũng được trả về cho tất cả các thread đang chờ.
+
+    Example:
+        flight = SingleFlight()
+        body, shared = flight.do(key, lambda: run_query())
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Chạy function (hoặc chờ lần chạy đang diễn ra cùng key)
+
+        Returns:
+            (kết quả, True nếu dùng chung kết quả của thread khác)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
@@ -0,0 +1,141 @@
+"""
+Student Export Encoders
+Encode từng batch Row thành các chunk bytes (CSV / NDJSON / Parquet)
+để stream về client mà không cần giữ toàn bộ dữ liệu trong bộ nhớ
+"""
+
+import csv
+import io
+from typing import Iterable, Iterator, List
+
+import orjson
+from sqlalchemy.engine import Row
+
+from app.repositories.student_repository import STUDENT_RESPONSE_COLUMNS
+
+# Tên cột export, cùng thứ tự với StudentResponse
+EXPORT_COLUMNS = [column.key for column in STUDENT_RESPONSE_COLUMNS]
+
+# format -> (media type, đuôi file)
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def parquet_available() -> bool:
+    """Kiểm tra pyarrow (optional dependency) đã được cài chưa"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def encode_csv(batches: Iterable[List[Row]]) -> Iterator[bytes]:
+    """
+    Encode các batch Row thành CSV (UTF-8 có BOM, giống các file CSV khác của project)
+
+    Yields:
+        Header trước, sau đó mỗi batch là một chunk bytes
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(EXPORT_COLUMNS)
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def encode_ndjson(batches: Iterable[List[Row]]) -> Iterator[bytes]:
+    """
+    Encode các batch Row thành NDJSON (mỗi dòng 1 JSON object)
+
+    Yields:
+        Mỗi batch là một chunk bytes
+    """
+    for batch in batches:
+        yield b"".join(orjson.dumps(row._asdict()) + b"\n" for row in batch)
+
+
+class _ChunkSink:
+    """File-like object gom bytes mà ParquetWriter ghi ra, để lấy ra theo từng chunk"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        """Lấy ra và xóa phần bytes đã được ghi từ lần drain trước"""
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def encode_parquet(batches: Iterable[List[Row]]) -> Iterator[bytes]:
+    """
+    Encode các batch Row thành Parquet, mỗi batch là một row group
+
+    Cần pyarrow (optional dependency), import lazy để không load pyarrow
+    khi không dùng tới.
+
+    Yields:
+        Bytes của từng row group, chunk cuối chứa footer
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("student_code", pa.string()),
+        ("first_name", pa.string()),
+        ("last_name", pa.string()),
+        ("email", pa.string()),
+        ("date_of_birth", pa.date32()),
+        ("hometown", pa.string()),
+        ("math_score", pa.float64()),
+        ("literature_score", pa.float64()),
+        ("english_score", pa.float64()),
+        ("id", pa.int64()),
+    ])
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for batch in batches:
+            columns = list(zip(*batch)) if batch else [()] * len(EXPORT_COLUMNS)
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+ENCODERS = {
+    "csv": encode_csv,
+    "ndjson": encode_ndjson,
+    "parquet": encode_parquet,
+}
@@ -4,11 +4,40 @@ Lớp chứa business logic của ứng dụng
 Xử lý validation, business rules, và gọi repository
 """
 
+import os
+from datetime import datetime, timedelta, timezone
+
+import orjson
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
-from app.repositories import StudentRepository
-from app.schemas import StudentCreate, StudentUpdate, StudentResponse, StudentListResponse
-from typing import Optional, List
+from app.models import CHANGE_DELETE
+from app.repositories import ChangeLogRepository, HometownRepository, StudentRepository
+from app.repositories.change_log_repository import CHANGE_COLUMNS
+from app.schemas import (
+    StudentCreate,
+    StudentUpdate,
+    StudentResponse,
+    StudentListResponse,
+    StudentBulkUpdateItem,
+    StudentBulkDeleteRequest,
+    StudentBatchGetRequest
+)
+from app.monitoring import record_cache_lookup, record_coalesced_request
+from app.services.query_cache import SingleFlight, TTLCache
+from app.services.student_export import ENCODERS, EXPORT_FORMATS, parquet_available
+from app.utils.compression import PrecompressedBody
+from typing import Iterator, Optional, List
+
+# Số row đọc từ database mỗi lần khi export (bộ nhớ tỉ lệ với số này, không phải kích thước bảng)
+EXPORT_BATCH_SIZE = 1000
+
+# Cache kết quả danh sách sinh viên (TTL ngắn, 0 = tắt cache, single-flight vẫn bật)
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "2"))
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "256"))
+
+_student_list_cache = TTLCache(QUERY_CACHE_TTL_SECONDS, QUERY_CACHE_MAX_ENTRIES)
+_student_list_flight = SingleFlight()
 
 
 class StudentService:
@@ -38,6 +67,20 @@ class StudentService:
             db: SQLAlchemy database session
         """
         self.repository = StudentRepository(db)
+        self.change_log = ChangeLogRepository(db)
+        self.hometowns = HometownRepository(db)
+    
+    def warm_up(self):
+        """
+        Chạy trước các query đọc chính (gọi lúc worker khởi động)
+        
+        SQLAlchemy compile và cache câu SQL ở lần chạy đầu, SQLite nạp các
+        page hay dùng vào page cache, nên request thật đầu tiên không phải
+        trả chi phí này. Trang đầu danh sách cũng được nạp sẵn vào query cache.
+        """
+        self.get_all_students_json(skip=0, limit=100)
+        self.repository.get_by_id(0)
+        self.repository.get_by_student_code("")
     
     def get_student_by_id(self, student_id: int) -> StudentResponse:
         """
@@ -64,6 +107,72 @@ class StudentService:
             )
         return StudentResponse.model_validate(student)
     
+    def get_student_by_code(self, student_code: str) -> StudentResponse:
+        """
+        Lấy thông tin sinh viên theo mã sinh viên
+        
+        Args:
+            student_code: Mã sinh viên
+            
+        Returns:
+            StudentResponse schema
+            
+        Raises:
+            HTTPException 404: Nếu không tìm thấy sinh viên
+            
+        Example:
+            student = service.get_student_by_code("SV20240001")
+        """
+        student = self.repository.get_by_student_code(student_code)
+        if not student:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Không tìm thấy sinh viên với mã {student_code}"
+            )
+        return StudentResponse.model_validate(student)
+    
+    def batch_get_students_json(self, request: StudentBatchGetRequest) -> bytes:
+        """
+        Lấy nhiều sinh viên theo id/mã, trả về JSON bytes (fast path)
+        
+        Mỗi loại khóa chỉ tốn 1 câu IN trên index tương ứng. Kết quả giữ
+        đúng thứ tự request (ids trước, rồi student_codes), khóa không tìm
+        thấy có "found": false và "student": null.
+        
+        Args:
+            request: StudentBatchGetRequest
+            
+        Returns:
+            JSON bytes theo schema StudentBatchGetResponse
+            
+        Example:
+            body = service.batch_get_students_json(
+                StudentBatchGetRequest(student_codes=["SV001", "SV404"])
+            )
+        """
+        by_id = {row.id: row._asdict() for row in self.repository.get_rows_by_ids(request.ids)}
+        by_code = {
+            row.student_code: row._asdict()
+            for row in self.repository.get_rows_by_student_codes(request.student_codes)
+        }
+        
+        results = [
+            {"id": student_id, "student_code": None,
+             "found": student_id in by_id, "student": by_id.get(student_id)}
+            for student_id in request.ids
+        ] + [
+            {"id": None, "student_code": code,
+             "found": code in by_code, "student": by_code.get(code)}
+            for code in request.student_codes
+        ]
+        found = sum(1 for item in results if item["found"])
+        
+        return orjson.dumps({
+            "found": found,
+            "not_found": len(results) - found,
+            "results": results
+        })
+    
     def get_all_students(
         self, 
         skip: int = 0, 
@@ -99,6 +208,261 @@ class StudentService:
             students=[StudentResponse.model_validate(s) for s in students]
         )
     
+    def get_all_students_json(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        search: Optional[str] = None
+    ) -> bytes:
+        """
+        Lấy danh sách sinh viên, trả về JSON bytes đã serialize sẵn (fast path)
+        
+        Cùng output với get_all_students() nhưng bỏ qua bước
+        StudentResponse.model_validate cho từng row: đọc Row tuple qua Core
+        rồi serialize thẳng bằng orjson.
+        
+        Args:
+            skip: Số record bỏ qua (pagination)
+            limit: Số record tối đa trả về
+            search: Từ khóa tìm kiếm
+            
+        Returns:
+            JSON bytes dạng {"total": ..., "students": [...]}
+            
+        Example:
+            body = service.get_all_students_json(skip=0, limit=10)
+        """
+        return self.get_all_students_body(skip=skip, limit=limit, search=search).raw
+    
+    def get_all_students_body(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        search: Optional[str] = None
+    ) -> PrecompressedBody:
+        """
+        Lấy danh sách sinh viên dạng PrecompressedBody (JSON + các bản nén)
+        
+        Kết quả được cache theo tham số đã chuẩn hóa (TTL ngắn) và version mới
+        nhất của change log: ghi ở bất kỳ worker nào cũng làm cache hết hiệu lực
+        ngay (đổi lại 1 câu MAX(version) trên primary key mỗi request). Khi cache miss, các request đồng thời cùng
+        tham số chỉ chạy query 1 lần và dùng chung kết quả (single-flight).
+        Bản nén gzip/br được lưu cùng entry cache nên cache hit không phải
+        nén lại.
+        
+        Args:
+            skip: Số record bỏ qua (pagination)
+            limit: Số record tối đa trả về
+            search: Từ khóa tìm kiếm
+            
+        Returns:
+            PrecompressedBody của JSON {"total": ..., "students": [...]}
+            
+        Example:
+            body = service.get_all_students_body(skip=0, limit=10)
+            return precompressed_response(body, request.headers.get("accept-encoding", ""))
+        """
+        # search rỗng và không có search cho cùng kết quả -> cùng key
+        key = ("list", skip, limit, search or None)
+        version = self.change_log.get_latest_version()
+        
+        body = _student_list_cache.get(key, version)
+        record_cache_lookup("student_list", hit=body is not None)
+        if body is not None:
+            return body
+        
+        # version nằm trong key: request đến sau 1 lần ghi không dùng chung
+        # kết quả của query bắt đầu trước lần ghi đó
+        body, shared = _student_list_flight.do(
+            (key, version),
+            lambda: PrecompressedBody(self._query_students_json(skip, limit, search))
+        )
+        if shared:
+            record_coalesced_request("student_list")
+        else:
+            _student_list_cache.set(key, body, version)
+        return body
+    
+    def _query_students_json(self, skip: int, limit: int, search: Optional[str]) -> bytes:
+        """Chạy query danh sách + count và serialize bằng orjson (không qua cache)"""
+        rows = self.repository.get_all_rows(skip=skip, limit=limit, search=search)
+        total = self.repository.count(search=search)
+        
+        return orjson.dumps({
+            "total": total,
+            "students": [row._asdict() for row in rows]
+        })
+    
+    @staticmethod
+    def check_export_format(export_format: str) -> tuple[str, str]:
+        """
+        Kiểm tra format export có dùng được không
+        
+        Gọi trước khi bắt đầu stream, để lỗi được trả về dạng HTTP error
+        thay vì làm đứt response giữa chừng.
+        
+        Args:
+            export_format: csv | ndjson | parquet
+            
+        Returns:
+            (media type, đuôi file)
+            
+        Raises:
+            HTTPException 400: Format không hỗ trợ hoặc thiếu pyarrow cho parquet
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Format export không hỗ trợ: {export_format}"
+            )
+        if export_format == "parquet" and not parquet_available():
+            raise HTTPException(
+                status_code=400,
+                detail="Export parquet cần cài đặt pyarrow"
+            )
+        return EXPORT_FORMATS[export_format]
+    
+    def export_students(
+        self,
+        export_format: str,
+        search: Optional[str] = None,
+        batch_size: int = EXPORT_BATCH_SIZE
+    ) -> Iterator[bytes]:
+        """
+        Export sinh viên thành các chunk bytes để stream về client
+        
+        Đọc database theo từng batch (server-side cursor) và encode ngay,
+        nên bộ nhớ không phụ thuộc số lượng sinh viên.
+        Cùng điều kiện tìm kiếm với get_all_students().
+        
+        Args:
+            export_format: csv | ndjson | parquet (đã qua check_export_format)
+            search: Từ khóa tìm kiếm
+            batch_size: Số row đọc mỗi batch
+            
+        Yields:
+            Các chunk bytes đã encode
+            
+        Example:
+            for chunk in service.export_students("ndjson", search="Nguyen"):
+                output.write(chunk)
+        """
+        batches = self.repository.iter_rows(search=search, batch_size=batch_size)
+        yield from ENCODERS[export_format](batches)
+    
+    def get_changes_json(self, since: int = 0, limit: int = 1000) -> bytes:
+        """
+        Lấy các thay đổi sau version `since`, trả về JSON bytes (fast path)
+        
+        Mỗi sinh viên chỉ xuất hiện 1 lần với thay đổi mới nhất: upsert kèm
+        dữ liệu hiện tại, hoặc delete (tombstone, student = null).
+        
+        Quy trình sync của client:
+            1. Lần đầu gọi với since=0 (nhận toàn bộ sinh viên hiện có)
+            2. Lưu next_since, lần sau gọi với since=next_since
+            3. has_more = true -> gọi tiếp ngay với since=next_since
+            4. Nhận 410 -> xóa dữ liệu local, đồng bộ lại từ since=0
+        
+        Args:
+            since: Version client đã đồng bộ tới (0 = từ đầu)
+            limit: Số entry tối đa
+            
+        Returns:
+            JSON bytes theo schema StudentChangeFeedResponse
+            
+        Raises:
+            HTTPException 410: since nhỏ hơn watermark (tombstone client cần đã bị compact)
+            
+        Example:
+            body = service.get_changes_json(since=120, limit=500)
+        """
+        watermark = self.change_log.get_watermark()
+        if 0 < since < watermark:
+            raise HTTPException(
+                status_code=410,
+                detail=f"Change log trước version {watermark} đã bị compact, cần đồng bộ lại từ since=0"
+            )
+        
+        rows = self.change_log.get_changes(since=since, limit=limit + 1)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        changes = []
+        for row in rows:
+            data = row._asdict()
+            version, op, student_id, student_code = (data.pop(key) for key in CHANGE_COLUMNS)
+            # Sinh viên bị xóa ngoài ứng dụng (không có tombstone) cũng coi là delete
+            if data["id"] is None:
+                op, data = CHANGE_DELETE, None
+            changes.append({
+                "version": version,
+                "op": op,
+                "student_id": student_id,
+                "student_code": student_code,
+                "student": data
+            })
+        
+        return orjson.dumps({
+            "since": since,
+            "next_since": rows[-1].version if rows else since,
+            "has_more": has_more,
+            "changes": changes
+        })
+    
+    def backfill_change_log(self) -> int:
+        """
+        Ghi change log cho các sinh viên chưa có entry (gọi lúc worker khởi động)
+        
+        Returns:
+            Số entry đã ghi thêm
+        """
+        return self.change_log.backfill()
+    
+    def backfill_hometowns(self) -> int:
+        """
+        Chuyển quê quán dạng chuỗi của database cũ sang hometown_id
+        (scripts/migrate_hometowns.py, chạy 1 lần)
+        
+        Returns:
+            Số sinh viên đã được cập nhật
+        """
+        return self.repository.backfill_hometowns()
+    
+    def count_unmigrated_hometowns(self) -> Optional[int]:
+        """
+        Số sinh viên còn quê quán ở cột chuỗi cũ chưa chuyển sang hometown_id
+        
+        Returns:
+            Số sinh viên chưa chuyển, None nếu database không còn cột cũ
+        """
+        return self.hometowns.count_legacy_pending()
+    
+    def backfill_search_columns(self) -> int:
+        """
+        Tính các cột tìm kiếm không dấu (*_folded) còn thiếu (gọi lúc worker khởi động)
+        
+        Returns:
+            Số sinh viên đã được cập nhật
+        """
+        return self.repository.backfill_folded_columns()
+    
+    def compact_change_log(self, tombstone_retention_days: float = 7) -> tuple[int, int]:
+        """
+        Compact change log: bỏ entry đã bị thay thế và tombstone cũ
+        
+        Args:
+            tombstone_retention_days: Giữ tombstone trong bao nhiêu ngày.
+                Client không sync trong khoảng này sẽ nhận 410 và phải đồng bộ lại.
+            
+        Returns:
+            (số entry đã xóa, watermark hiện tại)
+            
+        Example:
+            removed, watermark = service.compact_change_log(tombstone_retention_days=7)
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(days=tombstone_retention_days)
+        return self.change_log.compact(tombstone_before=cutoff)
+    
     def create_student(self, student_data: StudentCreate) -> StudentResponse:
         """
         Tạo sinh viên mới
@@ -125,16 +489,15 @@ class StudentService:
             created = service.create_student(new_student_data)
             print(created.id)
         """
-        # Business rule: Check mã sinh viên đã tồn tại chưa
-        existing = self.repository.get_by_student_code(student_data.student_code)
-        if existing:
+        # Business rule: Mã sinh viên phải unique. Unique index trên student_code
+        # đảm bảo điều này ngay trong câu INSERT (không check-then-act)
+        try:
+            student = self.repository.create(student_data)
+        except IntegrityError:
             raise HTTPException(
                 status_code=400,
                 detail=f"Mã sinh viên {student_data.student_code} đã tồn tại"
             )
-        
-        # Tạo sinh viên mới
-        student = self.repository.create(student_data)
         return StudentResponse.model_validate(student)
     
     def update_student(
@@ -167,25 +530,22 @@ class StudentService:
             )
             updated = service.update_student(1, update_data)
         """
-        # Check sinh viên có tồn tại không
-        existing_student = self.repository.get_by_id(student_id)
-        if not existing_student:
+        # Update bằng 1 câu UPDATE ... RETURNING:
+        # - Không có row trả về -> sinh viên không tồn tại
+        # - IntegrityError từ unique index -> mã sinh viên mới bị trùng
+        try:
+            updated_student = self.repository.update(student_id, student_data)
+        except IntegrityError:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Mã sinh viên {student_data.student_code} đã tồn tại"
+            )
+        
+        if not updated_student:
             raise HTTPException(
                 status_code=404,
                 detail=f"Không tìm thấy sinh viên với ID {student_id}"
             )
-        
-        # Business rule: Nếu đổi student_code, check trùng
-        if student_data.student_code:
-            duplicate = self.repository.get_by_student_code(student_data.student_code)
-            if duplicate and duplicate.id != student_id:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Mã sinh viên {student_data.student_code} đã tồn tại"
-                )
-        
-        # Update
-        updated_student = self.repository.update(student_id, student_data)
         return StudentResponse.model_validate(updated_student)
     
     def delete_student(self, student_id: int) -> str:
@@ -247,16 +607,75 @@ class StudentService:
                 detail="Có mã sinh viên bị trùng trong danh sách"
             )
         
-        # Business rule: Check duplicate với database
-        for student in students_data:
-            existing = self.repository.get_by_student_code(student.student_code)
-            if existing:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Mã sinh viên {student.student_code} đã tồn tại trong database"
-                )
+        # Business rule: Check duplicate với database (1 câu IN cho mỗi chunk mã)
+        existing = self.repository.get_existing_codes(student_codes)
+        if existing:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Mã sinh viên {existing[0]} đã tồn tại trong database"
+            )
         
         # Create all students
         count = self.repository.bulk_create(students_data)
         return f"Đã tạo thành công {count} sinh viên"
-
+    
+    def bulk_update_students(self, items: List[StudentBulkUpdateItem]) -> int:
+        """
+        Cập nhật nhiều sinh viên cùng lúc (1 transaction)
+        
+        Business rules:
+            - Mỗi sinh viên chỉ xuất hiện 1 lần trong danh sách
+            - Mã sinh viên mới không được trùng (toàn bộ request bị rollback)
+            
+        Args:
+            items: List StudentBulkUpdateItem
+            
+        Returns:
+            Số sinh viên đã được update (sinh viên không tồn tại bị bỏ qua)
+            
+        Raises:
+            HTTPException 400: Nếu có sinh viên bị lặp hoặc mã sinh viên mới bị trùng
+            
+        Example:
+            items = [
+                StudentBulkUpdateItem(student_code="SV001", fields=StudentUpdate(math_score=9)),
+                StudentBulkUpdateItem(id=2, fields=StudentUpdate(english_score=8)),
+            ]
+            affected = service.bulk_update_students(items)
+        """
+        # Business rule: Check sinh viên bị lặp trong request
+        keys = [("id", item.id) if item.id is not None else ("code", item.student_code) for item in items]
+        if len(keys) != len(set(keys)):
+            raise HTTPException(
+                status_code=400,
+                detail="Có sinh viên bị lặp trong danh sách"
+            )
+        
+        try:
+            affected = self.repository.bulk_update(items)
+        except IntegrityError:
+            raise HTTPException(
+                status_code=400,
+                detail="Có mã sinh viên mới bị trùng với sinh viên khác"
+            )
+        return affected
+    
+    def bulk_delete_students(self, request: StudentBulkDeleteRequest) -> int:
+        """
+        Xóa nhiều sinh viên cùng lúc theo danh sách id/mã và/hoặc từ khóa (1 transaction)
+        
+        Args:
+            request: StudentBulkDeleteRequest
+            
+        Returns:
+            Số sinh viên đã bị xóa
+            
+        Example:
+            affected = service.bulk_delete_students(StudentBulkDeleteRequest(ids=[1, 2]))
+        """
+        affected = self.repository.bulk_delete(
+            ids=request.ids,
+            student_codes=request.student_codes,
+            search=request.search
+        )
+        return affected
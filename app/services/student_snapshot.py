@@ -0,0 +1,432 @@
+"""
+Student Snapshot
+Bản sao dạng cột (mảng NumPy) của các cột bảng students mà API analytics cần
+
+- Mỗi cột 1 mảng, sắp xếp theo id: hometown_id (int32, 0 = NULL), ngày sinh
+  (datetime64[D], NaT = NULL), 3 cột điểm (float64, NaN = NULL): ROW_BYTES
+  (44) bytes / sinh viên
+- Nạp toàn bộ 1 lần khi worker khởi động, sau đó đồng bộ theo change log: mọi
+  đường ghi của StudentRepository ghi entry trong cùng transaction, nên chỉ các
+  sinh viên có entry mới (kể cả do worker khác ghi) được đọc lại
+- Drift check: định kỳ so số lượng / tổng điểm với SQL; lệch (dữ liệu ghi thẳng
+  vào database, không qua repository) thì nạp lại toàn bộ
+- Nạp lại toàn bộ luôn chạy ở thread nền (analytics-snapshot): trong lúc nạp,
+  request analytics dùng SQL thay vì chờ 1 lần quét cả bảng
+- StudentColumns có cùng các method với AnalyticsRepository, AnalyticsService
+  dùng nguồn nào cũng cho cùng kết quả
+
+Module này import NumPy: chỉ được import khi ANALYTICS_SNAPSHOT_ENABLED=1
+(xem get_student_snapshot), API worker mặc định không load NumPy.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import HOMETOWN_CACHE
+from app.monitoring import ANALYTICS_SNAPSHOT_BYTES, ANALYTICS_SNAPSHOT_REBUILDS, ANALYTICS_SNAPSHOT_ROWS
+from app.repositories import AnalyticsRepository, ChangeLogRepository
+from app.repositories.analytics_repository import CORRELATION_COLUMNS, SCORE_COLUMNS
+
+logger = logging.getLogger("app.analytics")
+
+# Snapshot lớn hơn giới hạn này (ước tính theo số sinh viên) thì không nạp, API dùng SQL
+ANALYTICS_SNAPSHOT_MAX_BYTES = int(os.getenv("ANALYTICS_SNAPSHOT_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Chu kỳ drift check (0 = tắt)
+ANALYTICS_SNAPSHOT_VERIFY_SECONDS = float(os.getenv("ANALYTICS_SNAPSHOT_VERIFY_SECONDS", "300"))
+
+# Số sinh viên thay đổi vượt tỉ lệ này thì nạp lại toàn bộ thay vì đọc lại từng sinh viên
+REBUILD_CHANGED_FRACTION = 0.25
+
+# id (int64) + hometown_id (int32) + ngày sinh (datetime64) + điểm (float64)
+ROW_BYTES = 8 + 4 + 8 + 8 * len(SCORE_COLUMNS)
+
+# Cùng tên field với Row của AnalyticsRepository
+HometownScoresRow = namedtuple("HometownScoresRow", ("hometown", "students") + SCORE_COLUMNS)
+BirthDateSumsRow = namedtuple(
+    "BirthDateSumsRow",
+    ("date_of_birth", "students") + tuple(f"{name}_{part}" for name in SCORE_COLUMNS for part in ("count", "sum"))
+)
+_SIZE = len(CORRELATION_COLUMNS)
+CorrelationSumsRow = namedtuple(
+    "CorrelationSumsRow",
+    tuple(f"has_{i}" for i in range(_SIZE)) + ("n",) + tuple(f"s_{i}" for i in range(_SIZE))
+    + tuple(f"ss_{i}_{j}" for i in range(_SIZE) for j in range(i, _SIZE))
+)
+
+
+def _to_arrays(rows: List[tuple]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Tuple (id, hometown_id, date_of_birth, các cột điểm) -> (ids, hometown_ids, birth_dates, scores)"""
+    ids, hometown_ids, birth_dates, *scores = zip(*rows)
+    return (
+        np.array(ids, dtype=np.int64),
+        np.array([hometown_id or 0 for hometown_id in hometown_ids], dtype=np.int32),
+        # Chuỗi 'YYYY-MM-DD' (SQLite) hoặc date, None -> NaT
+        np.array(birth_dates, dtype="datetime64[D]"),
+        # None -> NaN, shape (số môn, số sinh viên)
+        np.array(scores, dtype=np.float64),
+    )
+
+
+class StudentColumns:
+    """
+    Các mảng của snapshot tại 1 version change log
+
+    Không sửa tại chỗ: đồng bộ tạo object mới, request đang tính trên object cũ
+    không bị ảnh hưởng.
+
+    Attributes:
+        ids: ID sinh viên, tăng dần
+        hometown_ids: hometown_id (0 = không có quê quán)
+        birth_dates: Ngày sinh (NaT = không có)
+        scores: Điểm, scores[i] là cột SCORE_COLUMNS[i] (NaN = không có)
+        version: Version change log đã đồng bộ tới
+    """
+
+    def __init__(self, ids, hometown_ids, birth_dates, scores, version: int):
+        self.ids = ids
+        self.hometown_ids = hometown_ids
+        self.birth_dates = birth_dates
+        self.scores = scores
+        self.version = version
+
+    @classmethod
+    def from_batches(cls, batches, version: int) -> "StudentColumns":
+        """
+        Tạo từ các batch tuple của AnalyticsRepository.iter_snapshot_rows (đã sắp xếp theo id)
+
+        Mỗi batch được đổi sang mảng ngay, không giữ toàn bộ tuple trong bộ nhớ.
+        """
+        parts = [_to_arrays(rows) for rows in batches if rows]
+        if not parts:
+            return cls.empty(version)
+        return cls(*(np.concatenate(arrays, axis=-1) for arrays in zip(*parts)), version)
+
+    @classmethod
+    def empty(cls, version: int) -> "StudentColumns":
+        return cls(
+            np.empty(0, dtype=np.int64),
+            np.empty(0, dtype=np.int32),
+            np.empty(0, dtype="datetime64[D]"),
+            np.empty((len(SCORE_COLUMNS), 0), dtype=np.float64),
+            version,
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Bộ nhớ của các mảng (bytes)"""
+        return self.ids.nbytes + self.hometown_ids.nbytes + self.birth_dates.nbytes + self.scores.nbytes
+
+    def with_changes(self, changed_ids: List[int], rows: List[tuple], version: int) -> "StudentColumns":
+        """
+        Snapshot mới sau khi áp dụng các thay đổi
+
+        Args:
+            changed_ids: ID các sinh viên có thay đổi
+            rows: Dữ liệu hiện tại của các sinh viên đó (sinh viên không có trong rows đã bị xóa)
+            version: Version change log của dữ liệu mới
+
+        Returns:
+            StudentColumns mới (object hiện tại không đổi)
+        """
+        keep = ~np.isin(self.ids, np.asarray(changed_ids, dtype=np.int64))
+        arrays = [self.ids[keep], self.hometown_ids[keep], self.birth_dates[keep], self.scores[:, keep]]
+        if rows:
+            arrays = [np.concatenate(pair, axis=-1) for pair in zip(arrays, _to_arrays(rows))]
+            order = np.argsort(arrays[0], kind="stable")
+            arrays = [array[..., order] for array in arrays]
+        return StudentColumns(*arrays, version)
+
+    def matches(self, totals) -> bool:
+        """So với AnalyticsRepository.snapshot_totals (số lượng khớp tuyệt đối, tổng điểm khớp sai số làm tròn)"""
+        if (len(self), int(np.count_nonzero(self.hometown_ids)), int(np.count_nonzero(~np.isnat(self.birth_dates)))) \
+                != (totals.students, totals.hometowns, totals.birth_dates):
+            return False
+        for name, score in zip(SCORE_COLUMNS, self.scores):
+            present = ~np.isnan(score)
+            if int(np.count_nonzero(present)) != getattr(totals, f"{name}_count"):
+                return False
+            if not np.isclose(score[present].sum(), getattr(totals, f"{name}_sum"), rtol=1e-9, atol=1e-6):
+                return False
+        return True
+
+    # ==================== Cùng interface với AnalyticsRepository ====================
+
+    def scores_by_hometown(self) -> List[HometownScoresRow]:
+        """Như AnalyticsRepository.scores_by_hometown (np.bincount theo hometown_id)"""
+        codes = self.hometown_ids
+        size = int(codes.max()) + 1 if len(codes) else 1
+        students = np.bincount(codes, minlength=size)
+        averages = []
+        for score in self.scores:
+            present = ~np.isnan(score)
+            count = np.bincount(codes[present], minlength=size)
+            total = np.bincount(codes[present], weights=score[present], minlength=size)
+            averages.append(np.divide(total, count, out=np.full(size, np.nan), where=count > 0))
+
+        rows = []
+        for hometown_id in np.flatnonzero(students[1:]) + 1:  # 0 = không có quê quán
+            name = HOMETOWN_CACHE.names.get(int(hometown_id))
+            if name is None:
+                # Như JOIN với bảng hometowns: bỏ id không có trong bảng tra
+                continue
+            rows.append(HometownScoresRow(
+                name,
+                int(students[hometown_id]),
+                *(None if np.isnan(average[hometown_id]) else float(average[hometown_id]) for average in averages),
+            ))
+        rows.sort(key=lambda row: (-row.students, row.hometown))
+        return rows
+
+    def score_sums_by_birth_date(self) -> List[BirthDateSumsRow]:
+        """Như AnalyticsRepository.score_sums_by_birth_date (np.unique + np.bincount theo ngày sinh)"""
+        valid = ~np.isnat(self.birth_dates)
+        days, inverse = np.unique(self.birth_dates[valid], return_inverse=True)
+        size = len(days)
+        columns = [days.tolist(), np.bincount(inverse, minlength=size).tolist()]
+        for score in self.scores[:, valid]:
+            present = ~np.isnan(score)
+            count = np.bincount(inverse[present], minlength=size)
+            total = np.bincount(inverse[present], weights=score[present], minlength=size)
+            columns.append(count.tolist())
+            # SUM của toàn NULL là NULL
+            columns.append([value if n else None for value, n in zip(total.tolist(), count.tolist())])
+        return [BirthDateSumsRow(*values) for values in zip(*columns)]
+
+    def score_histograms(self) -> Dict[str, List[Tuple[float, int]]]:
+        """Như AnalyticsRepository.score_histograms (np.unique trên từng cột điểm)"""
+        histograms = {}
+        for name, score in zip(SCORE_COLUMNS, self.scores):
+            values, counts = np.unique(score[~np.isnan(score)], return_counts=True)
+            histograms[name] = list(zip(values.tolist(), counts.tolist()))
+        return histograms
+
+    def correlation_sums(self) -> List[CorrelationSumsRow]:
+        """Như AnalyticsRepository.correlation_sums (gộp theo "cột nào có giá trị" bằng np.bincount)"""
+        present = ~np.isnan(self.scores)
+        values = np.where(present, self.scores, 0.0)
+        # avg_score như _avg_score: cộng lần lượt các môn có điểm / số môn có điểm
+        total = values[0].copy()
+        for row in values[1:]:
+            total += row
+        count = present.sum(axis=0)
+        avg = np.divide(total, count, out=np.full(len(self), np.nan), where=count > 0)
+
+        has = np.vstack([present, ~np.isnan(avg)])
+        values = np.vstack([values, np.where(has[-1], avg, 0.0)])
+        pattern = (has.astype(np.int64) << np.arange(_SIZE)[:, None]).sum(axis=0)
+        size = 1 << _SIZE
+
+        n = np.bincount(pattern, minlength=size)
+        sums = [np.bincount(pattern, weights=values[i], minlength=size) for i in range(_SIZE)]
+        products = [
+            np.bincount(pattern, weights=values[i] * values[j], minlength=size)
+            for i in range(_SIZE) for j in range(i, _SIZE)
+        ]
+        return [
+            CorrelationSumsRow(
+                *((group >> i) & 1 for i in range(_SIZE)),
+                int(n[group]),
+                *(float(column[group]) for column in sums),
+                *(float(column[group]) for column in products),
+            )
+            for group in np.flatnonzero(n).tolist()
+        ]
+
+
+class StudentSnapshot:
+    """
+    Snapshot dạng cột dùng chung của process (STUDENT_SNAPSHOT)
+
+    Chưa nạp xong / đang nạp lại / vượt ANALYTICS_SNAPSHOT_MAX_BYTES thì sync
+    trả về None, AnalyticsService dùng SQL như khi tắt snapshot.
+
+    Example:
+        STUDENT_SNAPSHOT.rebuild_in_background()
+        columns = STUDENT_SNAPSHOT.sync(db, version)
+        rows = columns.scores_by_hometown() if columns else repository.scores_by_hometown()
+    """
+
+    def __init__(self, max_bytes: int = ANALYTICS_SNAPSHOT_MAX_BYTES,
+                 verify_seconds: float = ANALYTICS_SNAPSHOT_VERIFY_SECONDS):
+        self.max_bytes = max_bytes
+        self.verify_seconds = verify_seconds
+        # 1 thread nạp / đồng bộ tại 1 thời điểm, request khác đọc self._columns không cần khóa
+        self._lock = threading.Lock()
+        self._columns: Optional[StudentColumns] = None
+        self._verified_at = 0.0
+        # Nạp lại ở thread nền: lý do đang chờ (None = không có) + thread nền có đang chạy không
+        self._state_lock = threading.Lock()
+        self._pending_rebuild: Optional[str] = None
+        self._rebuild_running = False
+
+    @property
+    def columns(self) -> Optional[StudentColumns]:
+        """Snapshot hiện tại (None nếu chưa nạp)"""
+        return self._columns
+
+    def rebuild(self, db: Session, reason: str = "startup") -> Optional[StudentColumns]:
+        """
+        Nạp lại toàn bộ snapshot từ bảng students
+
+        Args:
+            db: SQLAlchemy session
+            reason: Lý do (label của metric analytics_snapshot_rebuilds_total)
+
+        Returns:
+            Snapshot mới, None nếu vượt ANALYTICS_SNAPSHOT_MAX_BYTES
+        """
+        with self._lock:
+            return self._rebuild(db, reason)
+
+    def rebuild_in_background(self, reason: str = "startup") -> bool:
+        """
+        Nạp lại toàn bộ snapshot ở thread nền (session riêng), không chặn thread gọi
+
+        Yêu cầu đến khi thread nền đang chạy được gộp: thread nạp thêm 1 lần
+        sau lần hiện tại (dữ liệu có thể đã đổi sau khi lần hiện tại bắt đầu quét).
+
+        Args:
+            reason: Lý do (label của metric analytics_snapshot_rebuilds_total)
+
+        Returns:
+            True nếu bắt đầu thread nền, False nếu gộp vào thread đang chạy
+        """
+        with self._state_lock:
+            self._pending_rebuild = reason
+            if self._rebuild_running:
+                return False
+            self._rebuild_running = True
+        threading.Thread(target=self._rebuild_loop, name="analytics-snapshot", daemon=True).start()
+        return True
+
+    def _rebuild_loop(self):
+        while True:
+            with self._state_lock:
+                reason, self._pending_rebuild = self._pending_rebuild, None
+                if reason is None:
+                    self._rebuild_running = False
+                    return
+            try:
+                with SessionLocal() as db:
+                    self.rebuild(db, reason)
+            except Exception:
+                logger.exception("Analytics snapshot rebuild (%s) failed, analytics stays on SQL", reason)
+
+    def sync(self, db: Session, version: int) -> Optional[StudentColumns]:
+        """
+        Snapshot đã đồng bộ tới version change log
+
+        Args:
+            db: SQLAlchemy session
+            version: Version mới nhất của change log (ChangeLogRepository.get_latest_version)
+
+        Returns:
+            Snapshot, None nếu chưa nạp / đang nạp lại / bị tắt do vượt giới hạn bộ nhớ
+        """
+        columns = self._columns
+        if columns is None:
+            return None
+        if columns.version == version and not self._verify_due():
+            return columns
+
+        with self._lock:
+            columns = self._columns
+            if columns is not None and columns.version != version:
+                columns = self._apply_changes(db, columns, version)
+            if columns is not None and self._verify_due():
+                columns = self._verify(db, columns)
+            return columns
+
+    def _verify_due(self) -> bool:
+        return self.verify_seconds > 0 and time.monotonic() - self._verified_at >= self.verify_seconds
+
+    def _publish(self, columns: Optional[StudentColumns]):
+        self._columns = columns
+        ANALYTICS_SNAPSHOT_BYTES.set(columns.nbytes if columns is not None else 0)
+        ANALYTICS_SNAPSHOT_ROWS.set(len(columns) if columns is not None else 0)
+
+    def _schedule_rebuild(self, reason: str) -> Optional[StudentColumns]:
+        """
+        Bỏ snapshot hiện tại (không còn đúng) và nạp lại ở thread nền
+
+        Tới khi nạp xong sync trả về None: request dùng SQL, không chờ quét cả
+        bảng trong lúc giữ lock. Gọi khi đang giữ self._lock.
+
+        Returns:
+            None (chưa có snapshot dùng được)
+        """
+        self._publish(None)
+        self.rebuild_in_background(reason)
+        return None
+
+    def _rebuild(self, db: Session, reason: str) -> Optional[StudentColumns]:
+        start = time.perf_counter()
+        analytics = AnalyticsRepository(db)
+        # Version đọc trước khi quét: thay đổi commit trong lúc quét được đồng bộ lại ở lần sync sau
+        version = ChangeLogRepository(db).get_latest_version()
+        totals = analytics.snapshot_totals()
+
+        estimated = totals.students * ROW_BYTES
+        if estimated > self.max_bytes:
+            logger.warning(
+                "Analytics snapshot disabled: %d students need ~%.1f MB (ANALYTICS_SNAPSHOT_MAX_BYTES=%.1f MB)",
+                totals.students, estimated / 1e6, self.max_bytes / 1e6
+            )
+            self._publish(None)
+            return None
+
+        columns = StudentColumns.from_batches(analytics.iter_snapshot_rows(), version)
+        HOMETOWN_CACHE.load(db)
+        self._publish(columns)
+        self._verified_at = time.monotonic()
+        ANALYTICS_SNAPSHOT_REBUILDS.labels(reason=reason).inc()
+        logger.info("Analytics snapshot loaded (%s): %d students, %.1f MB in %.2fs",
+                    reason, len(columns), columns.nbytes / 1e6, time.perf_counter() - start)
+        return columns
+
+    def _apply_changes(self, db: Session, columns: StudentColumns, version: int) -> Optional[StudentColumns]:
+        change_log = ChangeLogRepository(db)
+        if version < columns.version:
+            # Change log bị thay (database khác / bị xóa): không đồng bộ tiếp được
+            return self._schedule_rebuild("reset")
+        if columns.version < change_log.get_watermark():
+            # Tombstone sau version của snapshot đã bị compact: không biết sinh viên nào đã bị xóa
+            return self._schedule_rebuild("compacted")
+
+        changed = change_log.get_changed_student_ids(columns.version, version)
+        if len(changed) > REBUILD_CHANGED_FRACTION * max(len(columns), 1):
+            return self._schedule_rebuild("bulk_change")
+
+        rows = [row for batch in AnalyticsRepository(db).iter_snapshot_rows(changed) for row in batch]
+        updated = columns.with_changes(changed, rows, version)
+        if any(row[1] is not None and row[1] not in HOMETOWN_CACHE.names for row in rows):
+            HOMETOWN_CACHE.load(db)
+        self._publish(updated)
+        return updated
+
+    def _verify(self, db: Session, columns: StudentColumns) -> Optional[StudentColumns]:
+        totals = AnalyticsRepository(db).snapshot_totals()
+        if ChangeLogRepository(db).get_latest_version() != columns.version:
+            # Có ghi mới trong lúc đếm: không so được, kiểm tra lại ở request sau
+            return columns
+        if columns.matches(totals):
+            self._verified_at = time.monotonic()
+            return columns
+        logger.warning("Analytics snapshot drifted from the students table (%d rows vs %d), rebuilding",
+                       len(columns), totals.students)
+        return self._schedule_rebuild("drift")
+
+
+STUDENT_SNAPSHOT = StudentSnapshot()
@@ -0,0 +1,23 @@
+"""
+Utils package
+Contains helper dùng chung giữa các layer
+"""
+from .compression import (
+    PrecompressedBody,
+    StreamCompressor,
+    compress,
+    negotiate_encoding,
+    precompressed_response,
+)
+from .text_normalization import fold_accents, fold_for_search, hometown_key
+
+__all__ = [
+    "PrecompressedBody",
+    "StreamCompressor",
+    "compress",
+    "fold_accents",
+    "fold_for_search",
+    "hometown_key",
+    "negotiate_encoding",
+    "precompressed_response",
+]
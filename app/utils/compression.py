@@ -0,0 +1,186 @@
+"""
+Compression
+Nén HTTP body bằng gzip / brotli và chọn encoding theo header Accept-Encoding
+
+brotli là optional dependency: chưa cài thì chỉ dùng gzip.
+"""
+
+import gzip
+import os
+import zlib
+from functools import lru_cache
+from typing import Dict, Optional
+
+from fastapi import Response
+
+# Body nhỏ hơn ngưỡng này (bytes) không được nén (header gzip/br + CPU không đáng)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+
+# Content-Type nén được; các định dạng đã nén sẵn (zip, parquet, png...) bị bỏ qua
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+@lru_cache(maxsize=1)
+def brotli_available() -> bool:
+    """Kiểm tra brotli (optional dependency) đã được cài chưa"""
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def is_compressible(content_type: str) -> bool:
+    """Content-Type có nên nén không"""
+    return content_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Chọn encoding theo header Accept-Encoding
+
+    Ưu tiên q-value cao hơn; bằng nhau thì chọn br trước gzip.
+    Encoding có q=0 bị loại, "*" áp dụng cho các encoding không được nêu tên.
+
+    Args:
+        accept_encoding: Giá trị header Accept-Encoding
+
+    Returns:
+        "br", "gzip" hoặc None (không nén)
+
+    Example:
+        negotiate_encoding("gzip, deflate, br")  # "br"
+        negotiate_encoding("br;q=0.5, gzip")     # "gzip"
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+
+    candidates = ["br", "gzip"] if brotli_available() else ["gzip"]
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """
+    Nén toàn bộ body
+
+    Args:
+        body: Dữ liệu gốc
+        encoding: "br" | "gzip"
+
+    Returns:
+        Dữ liệu đã nén
+    """
+    if encoding == "br":
+        import brotli
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class StreamCompressor:
+    """
+    Nén body dạng stream theo từng chunk (StreamingResponse)
+
+    Example:
+        compressor = StreamCompressor("gzip")
+        for chunk in chunks:
+            send(compressor.compress(chunk))
+        send(compressor.finish())
+    """
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            import brotli
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # wbits=31: zlib stream có header/trailer gzip
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(chunk)
+        return self._zlib.compress(chunk)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+class PrecompressedBody:
+    """
+    Body đã serialize kèm các bản nén, dùng để lưu trong cache
+
+    Bản nén của mỗi encoding chỉ được tạo 1 lần (lần đầu có client yêu cầu)
+    rồi giữ lại cùng entry cache, các cache hit sau không phải nén lại.
+
+    Example:
+        body = PrecompressedBody(orjson.dumps(data))
+        body.get("gzip")  # nén lần đầu
+        body.get("gzip")  # dùng lại
+    """
+
+    __slots__ = ("raw", "_encoded")
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        self._encoded: Dict[str, bytes] = {}
+
+    def get(self, encoding: Optional[str]) -> bytes:
+        """Body theo encoding (None = body gốc)"""
+        if encoding is None:
+            return self.raw
+        encoded = self._encoded.get(encoding)
+        if encoded is None:
+            encoded = self._encoded[encoding] = compress(self.raw, encoding)
+        return encoded
+
+
+def precompressed_response(
+    body: PrecompressedBody,
+    accept_encoding: str,
+    media_type: str = "application/json"
+) -> Response:
+    """
+    Tạo Response từ PrecompressedBody theo Accept-Encoding của client
+
+    Response đã có Content-Encoding nên CompressionMiddleware không nén lại.
+
+    Args:
+        body: Body (thường lấy từ cache)
+        accept_encoding: Giá trị header Accept-Encoding
+        media_type: Content-Type
+
+    Returns:
+        Response (nén nếu client hỗ trợ và body đủ lớn)
+    """
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = negotiate_encoding(accept_encoding) if len(body.raw) >= COMPRESSION_MIN_SIZE else None
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body.get(encoding), media_type=media_type, headers=headers)
@@ -0,0 +1,129 @@
+"""
+Text Normalization
+Bỏ dấu tiếng Việt (accent folding) cho tìm kiếm không phân biệt dấu / hoa thường
+
+Dùng 1 bảng tra tạo sẵn cho str.translate (1 lượt duyệt chuỗi, chạy trong C)
+thay vì gọi str.replace cho từng ký tự có dấu.
+Bảng được sinh từ unicodedata (NFD, bỏ dấu kết hợp) nên phủ đủ chữ hoa lẫn chữ thường,
+cộng thêm đ/Đ (không tách được bằng NFD).
+
+fold_for_search có cache LRU: tên / họ / quê quán lặp lại rất nhiều giữa các
+sinh viên, nên phần lớn lời gọi (bulk insert, backfill) chỉ là 1 lần tra dict.
+
+hometown_key: khóa chuẩn của quê quán (bảng hometowns), gộp các cách viết
+như "TP.HCM" / "TP. Hồ Chí Minh" về cùng 1 quê quán.
+"""
+
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Optional
+
+# Dải ký tự Latin có dấu: Latin-1 Supplement, Latin Extended-A/B, Latin Extended Additional
+# (toàn bộ chữ tiếng Việt có dấu nằm trong các dải này)
+_LATIN_RANGES = ((0x00C0, 0x0250), (0x1E00, 0x1F00))
+
+# Dấu kết hợp (combining marks): chuỗi ở dạng NFD (dấu tách khỏi chữ) cũng được bỏ dấu
+_COMBINING_MARKS = range(0x0300, 0x0370)
+
+
+def _build_fold_table() -> Dict[int, Optional[str]]:
+    table: Dict[int, Optional[str]] = {}
+    for start, end in _LATIN_RANGES:
+        for codepoint in range(start, end):
+            char = chr(codepoint)
+            base = "".join(c for c in unicodedata.normalize("NFD", char) if not unicodedata.combining(c))
+            if base and base != char:
+                table[codepoint] = base
+    table.update({ord("đ"): "d", ord("Đ"): "D", ord("Ð"): "D"})
+    table.update({codepoint: None for codepoint in _COMBINING_MARKS})
+    return table
+
+
+FOLD_TABLE = _build_fold_table()
+
+# Số chuỗi đã chuẩn hóa giữ trong cache của fold_for_search
+FOLD_CACHE_SIZE = 65536
+
+
+def fold_accents(text: str) -> str:
+    """
+    Bỏ dấu, giữ nguyên hoa/thường
+
+    Args:
+        text: Chuỗi tiếng Việt (NFC hoặc NFD)
+
+    Returns:
+        Chuỗi không dấu
+
+    Example:
+        fold_accents("Đặng Thị Hồng")  # "Dang Thi Hong"
+    """
+    if text.isascii():
+        return text
+    return text.translate(FOLD_TABLE)
+
+
+@lru_cache(maxsize=FOLD_CACHE_SIZE)
+def fold_for_search(text: Optional[str]) -> Optional[str]:
+    """
+    Chuẩn hóa chuỗi để so khớp tìm kiếm: bỏ dấu, chữ thường, gộp khoảng trắng
+
+    Dùng cho cả giá trị lưu trong các cột *_folded lẫn từ khóa tìm kiếm,
+    nên 2 bên luôn được chuẩn hóa giống nhau.
+
+    Args:
+        text: Chuỗi cần chuẩn hóa (None -> None)
+
+    Returns:
+        Chuỗi đã chuẩn hóa, None nếu text là None
+
+    Example:
+        fold_for_search("  Hà   Nội ")  # "ha noi"
+    """
+    if text is None:
+        return None
+    return " ".join(fold_accents(text).lower().split())
+
+
+# Tiền tố hành chính bỏ đi khi so khớp quê quán ("Thành phố Hà Nội" = "Hà Nội")
+HOMETOWN_PREFIXES = ("thanh pho ", "tp ", "tinh ")
+
+# Cách viết tắt / tên gọi khác -> khóa chuẩn (sau khi đã bỏ dấu, dấu câu, tiền tố)
+HOMETOWN_ALIASES = {
+    "hcm": "ho chi minh",
+    "tphcm": "ho chi minh",
+    "sai gon": "ho chi minh",
+    "saigon": "ho chi minh",
+    "hn": "ha noi",
+}
+
+# Dấu câu coi như khoảng trắng ("TP.HCM" = "TP HCM")
+_HOMETOWN_PUNCTUATION = str.maketrans({char: " " for char in ".,-_/()"})
+
+
+@lru_cache(maxsize=FOLD_CACHE_SIZE)
+def hometown_key(name: Optional[str]) -> Optional[str]:
+    """
+    Khóa chuẩn của 1 quê quán: các cách viết khác nhau của cùng 1 nơi cho cùng khóa
+
+    Bỏ dấu, chữ thường, dấu câu -> khoảng trắng, bỏ tiền tố hành chính
+    (HOMETOWN_PREFIXES) rồi tra HOMETOWN_ALIASES.
+
+    Args:
+        name: Quê quán do client gửi lên (None -> None)
+
+    Returns:
+        Khóa chuẩn, None nếu name là None hoặc chỉ có khoảng trắng / dấu câu
+
+    Example:
+        hometown_key("TP.HCM")            # "ho chi minh"
+        hometown_key("TP. Hồ Chí Minh")   # "ho chi minh"
+    """
+    if name is None:
+        return None
+    key = " ".join(fold_accents(name).lower().translate(_HOMETOWN_PUNCTUATION).split())
+    for prefix in HOMETOWN_PREFIXES:
+        if key.startswith(prefix):
+            key = key[len(prefix):]
+            break
+    return HOMETOWN_ALIASES.get(key, key) or None
@@ -1,19 +1,71 @@
 import uvicorn
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def development_options():
+    """Dev mode: 1 worker, auto-reload khi code thay đổi"""
+    return {
+        "reload": True,
+        "log_level": "info",
+    }
+
+
+def production_options():
+    """
+    Production mode: nhiều worker, uvloop + httptools, không reload
+
+    Các giá trị đều override được bằng biến môi trường (xem .env.example).
+    Schema được tạo / nâng cấp 1 lần ở process cha (prepare_database) trước khi
+    khởi động worker; mỗi worker chỉ chạy phần warm-up (connection pool, cache)
+    của lifespan trước khi bắt đầu accept request.
+    """
+    cpu_count = os.cpu_count() or 1
+    return {
+        "workers": int(os.getenv("WEB_WORKERS", cpu_count * 2 + 1)),
+        "loop": "uvloop",
+        "http": "httptools",
+        "backlog": int(os.getenv("WEB_BACKLOG", 2048)),
+        "timeout_keep_alive": int(os.getenv("WEB_KEEPALIVE_SECONDS", 5)),
+        "timeout_graceful_shutdown": int(os.getenv("WEB_GRACEFUL_SHUTDOWN_SECONDS", 30)),
+        "proxy_headers": True,
+        "access_log": os.getenv("WEB_ACCESS_LOG", "0") == "1",
+        "log_level": "warning",
+    }
+
+
 if __name__ == "__main__":
     host = os.getenv("API_HOST", "0.0.0.0")
     port = int(os.getenv("API_PORT", 8000))
-    
+    app_env = os.getenv("APP_ENV", "development")
+
+    options = production_options() if app_env == "production" else development_options()
+
+    # Nhiều worker: /metrics cộng dồn metrics của mọi worker qua thư mục chung
+    # (đặt trước khi import app để các worker kế thừa biến môi trường)
+    if options.get("workers", 1) > 1:
+        os.environ.setdefault(
+            "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), f"student-api-metrics-{port}")
+        )
+        from app.monitoring import clear_multiprocess_dir, mark_process_dead
+        clear_multiprocess_dir()
+
+        # Tạo / nâng cấp schema 1 lần ở đây: các worker cùng chạy create_all / backfill
+        # trong lifespan sẽ tranh nhau (table ... already exists, database is locked)
+        from app.database import engine
+        from app.main import prepare_database
+        prepare_database()
+        engine.dispose()
+        # Process cha không phục vụ request: gauge pool của nó không tính vào /metrics
+        mark_process_dead()
+        os.environ["PREPARE_DATABASE_ON_STARTUP"] = "0"
+
     uvicorn.run(
         "app.main:app",
         host=host,
         port=port,
-        reload=True,
-        log_level="info"
+        **options
     )
-
-
@@ -0,0 +1,46 @@
+"""
+Vẽ các biểu đồ phân tích trực tiếp từ bảng students (không cần export CSV)
+Đọc các cột cần thiết theo chunk bằng pd.read_sql với dtype gọn (hometown category,
+điểm float32), rồi vẽ các biểu đồ giống pipeline crawl (app/crawling/analysis_data.py)
+
+Chạy:
+    python scripts/analyze_database.py
+    python scripts/analyze_database.py --output-dir /tmp/charts --chunksize 50000
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import logging
+import resource
+import time
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+from app.crawling.analysis_data import DB_CHUNK_SIZE, analysis_data_from_db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output-dir", default=None, help="Thư mục ghi ảnh (mặc định app/crawling/img)")
+    parser.add_argument("--chunksize", type=int, default=DB_CHUNK_SIZE, help="Số row đọc mỗi lần")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    start = time.perf_counter()
+    img_dir = analysis_data_from_db(args.output_dir, chunksize=args.chunksize)
+    elapsed = time.perf_counter() - start
+    if img_dir is None:
+        print("❌ Không vẽ được biểu đồ (xem log lỗi ở trên)")
+        sys.exit(1)
+
+    # ru_maxrss: KB trên Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"✅ Đã vẽ biểu đồ vào {img_dir} trong {elapsed:.1f}s (peak RSS {peak_mb:,.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
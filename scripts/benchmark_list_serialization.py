@@ -0,0 +1,105 @@
+"""
+Benchmark: serialize danh sách sinh viên
+So sánh đường cũ (ORM + model_validate từng row + FastAPI validate lại theo
+response_model) với fast path (Row tuple qua Core + orjson)
+
+Chạy:
+    python scripts/benchmark_list_serialization.py
+    python scripts/benchmark_list_serialization.py --sizes 100 1000 10000 --repeat 20
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Student
+from app.schemas import StudentListResponse
+from app.services import StudentService
+
+
+def seed(session, count):
+    """Insert `count` sinh viên ngẫu nhiên vào database benchmark"""
+    rng = random.Random(42)
+    start = date(2002, 1, 1)
+    rows = [
+        {
+            "student_code": f"SV{i:08d}",
+            "first_name": rng.choice(["Minh", "Lan", "Hương", "Nam"]),
+            "last_name": rng.choice(["Nguyễn", "Trần", "Lê", "Phạm"]),
+            "email": f"sv{i}@university.edu.vn",
+            "date_of_birth": start + timedelta(days=rng.randint(0, 1460)),
+            "hometown": rng.choice(["Hà Nội", "TP.HCM", "Đà Nẵng", "Cần Thơ"]),
+            "math_score": round(rng.uniform(0, 10), 1),
+            "literature_score": round(rng.uniform(0, 10), 1),
+            "english_score": round(rng.uniform(0, 10), 1),
+        }
+        for i in range(count)
+    ]
+    session.execute(insert(Student), rows)
+    session.commit()
+
+
+def old_path(service, limit):
+    """Đường cũ: model_validate từng row, rồi validate + dump theo response_model"""
+    result = service.get_all_students(skip=0, limit=limit)
+    # Mô phỏng FastAPI serialize_response + JSONResponse
+    validated = StudentListResponse.model_validate(result, from_attributes=True)
+    return json.dumps(validated.model_dump(mode="json"), ensure_ascii=False).encode("utf-8")
+
+
+def fast_path(service, limit):
+    """Fast path: Row tuple + orjson"""
+    return service.get_all_students_json(skip=0, limit=limit)
+
+
+def measure(fn, service, limit, repeat):
+    """Trả về (rows/sec, thời gian trung bình mỗi lần gọi tính bằng ms)"""
+    fn(service, limit)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(service, limit)
+    elapsed = time.perf_counter() - start
+    return limit * repeat / elapsed, elapsed / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+
+        with Session() as session:
+            seed(session, max(args.sizes))
+
+        print(f"{'rows':>8} | {'old rows/s':>12} | {'fast rows/s':>12} | {'old ms':>9} | {'fast ms':>9} | speedup")
+        print("-" * 72)
+        for size in args.sizes:
+            with Session() as session:
+                service = StudentService(session)
+                # 2 đường phải cho ra cùng một JSON
+                assert json.loads(old_path(service, size)) == json.loads(fast_path(service, size))
+                old_rps, old_ms = measure(old_path, service, size, args.repeat)
+                fast_rps, fast_ms = measure(fast_path, service, size, args.repeat)
+            print(f"{size:>8} | {old_rps:>12,.0f} | {fast_rps:>12,.0f} | {old_ms:>9.2f} | {fast_ms:>9.2f} | {old_ms / fast_ms:.1f}x")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Benchmark: dev mode vs production mode của run.py
+Khởi động server thật (python run.py) với từng APP_ENV trên database tạm,
+bắn request đồng thời và so sánh throughput / latency
+
+Chạy:
+    python scripts/benchmark_server.py
+    python scripts/benchmark_server.py --duration 20 --concurrency 64 --students 5000
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import signal
+import statistics
+import subprocess
+import tempfile
+import time
+
+import httpx
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = [
+    "/api/students/1",
+    "/api/students/?limit=100",
+    "/api/students/?search=SV00&limit=20",
+]
+
+
+def start_server(app_env, port, database_url, workers):
+    """Chạy `python run.py` ở background với APP_ENV tương ứng"""
+    env = dict(
+        os.environ,
+        APP_ENV=app_env,
+        API_HOST="127.0.0.1",
+        API_PORT=str(port),
+        DATABASE_URL=database_url,
+    )
+    if workers:
+        env["WEB_WORKERS"] = str(workers)
+    return subprocess.Popen(
+        [sys.executable, "run.py"],
+        cwd=ROOT_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def wait_until_ready(base_url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become ready")
+
+
+def stop_server(process):
+    # SIGTERM cả process group (reloader / worker con) -> graceful shutdown
+    os.killpg(process.pid, signal.SIGTERM)
+    process.wait(timeout=60)
+
+
+def seed(base_url, count):
+    students = [
+        {"student_code": f"SV{i:05d}", "first_name": "Minh", "last_name": "Nguyễn",
+         "hometown": "Hà Nội", "math_score": (i % 100) / 10}
+        for i in range(count)
+    ]
+    for start in range(0, count, 1000):
+        httpx.post(f"{base_url}/api/students/bulk", json=students[start:start + 1000], timeout=60).raise_for_status()
+
+
+async def load(base_url, duration, concurrency):
+    """Bắn request liên tục trong `duration` giây với `concurrency` client song song"""
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30,
+                                 limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def worker(offset):
+            nonlocal errors
+            i = offset
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(ENDPOINTS[i % len(ENDPOINTS)])
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+                i += 1
+
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / duration,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--duration", type=float, default=10, help="Thời gian bắn tải mỗi mode (giây)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=0, help="WEB_WORKERS cho production (0 = mặc định theo CPU)")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        for app_env in ("development", "production"):
+            base_url = f"http://127.0.0.1:{args.port}"
+            process = start_server(app_env, args.port, database_url, args.workers)
+            try:
+                wait_until_ready(base_url)
+                if app_env == "development":
+                    seed(base_url, args.students)
+                asyncio.run(load(base_url, 2, args.concurrency))  # warm-up
+                results[app_env] = asyncio.run(load(base_url, args.duration, args.concurrency))
+            finally:
+                stop_server(process)
+
+    print(f"\n{'mode':<12} | {'requests':>9} | {'req/s':>9} | {'p50 ms':>8} | {'p99 ms':>8} | errors")
+    print("-" * 66)
+    for app_env, r in results.items():
+        print(f"{app_env:<12} | {r['requests']:>9} | {r['rps']:>9.1f} | {r['p50_ms']:>8.1f} | {r['p99_ms']:>8.1f} | {r['errors']}")
+
+
+if __name__ == "__main__":
+    main()
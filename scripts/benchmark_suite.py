@@ -0,0 +1,516 @@
+"""
+Benchmark suite: API, repository, service và pipeline làm sạch / phân tích dữ liệu
+Seed database SQLite ở nhiều kích thước (mặc định 1k, 100k, 1M sinh viên), đo latency
+(p50/p90/p99) và throughput cho từng endpoint của student_router qua ASGI client
+in-process, microbenchmark StudentRepository, StudentService.bulk_create_students
+và clean_student_data / analysis_data (từ CSV và từ database). Kết quả ghi ra JSON để so sánh giữa các commit.
+
+- Fixture được sinh bằng scripts/generate_large_dataset.py (seed cố định) và cache lại
+  trong --fixtures-dir; mỗi lần chạy dùng 1 bản copy nên các endpoint ghi không làm
+  thay đổi fixture
+- Mỗi kích thước chạy trong 1 process riêng (DATABASE_URL khác nhau, engine và cache
+  của app không dùng chung giữa các kích thước)
+- Endpoint crawl-students cần Chrome + trang web thật nên không đo, phần xử lý sau
+  crawl được đo qua mục pipeline. Pipeline ghi vào app/crawling/cleaned_data và
+  app/crawling/img như lúc crawl thật.
+
+Chạy:
+    python scripts/benchmark_suite.py --output bench/HEAD.json
+    python scripts/benchmark_suite.py --sizes 1000 100000 --requests 100 --output bench/new.json --compare bench/main.json
+    python scripts/benchmark_suite.py --compare bench/main.json --against bench/new.json --fail-on-regression
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FIXTURES_DIR = os.path.join(tempfile.gettempdir(), "student_benchmark_fixtures")
+
+SEARCH_TERMS = ("nguyen", "ha noi", "LT00", "anh")
+BATCH_SIZE = 100
+
+
+
+def summarize(latencies, wall_seconds, errors=0):
+    """Latency (giây) -> dict ms / throughput, cùng format cho mọi mục"""
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    ordered = sorted(latencies)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_per_s": round(len(ordered) / wall_seconds, 2) if wall_seconds > 0 else None,
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(percentile(50), 3),
+        "p90_ms": round(percentile(90), 3),
+        "p99_ms": round(percentile(99), 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def micro(function, repeat):
+    """Gọi function() `repeat` lần (tuần tự), trả về summarize của các lần gọi"""
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+
+def api_cases(size, requests, rng):
+    """
+    Danh sách (tên, số request, có ghi hay không, hàm tạo request) cho từng endpoint của student_router
+
+    Hàm tạo request nhận (i, state) và trả về (method, url, params, json).
+    state giữ các id / mã được tạo ra để các case xóa dọn lại đúng dữ liệu đó.
+    """
+    light = max(5, requests // 10)  # endpoint nặng (export, bulk) chạy ít request hơn
+
+    def random_id():
+        return rng.randint(1, size)
+
+    def code_of(student_id):
+        return f"LT{student_id:04d}"
+
+    def bulk_codes(i):
+        return [f"BK{i:05d}-{j:03d}" for j in range(BATCH_SIZE)]
+
+    return [
+        ("GET /api/students/{student_id}", requests, False,
+         lambda i, state: ("GET", f"/api/students/{random_id()}", None, None)),
+        ("GET /api/students/by-code/{student_code}", requests, False,
+         lambda i, state: ("GET", f"/api/students/by-code/{code_of(random_id())}", None, None)),
+        ("GET /api/students/", requests, False,
+         lambda i, state: ("GET", "/api/students/",
+                           {"skip": rng.randrange(0, max(1, size - 100)), "limit": 100}, None)),
+        ("GET /api/students/?search", requests, False,
+         lambda i, state: ("GET", "/api/students/",
+                           {"search": SEARCH_TERMS[i % len(SEARCH_TERMS)], "limit": 20}, None)),
+        ("POST /api/students/batch-get", requests, False,
+         lambda i, state: ("POST", "/api/students/batch-get", None,
+                           {"ids": [random_id() for _ in range(BATCH_SIZE)]})),
+        ("GET /api/students/changes", requests, False,
+         lambda i, state: ("GET", "/api/students/changes",
+                           {"since": rng.randrange(0, max(1, size - 1000)), "limit": 1000}, None)),
+        ("GET /api/students/export", light, False,
+         lambda i, state: ("GET", "/api/students/export",
+                           {"format": ("csv", "ndjson")[i % 2], "search": "vinh phuc"}, None)),
+        ("POST /api/students/", requests, True,
+         lambda i, state: ("POST", "/api/students/", None,
+                           {"student_code": f"BC{i:06d}", "first_name": "Minh", "last_name": "Nguyễn",
+                            "hometown": "Hà Nội", "math_score": 8.5})),
+        ("PUT /api/students/{student_id}", requests, True,
+         lambda i, state: ("PUT", f"/api/students/{random_id()}", None,
+                           {"math_score": round(rng.uniform(0, 10), 1)})),
+        ("DELETE /api/students/{student_id}", requests, True,
+         lambda i, state: ("DELETE", f"/api/students/{state['created_ids'][i % len(state['created_ids'])]}",
+                           None, None)),
+        ("POST /api/students/bulk", light, True,
+         lambda i, state: ("POST", "/api/students/bulk", None,
+                           [{"student_code": code, "first_name": "Lan", "hometown": "Huế"} for code in bulk_codes(i)])),
+        ("PATCH /api/students/bulk", light, True,
+         lambda i, state: ("PATCH", "/api/students/bulk", None,
+                           [{"student_code": code, "fields": {"english_score": 7.5}} for code in bulk_codes(i)])),
+        ("POST /api/students/bulk-delete", light, True,
+         lambda i, state: ("POST", "/api/students/bulk-delete", None, {"student_codes": bulk_codes(i)})),
+    ]
+
+
+async def run_api_case(client, requests, concurrency, build, state):
+    """Bắn `requests` request với `concurrency` worker song song, trả về (latencies, errors, wall)"""
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            method, url, params, body = build(i, state)
+            start = time.perf_counter()
+            response = await client.request(method, url, params=params, json=body)
+            await response.aread()
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+            elif method == "POST" and url == "/api/students/":
+                state["created_ids"].append(response.json()["id"])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def bench_api(size, requests, concurrency, warmup, seed):
+    import httpx
+    from app.main import app
+
+    rng = random.Random(seed)
+    state = {"created_ids": []}
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=600) as client:
+            for name, count, writes, build in api_cases(size, requests, rng):
+                if not writes and warmup:
+                    await run_api_case(client, warmup, 1, build, state)
+                latencies, errors, wall = await run_api_case(client, count, concurrency, build, state)
+                results[name] = summarize(latencies, wall, errors)
+                print(f"   api {name:<42} p50 {results[name].get('p50_ms', 0):9.2f} ms")
+    results["POST /api/students/crawl-students"] = {"skipped": "cần Chrome và trang STUDENTS_URL"}
+    return results
+
+
+
+def bench_repository(size, repeat, seed):
+    from app.database import SessionLocal
+    from app.repositories import StudentRepository
+    from app.schemas import StudentBulkUpdateItem, StudentUpdate
+
+    rng = random.Random(seed)
+    heavy = max(3, repeat // 10)
+
+    def random_ids(count):
+        return [rng.randint(1, size) for _ in range(count)]
+
+    def codes(ids):
+        return [f"LT{student_id:04d}" for student_id in ids]
+
+    def consume(iterator):
+        for _ in iterator:
+            pass
+
+    with SessionLocal() as db:
+        repository = StudentRepository(db)
+        cases = {
+            "get_by_id": (repeat, lambda: repository.get_by_id(random_ids(1)[0])),
+            "get_by_student_code": (repeat, lambda: repository.get_by_student_code(codes(random_ids(1))[0])),
+            "get_rows_by_ids[100]": (repeat, lambda: repository.get_rows_by_ids(random_ids(BATCH_SIZE))),
+            "get_rows_by_student_codes[100]": (
+                repeat, lambda: repository.get_rows_by_student_codes(codes(random_ids(BATCH_SIZE)))),
+            "get_all_rows[page 100]": (
+                repeat, lambda: repository.get_all_rows(skip=rng.randrange(0, max(1, size - 100)), limit=100)),
+            "get_all_rows[search]": (
+                repeat, lambda: repository.get_all_rows(limit=20, search=rng.choice(SEARCH_TERMS))),
+            "count": (heavy, lambda: repository.count()),
+            "count[search]": (heavy, lambda: repository.count(search=rng.choice(SEARCH_TERMS))),
+            "get_existing_codes[500]": (repeat, lambda: repository.get_existing_codes(codes(random_ids(500)))),
+            "iter_rows[search=vinh phuc]": (heavy, lambda: consume(repository.iter_rows(search="vinh phuc"))),
+            "bulk_update[100]": (heavy, lambda: repository.bulk_update([
+                StudentBulkUpdateItem(id=student_id, fields=StudentUpdate(english_score=6.5))
+                for student_id in random_ids(BATCH_SIZE)
+            ])),
+        }
+        results = {}
+        for name, (count, function) in cases.items():
+            results[name] = micro(function, count)
+            print(f"   repository {name:<35} p50 {results[name]['p50_ms']:9.2f} ms")
+    return results
+
+
+def bench_service(repeat):
+    from app.database import SessionLocal
+    from app.schemas import StudentBulkDeleteRequest, StudentCreate
+    from app.services import StudentService
+
+    heavy = max(3, repeat // 10)
+    latencies = []
+    with SessionLocal() as db:
+        service = StudentService(db)
+        started = time.perf_counter()
+        for run in range(heavy):
+            students = [
+                StudentCreate(student_code=f"SB{run:04d}-{j:03d}", first_name="Hương",
+                              last_name="Trần", hometown="Đà Nẵng", math_score=7.0)
+                for j in range(BATCH_SIZE)
+            ]
+            start = time.perf_counter()
+            service.bulk_create_students(students)
+            latencies.append(time.perf_counter() - start)
+            # Dọn dữ liệu (không tính vào thời gian đo)
+            wall_pause = time.perf_counter()
+            service.bulk_delete_students(StudentBulkDeleteRequest(
+                student_codes=[student.student_code for student in students]))
+            started += time.perf_counter() - wall_pause
+        wall = time.perf_counter() - started
+    result = summarize(latencies, wall)
+    print(f"   service {'bulk_create_students[100]':<38} p50 {result['p50_ms']:9.2f} ms")
+    return {"bulk_create_students[100]": result}
+
+
+
+def write_raw_csv(path, size, seed):
+    """Ghi CSV đúng định dạng bảng crawl được (cột tiếng Việt, ngày dd/mm/yyyy)"""
+    import pandas as pd
+    from scripts.generate_large_dataset import iter_chunks
+
+    written = 0
+    for chunk in iter_chunks(size, seed, "LT"):
+        scores = chunk[["math_score", "literature_score", "english_score"]]
+        raw = pd.DataFrame({
+            "STT": range(written + 1, written + len(chunk) + 1),
+            "Mã SV": chunk["student_code"],
+            "Họ tên": chunk["last_name"] + " " + chunk["first_name"],
+            "Email": chunk["email"],
+            "Ngày sinh": chunk["date_of_birth"].dt.strftime("%d/%m/%Y"),
+            "Quê quán": chunk["hometown"],
+            "Toán": chunk["math_score"],
+            "Văn": chunk["literature_score"],
+            "Anh": chunk["english_score"],
+            "TB": scores.mean(axis=1).round(2),
+            "Thao tác": "Sửa Xóa",
+        })
+        raw.to_csv(path, mode="w" if written == 0 else "a", header=written == 0,
+                   index=False, encoding="utf-8-sig" if written == 0 else "utf-8")
+        written += len(chunk)
+
+
+def bench_pipeline(size, seed, workdir, repeat):
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    from app.crawling.analysis_data import analysis_data, analysis_data_from_db
+    from app.crawling.clean_data import clean_student_data
+
+    raw_path = os.path.join(workdir, "raw_students_data.csv")
+    write_raw_csv(raw_path, size, seed)
+
+    # FutureWarning của pandas trong clean_student_data: bỏ khi đo
+    clean_latencies, analysis_latencies, database_latencies = [], [], []
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cleaned_path = clean_student_data(raw_path)
+            clean_latencies.append(time.perf_counter() - start)
+            if cleaned_path is None:
+                return {"error": "clean_student_data thất bại"}
+            start = time.perf_counter()
+            analysis_data(cleaned_path)
+            analysis_latencies.append(time.perf_counter() - start)
+            # Cùng các biểu đồ, đọc thẳng từ fixture database (chunked read_sql)
+            start = time.perf_counter()
+            analysis_data_from_db(os.path.join(workdir, "charts"))
+            database_latencies.append(time.perf_counter() - start)
+
+    results = {
+        "clean_student_data": summarize(clean_latencies, sum(clean_latencies)),
+        "analysis_data": summarize(analysis_latencies, sum(analysis_latencies)),
+        "analysis_data_from_db": summarize(database_latencies, sum(database_latencies)),
+    }
+    clean_seconds = statistics.median(clean_latencies)
+    analysis_seconds = statistics.median(analysis_latencies)
+    database_seconds = statistics.median(database_latencies)
+    print(f"   pipeline clean {clean_seconds:.2f}s, analysis {analysis_seconds:.2f}s, "
+          f"analysis from db {database_seconds:.2f}s")
+    return results
+
+
+def run_worker(args):
+    """Đo 1 kích thước dataset (DATABASE_URL đã trỏ tới bản copy của fixture)"""
+    # Ghi đồng thời trên SQLite (1 writer) chờ lock lâu là bình thường khi đo tải: không log slow query
+    os.environ.setdefault("SLOW_QUERY_MS", "60000")
+    # Fixture cache có thể sinh từ schema cũ: nâng cấp bản copy trước khi đo (giống lúc server
+    # khởi động) và điền hometown_id (bước migrate_hometowns.py, giữ cột cũ trên bản copy)
+    from app.database import SessionLocal
+    from app.main import prepare_database
+    from app.services import StudentService
+    prepare_database()
+    with SessionLocal() as db:
+        StudentService(db).backfill_hometowns()
+    results = {}
+    if "api" in args.only:
+        results["api"] = asyncio.run(
+            bench_api(args.worker_size, args.requests, args.concurrency, args.warmup, args.seed))
+    if "repository" in args.only:
+        results["repository"] = bench_repository(args.worker_size, args.repeat, args.seed)
+    if "service" in args.only:
+        results["service"] = bench_service(args.repeat)
+    if "pipeline" in args.only:
+        results["pipeline"] = bench_pipeline(
+            args.worker_size, args.seed, os.path.dirname(args.worker_output), args.pipeline_repeat)
+    with open(args.worker_output, "w", encoding="utf-8") as f:
+        json.dump(results, f)
+
+
+
+def ensure_fixture(fixtures_dir, size, seed):
+    """Sinh fixture database (nếu chưa có), trả về (path, số giây seed hoặc None nếu dùng lại)"""
+    os.makedirs(fixtures_dir, exist_ok=True)
+    path = os.path.join(fixtures_dir, f"students_{size}_seed{seed}.db")
+    if os.path.exists(path):
+        return path, None
+
+    print(f"🌱 Seeding fixture {size:,} sinh viên -> {path}")
+    partial = path + ".partial"
+    if os.path.exists(partial):
+        os.remove(partial)
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT_DIR, "scripts", "generate_large_dataset.py"),
+         "--count", str(size), "--seed", str(seed), "--prefix", "LT"],
+        cwd=ROOT_DIR, env=dict(os.environ, DATABASE_URL=f"sqlite:///{partial}"),
+        check=True, stdout=subprocess.DEVNULL,
+    )
+    os.replace(partial, path)
+    return path, round(time.perf_counter() - start, 2)
+
+
+def run_size(args, size):
+    fixture, seed_seconds = ensure_fixture(args.fixtures_dir, size, args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, "bench.db")
+        shutil.copyfile(fixture, database)
+        output = os.path.join(tmp, "result.json")
+        command = [
+            sys.executable, os.path.abspath(__file__),
+            "--worker-size", str(size), "--worker-output", output,
+            "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+            "--warmup", str(args.warmup), "--repeat", str(args.repeat),
+            "--pipeline-repeat", str(args.pipeline_repeat), "--seed", str(args.seed),
+            "--only", *args.only,
+        ]
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{database}", MPLBACKEND="Agg")
+        print(f"\n📏 {size:,} sinh viên")
+        subprocess.run(command, cwd=ROOT_DIR, env=env, check=True)
+        with open(output, encoding="utf-8") as f:
+            result = json.load(f)
+    result["fixture"] = {"students": size, "seed_seconds": seed_seconds}
+    return result
+
+
+def git_info():
+    def git(*command):
+        try:
+            return subprocess.run(["git", *command], cwd=ROOT_DIR, capture_output=True,
+                                  text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def flatten(results):
+    """{size: {section: {name: metrics}}} -> {(size, section, name): metrics}"""
+    flat = {}
+    for size, sections in results.get("results", {}).items():
+        for section, cases in sections.items():
+            if section == "fixture":
+                continue
+            for name, metrics in cases.items():
+                if "p50_ms" in metrics:
+                    flat[(size, section, name)] = metrics
+    return flat
+
+
+def compare(baseline, current, threshold):
+    """
+    In bảng so sánh p50 giữa 2 lần chạy
+
+    Returns:
+        Danh sách các mục chậm hơn baseline quá `threshold` (tỷ lệ, 0.2 = 20%)
+    """
+    old, new = flatten(baseline), flatten(current)
+    regressions = []
+    print(f"\n📊 So sánh với {baseline.get('meta', {}).get('commit') or 'baseline'} (p50, ngưỡng {threshold:.0%})")
+    print(f"{'size':>8} | {'section':<10} | {'case':<42} | {'old ms':>9} | {'new ms':>9} | {'change':>8}")
+    print("-" * 102)
+    for key in sorted(old.keys() & new.keys(), key=lambda k: (int(k[0]), k[1], k[2])):
+        before, after = old[key]["p50_ms"], new[key]["p50_ms"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(key)
+            flag = " ❌"
+        elif change < -threshold:
+            flag = " ✅"
+        print(f"{key[0]:>8} | {key[1]:<10} | {key[2]:<42} | {before:>9.2f} | {after:>9.2f} | {change:>+7.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--only", nargs="+", choices=["api", "repository", "service", "pipeline"],
+                        default=["api", "repository", "service", "pipeline"])
+    parser.add_argument("--requests", type=int, default=200, help="Số request cho mỗi endpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="Số client song song khi đo API")
+    parser.add_argument("--warmup", type=int, default=10, help="Số request chạy trước (không đo) cho endpoint đọc")
+    parser.add_argument("--repeat", type=int, default=100, help="Số lần gọi mỗi method khi microbenchmark")
+    parser.add_argument("--pipeline-repeat", type=int, default=3, help="Số lần chạy clean_student_data / analysis_data")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fixtures-dir", default=DEFAULT_FIXTURES_DIR, help="Thư mục cache fixture database")
+    parser.add_argument("--output", help="File JSON kết quả")
+    parser.add_argument("--compare", metavar="BASELINE", help="File JSON của lần chạy trước để so sánh")
+    parser.add_argument("--against", metavar="CURRENT", help="So sánh với file JSON này thay vì chạy benchmark")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Tỷ lệ chậm hơn bị coi là regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit 1 nếu có regression")
+    parser.add_argument("--worker-size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--worker-output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker_size is not None:
+        run_worker(args)
+        return
+
+    if args.against:
+        if not args.compare:
+            parser.error("--against cần đi kèm --compare")
+        with open(args.against, encoding="utf-8") as f:
+            current = json.load(f)
+    else:
+        current = {
+            "meta": {
+                **git_info(),
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "config": {key: getattr(args, key) for key in
+                           ("sizes", "only", "requests", "concurrency", "warmup", "repeat", "pipeline_repeat", "seed")},
+            },
+            "results": {},
+        }
+        for size in args.sizes:
+            current["results"][str(size)] = run_size(args, size)
+
+        if args.output:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(current, f, ensure_ascii=False, indent=2)
+            print(f"\n✅ Đã ghi kết quả vào {args.output}")
+        else:
+            print(json.dumps(current, ensure_ascii=False, indent=2))
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} mục chậm hơn baseline quá {args.threshold:.0%}")
+            if args.fail_on_regression:
+                sys.exit(1)
+        else:
+            print("\n✅ Không có regression")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: đọc bảng sinh viên bằng WebDriver (từng ô) vs page_source + lxml
+Mở file HTML fixture đã lưu trong Chrome headless và đo thời gian đọc 1 trang
+theo từng cách, kiểm tra 2 cách cho cùng kết quả
+
+Chạy:
+    python scripts/benchmark_table_extraction.py
+    python scripts/benchmark_table_extraction.py --repeat 20 --fixture scripts/fixtures/students_table_page.html
+    python scripts/benchmark_table_extraction.py --no-browser   # chỉ đo parse lxml (máy không có Chrome)
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import pathlib
+import statistics
+import time
+
+from app.crawling.table_parser import parse_table
+
+DEFAULT_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "students_table_page.html")
+
+
+def measure(function, repeat):
+    """Chạy function `repeat` lần, trả về (kết quả lần cuối, list thời gian ms)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, timings
+
+
+def report(name, timings):
+    print(f"{name:<28} | median {statistics.median(timings):9.2f} ms | min {min(timings):9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE, help="File HTML của 1 trang danh sách sinh viên")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--no-browser", action="store_true", help="Không mở Chrome, chỉ đo parse lxml")
+    args = parser.parse_args()
+
+    page_source = pathlib.Path(args.fixture).read_text(encoding="utf-8")
+    (headers, rows), parse_timings = measure(lambda: parse_table(page_source), args.repeat)
+    cells = sum(len(row) for row in rows)
+    print(f"📄 Fixture: {args.fixture} ({len(rows)} dòng, {len(headers)} cột, {cells} ô)")
+    # Cách cũ: 1 lần tìm header + text từng header, 1 lần tìm dòng, mỗi dòng 1 lần tìm td, mỗi ô 1 lần .text
+    print(f"🔁 WebDriver round trips / trang: cách cũ ~{1 + 2 * len(headers) + 1 + len(rows) + cells}, page_source: 1\n")
+
+    report("lxml parse (không browser)", parse_timings)
+    if args.no_browser:
+        return
+
+    from app.crawling.driver_pool import create_driver
+    from app.crawling.students_crawl import read_table_page_source, read_table_webdriver
+
+    try:
+        driver = create_driver()
+    except Exception as error:
+        print(f"\n⚠️  Không khởi động được Chrome ({error.__class__.__name__}), bỏ qua phần đo qua WebDriver")
+        return
+
+    try:
+        driver.get(pathlib.Path(args.fixture).resolve().as_uri())
+        webdriver_result, webdriver_timings = measure(lambda: read_table_webdriver(driver), args.repeat)
+        page_source_result, page_source_timings = measure(lambda: read_table_page_source(driver), args.repeat)
+    finally:
+        driver.quit()
+
+    report("webdriver (từng ô)", webdriver_timings)
+    report("page_source + lxml", page_source_timings)
+    speedup = statistics.median(webdriver_timings) / statistics.median(page_source_timings)
+    print(f"\n⚡ page_source nhanh hơn {speedup:.1f}x")
+
+    # Cột "Thao tác" chứa nhiều nút: WebDriver có thể nối bằng xuống dòng, lxml bằng khoảng trắng
+    normalize = lambda table: (table[0], [[" ".join(cell.split()) for cell in row] for row in table[1]])
+    if normalize(webdriver_result) == normalize(page_source_result):
+        print("✅ 2 cách cho cùng kết quả")
+    else:
+        print("❌ Kết quả khác nhau giữa 2 cách")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Import-time guard cho API worker
+Đo thời gian import app.main (python -X importtime) và RSS sau khi import,
+đồng thời kiểm tra các thư viện nặng không bị load lúc khởi động
+
+Chạy (CI chạy script này trên mỗi push / pull request):
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py --max-ms 1500 --max-rss-mb 120
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Các thư viện chỉ crawl/analysis cần, API worker không được import lúc khởi động
+FORBIDDEN_MODULES = ["pandas", "numpy", "matplotlib", "seaborn", "selenium", "pyarrow", "lxml"]
+
+PROBE = """
+import resource, sys, json
+import app.main
+print(json.dumps({
+    "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "loaded": sorted(m for m in %r if m in sys.modules),
+}))
+""" % (FORBIDDEN_MODULES,)
+
+
+def parse_importtime(stderr: str) -> tuple[float, list[tuple[float, str]]]:
+    """
+    Parse output của -X importtime
+
+    Returns:
+        (tổng thời gian import app.main tính bằng ms,
+         danh sách (cumulative ms, module) của các module nặng nhất)
+    """
+    entries = []
+    total_us = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, _self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|", 1).split("|")]
+        entries.append((int(cumulative_us) / 1000, name))
+        if name == "app.main":
+            total_us = int(cumulative_us)
+    entries.sort(reverse=True)
+    return total_us / 1000, entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--max-ms", type=float, default=float(os.getenv("MAX_IMPORT_MS", 3000)),
+                        help="Thời gian import app.main tối đa (ms)")
+    parser.add_argument("--max-rss-mb", type=float, default=float(os.getenv("MAX_IMPORT_RSS_MB", 150)),
+                        help="RSS tối đa sau khi import app.main (MB)")
+    parser.add_argument("--top", type=int, default=10, help="Số module nặng nhất in ra")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        sys.exit(result.returncode)
+
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    total_ms, entries = parse_importtime(result.stderr)
+    rss_mb = probe["rss_kb"] / 1024
+
+    print(f"import app.main: {total_ms:.0f} ms (max {args.max_ms:.0f} ms)")
+    print(f"RSS after import: {rss_mb:.1f} MB (max {args.max_rss_mb:.0f} MB)")
+    print(f"\nTop {args.top} cumulative imports:")
+    for cumulative_ms, name in entries[:args.top]:
+        print(f"  {cumulative_ms:9.1f} ms  {name}")
+
+    errors = []
+    if probe["loaded"]:
+        errors.append(f"Heavy modules loaded at startup: {', '.join(probe['loaded'])}")
+    if total_ms > args.max_ms:
+        errors.append(f"Import time {total_ms:.0f} ms exceeds {args.max_ms:.0f} ms")
+    if rss_mb > args.max_rss_mb:
+        errors.append(f"RSS {rss_mb:.1f} MB exceeds {args.max_rss_mb:.0f} MB")
+
+    if errors:
+        print("\n❌ " + "\n❌ ".join(errors))
+        sys.exit(1)
+    print("\n✅ Import-time check passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Compact change log (bảng student_changes) của change feed
+Xóa các entry đã bị thay thế và tombstone cũ hơn thời gian giữ lại
+
+Chạy định kỳ (cron), ví dụ mỗi đêm:
+    python scripts/compact_change_log.py
+    python scripts/compact_change_log.py --retention-days 30
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+
+from app.database import SessionLocal, engine, Base
+from app.services import StudentService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--retention-days", type=float,
+        default=float(os.getenv("CHANGE_LOG_TOMBSTONE_RETENTION_DAYS", 7)),
+        help="Giữ tombstone trong bao nhiêu ngày (client không sync trong khoảng này phải đồng bộ lại)"
+    )
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        removed, watermark = StudentService(db).compact_change_log(args.retention_days)
+
+    print(f"✅ Đã xóa {removed} entry khỏi change log (watermark: {watermark})")
+
+
+if __name__ == "__main__":
+    main()
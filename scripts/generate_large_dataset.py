@@ -0,0 +1,274 @@
+"""
+Generate large synthetic students dataset (NumPy vectorized) for load testing
+Cùng phân phối với scripts/generate_sample_data.py (grade bands của generate_score,
+hometown_biased_tweaks, ngày sinh 2002-2005) nhưng sinh theo từng chunk bằng NumPy,
+1M+ sinh viên trong vài giây
+
+- Seed cố định -> cùng dữ liệu, không phụ thuộc số worker (mỗi chunk có RNG riêng)
+- Ghi thẳng vào database (Core INSERT theo chunk) hoặc ra file Parquet / CSV
+- --workers N: sinh các chunk song song bằng multiprocessing (ghi vẫn tuần tự)
+
+Chạy:
+    python scripts/generate_large_dataset.py --count 1000000 --truncate
+    python scripts/generate_large_dataset.py --count 5000000 --output parquet --path data/students_5m.parquet --workers 4
+    python scripts/generate_large_dataset.py --count 200000 --output csv --path data/students_200k.csv --seed 7
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+from datetime import date
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from app.utils.text_normalization import fold_for_search
+from scripts.generate_sample_data import (
+    first_names_female,
+    first_names_male,
+    hometown_biased_tweaks,
+    hometowns,
+    last_names,
+    remove_vietnamese_accents,
+)
+
+CHUNK_SIZE = 100_000
+
+# Các cột ghi vào bảng students (quê quán ghi dạng hometown_id, tra theo bảng hometowns)
+COLUMNS = (
+    "student_code", "first_name", "last_name", "email", "date_of_birth",
+    "hometown_id", "math_score", "literature_score", "english_score",
+    "first_name_folded", "last_name_folded",
+)
+
+BIRTH_START = np.datetime64("2002-01-01")
+BIRTH_DAYS = (date(2005, 12, 31) - date(2002, 1, 1)).days + 1
+
+# Bảng tra theo index (không xử lý chuỗi từng sinh viên)
+FIRST_NAMES = np.array(first_names_male + first_names_female, dtype=object)
+FIRST_NAMES_ASCII = [remove_vietnamese_accents(name) for name in FIRST_NAMES]
+LAST_NAMES = np.array(last_names, dtype=object)
+LAST_NAMES_ASCII = [remove_vietnamese_accents(name) for name in last_names]
+HOMETOWNS = np.array(hometowns, dtype=object)  # có phần tử lặp -> giữ nguyên trọng số
+
+# Cột tìm kiếm không dấu (giống StudentRepository ghi), tra theo cùng index
+FIRST_NAMES_FOLDED = np.array([fold_for_search(name) for name in FIRST_NAMES], dtype=object)
+LAST_NAMES_FOLDED = np.array([fold_for_search(name) for name in last_names], dtype=object)
+
+# (multiplier, boost) theo hometown, NaN = không có tweak
+TWEAK_MULTI = np.array([hometown_biased_tweaks.get(h, (np.nan, np.nan))[0] for h in hometowns])
+TWEAK_BOOST = np.array([hometown_biased_tweaks.get(h, (np.nan, np.nan))[1] for h in hometowns])
+
+# Grade bands của generate_score(): (ngưỡng cộng dồn, min, max)
+SCORE_BANDS = (
+    (0.18, 9.0, 10.0),  # A
+    (0.30, 8.0, 8.9),   # B
+    (0.65, 6.0, 7.9),   # C
+    (0.83, 4.0, 5.9),   # D
+    (1.00, 0.5, 3.9),   # F
+)
+
+
+def generate_scores(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Bản vectorized của generate_score(): chọn band rồi lấy uniform trong band"""
+    thresholds = np.array([band[0] for band in SCORE_BANDS])
+    lows = np.array([band[1] for band in SCORE_BANDS])
+    highs = np.array([band[2] for band in SCORE_BANDS])
+
+    band = np.searchsorted(thresholds, rng.random(n), side="right")
+    scores = lows[band] + rng.random(n) * (highs[band] - lows[band])
+
+    # Band C: ngoài [6.5, 7.5] thì 30% được roll lại trong [6.5, 7.5]
+    reroll = (band == 2) & ((scores < 6.5) | (scores > 7.5)) & (rng.random(n) < 0.3)
+    scores[reroll] = rng.uniform(6.5, 7.5, reroll.sum())
+    return np.round(scores, 1)
+
+
+def generate_chunk(args) -> pd.DataFrame:
+    """
+    Sinh 1 chunk sinh viên
+
+    Args:
+        args: (chunk_index, start, count, seed, prefix) - tuple để dùng được với Pool.imap
+
+    Returns:
+        DataFrame với các cột của bảng students (trừ id)
+    """
+    chunk_index, start, count, seed, prefix = args
+    rng = np.random.default_rng([seed, chunk_index])
+    n = count
+
+    # Tên: chọn giới tính rồi chọn tên trong danh sách nam / nữ
+    is_male = rng.random(n) < 0.5
+    first_idx = np.where(
+        is_male,
+        rng.integers(0, len(first_names_male), n),
+        len(first_names_male) + rng.integers(0, len(first_names_female), n),
+    )
+    last_idx = rng.integers(0, len(LAST_NAMES), n)
+    hometown_idx = rng.integers(0, len(HOMETOWNS), n)
+
+    numbers = np.arange(start + 1, start + n + 1)
+    codes = [f"{prefix}{number:04d}" for number in numbers]
+    emails = [
+        f"{FIRST_NAMES_ASCII[f]}{LAST_NAMES_ASCII[l]}{code.lower()}@university.edu.vn"
+        for f, l, code in zip(first_idx.tolist(), last_idx.tolist(), codes)
+    ]
+
+    birth_dates = BIRTH_START + rng.integers(0, BIRTH_DAYS, n).astype("timedelta64[D]")
+    birth_years = birth_dates.astype("datetime64[Y]").astype(int) + 1970
+    age_factor = np.clip((date.today().year - birth_years - 19) / 4, 0, 1)
+
+    # Điểm có tương quan qua base_ability, giống generate_students()
+    base_ability = rng.uniform(5.5, 9.0, n)
+    math = np.clip(generate_scores(rng, n) * 0.7 + base_ability * 0.3, 0, 10)
+    literature = np.clip(generate_scores(rng, n) * 0.7 + base_ability * 0.3, 0, 10)
+
+    english_base = generate_scores(rng, n) - rng.uniform(0.5, 1.0, n)
+    multi, boost = TWEAK_MULTI[hometown_idx], TWEAK_BOOST[hometown_idx]
+    tweaked = ~np.isnan(multi)
+    english = np.where(
+        tweaked,
+        english_base * np.nan_to_num(multi) + np.nan_to_num(boost),
+        english_base * rng.uniform(0.85, 0.95, n) - rng.uniform(0.2, 0.5, n),
+    )
+    english = np.round(np.clip(english, 0, 10), 1)
+
+    math = math + rng.uniform(-0.3, 0.3, n)
+    literature = literature - age_factor * rng.uniform(0.8, 1.5, n)
+    english = english * (1 + 0.10 * age_factor) + age_factor * 0.3
+
+    # Khác bản gốc: clip về [0, 10] sau bước nhiễu để dữ liệu luôn hợp lệ với schema API
+    return pd.DataFrame({
+        "student_code": codes,
+        "first_name": FIRST_NAMES[first_idx],
+        "last_name": LAST_NAMES[last_idx],
+        "email": emails,
+        "date_of_birth": birth_dates,
+        "hometown": HOMETOWNS[hometown_idx],
+        "math_score": np.round(np.clip(math, 0, 10), 1),
+        "literature_score": np.round(np.clip(literature, 0, 10), 1),
+        "english_score": np.round(np.clip(english, 0, 10), 1),
+        "first_name_folded": FIRST_NAMES_FOLDED[first_idx],
+        "last_name_folded": LAST_NAMES_FOLDED[last_idx],
+    })
+
+
+def iter_chunks(count, seed, prefix, start=0, chunk_size=CHUNK_SIZE, workers=1):
+    """Sinh các chunk theo thứ tự (song song nếu workers > 1)"""
+    tasks = [
+        (index, start + offset, min(chunk_size, count - offset), seed, prefix)
+        for index, offset in enumerate(range(0, count, chunk_size))
+    ]
+    if workers > 1:
+        with Pool(workers) as pool:
+            yield from pool.imap(generate_chunk, tasks)
+    else:
+        yield from map(generate_chunk, tasks)
+
+
+def write_database(chunks, truncate):
+    """Ghi vào DATABASE_URL bằng Core INSERT (executemany) theo chunk, 1 transaction"""
+    from sqlalchemy import delete, insert
+    from app.database import Base, SessionLocal, add_missing_columns, engine
+    from app.models import Student, StudentChange, StudentChangeCompaction
+    from app.repositories import HometownRepository
+    from app.services import StudentService
+
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(Student.__table__)
+    # Quê quán -> hometown_id: tạo trước các row trong bảng hometowns (vài chục quê quán)
+    with SessionLocal() as db:
+        hometown_ids = HometownRepository(db).resolve_many(hometowns)
+        db.commit()
+    # Compile INSERT 1 lần rồi executemany bằng tuple qua driver: bỏ qua bước
+    # xử lý dict/bind param từng dòng của SQLAlchemy (chậm hơn ~3x với 1M dòng)
+    statement = str(insert(Student.__table__).compile(
+        dialect=engine.dialect, column_keys=COLUMNS,
+    ))
+    written = 0
+    with engine.begin() as conn:
+        if truncate:
+            for model in (Student, StudentChange, StudentChangeCompaction):
+                conn.execute(delete(model))
+        for chunk in chunks:
+            # Date lưu dạng 'YYYY-MM-DD' (giống kiểu Date của SQLAlchemy trên SQLite)
+            chunk["date_of_birth"] = chunk["date_of_birth"].dt.strftime("%Y-%m-%d")
+            # object: int của Python (sqlite3 không bind được numpy.int64)
+            chunk["hometown_id"] = chunk["hometown"].map(hometown_ids).astype(object)
+            conn.exec_driver_sql(statement, list(chunk[list(COLUMNS)].itertuples(index=False, name=None)))
+            written += len(chunk)
+            print(f"   ... {written:,} rows")
+
+    # Change feed: ghi entry upsert cho các sinh viên vừa insert
+    with SessionLocal() as db:
+        StudentService(db).backfill_change_log()
+    return written
+
+
+def write_parquet(chunks, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    written = 0
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            column = table.schema.get_field_index("date_of_birth")
+            table = table.set_column(column, "date_of_birth", table.column(column).cast(pa.date32()))
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+            writer.write_table(table)
+            written += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
+
+
+def write_csv(chunks, path):
+    written = 0
+    for chunk in chunks:
+        chunk.to_csv(path, mode="w" if written == 0 else "a", header=written == 0,
+                     index=False, encoding="utf-8-sig" if written == 0 else "utf-8")
+        written += len(chunk)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--prefix", default="LT", help="Tiền tố mã sinh viên (tránh trùng dữ liệu mẫu SVxxxx)")
+    parser.add_argument("--start", type=int, default=0, help="Số thứ tự bắt đầu của mã sinh viên")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=1, help="Số process sinh dữ liệu song song")
+    parser.add_argument("--output", choices=["db", "parquet", "csv"], default="db")
+    parser.add_argument("--path", help="File output cho parquet/csv")
+    parser.add_argument("--truncate", action="store_true", help="Xóa toàn bộ sinh viên trước khi ghi (output db)")
+    args = parser.parse_args()
+
+    if args.output != "db" and not args.path:
+        parser.error("--path là bắt buộc với output parquet/csv")
+
+    print(f"🎲 Generating {args.count:,} students (seed={args.seed}, workers={args.workers}) -> {args.output}")
+    start_time = time.perf_counter()
+    chunks = iter_chunks(args.count, args.seed, args.prefix, args.start, args.chunk_size, args.workers)
+
+    if args.output == "db":
+        written = write_database(chunks, args.truncate)
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(args.path)), exist_ok=True)
+        written = write_parquet(chunks, args.path) if args.output == "parquet" else write_csv(chunks, args.path)
+
+    elapsed = time.perf_counter() - start_time
+    print(f"✅ Wrote {written:,} students in {elapsed:.1f}s ({written / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
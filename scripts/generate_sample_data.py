@@ -4,16 +4,16 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import pandas as pd
 from datetime import datetime, timedelta
-from app.database import SessionLocal, engine, Base
+from app.database import SessionLocal, engine, Base, add_missing_columns
 from app.models import Student
+from app.repositories import HometownRepository
+from app.repositories.student_repository import with_folded
+from app.utils.text_normalization import fold_for_search
 # from analysis.clean_data import clean_student_data
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 CSV_DIR = os.path.join(BASE_DIR, 'data')
 
-# Create tables
-Base.metadata.create_all(bind=engine)
-
 """
 Generate Beautiful Sample Students Data
 Creates 100 realistic Vietnamese student records
@@ -125,26 +125,8 @@ def generate_birth_date():
     return (start_date + timedelta(days=random_days)).isoformat()
 
 def remove_vietnamese_accents(text):
-    """Remove Vietnamese accents from text"""
-    accents = {
-        'á': 'a', 'à': 'a', 'ả': 'a', 'ã': 'a', 'ạ': 'a',
-        'ă': 'a', 'ắ': 'a', 'ằ': 'a', 'ẳ': 'a', 'ẵ': 'a', 'ặ': 'a',
-        'â': 'a', 'ấ': 'a', 'ầ': 'a', 'ẩ': 'a', 'ẫ': 'a', 'ậ': 'a',
-        'đ': 'd',
-        'é': 'e', 'è': 'e', 'ẻ': 'e', 'ẽ': 'e', 'ẹ': 'e',
-        'ê': 'e', 'ế': 'e', 'ề': 'e', 'ể': 'e', 'ễ': 'e', 'ệ': 'e',
-        'í': 'i', 'ì': 'i', 'ỉ': 'i', 'ĩ': 'i', 'ị': 'i',
-        'ó': 'o', 'ò': 'o', 'ỏ': 'o', 'õ': 'o', 'ọ': 'o',
-        'ô': 'o', 'ố': 'o', 'ồ': 'o', 'ổ': 'o', 'ỗ': 'o', 'ộ': 'o',
-        'ơ': 'o', 'ớ': 'o', 'ờ': 'o', 'ở': 'o', 'ỡ': 'o', 'ợ': 'o',
-        'ú': 'u', 'ù': 'u', 'ủ': 'u', 'ũ': 'u', 'ụ': 'u',
-        'ư': 'u', 'ứ': 'u', 'ừ': 'u', 'ử': 'u', 'ữ': 'u', 'ự': 'u',
-        'ý': 'y', 'ỳ': 'y', 'ỷ': 'y', 'ỹ': 'y', 'ỵ': 'y',
-    }
-    result = text.lower()
-    for viet, eng in accents.items():
-        result = result.replace(viet, eng)
-    return result
+    """Remove Vietnamese accents from text (lowercase, dùng bảng tra chung của app.utils)"""
+    return fold_for_search(text)
 
 def generate_students(count=100):
     """Generate beautiful student data"""
@@ -266,6 +248,10 @@ def create_data():
 def main():
     print("Generating 100 sample students...")
     
+    # Create tables (trong main, để import module này không đụng tới database)
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(Student.__table__)
+    
     db = SessionLocal()
     try:
         # Clear existing data
@@ -276,12 +262,13 @@ def main():
         with open('data/sample_students_100.json', 'r', encoding='utf-8') as f:
             student_data = json.load(f)
         
+        hometown_repository = HometownRepository(db)
         students = []
         for data in student_data:
             if 'date_of_birth' in data and data['date_of_birth']:
                 data['date_of_birth'] = datetime.fromisoformat(data['date_of_birth']).date()
                 
-            student = Student(**data)
+            student = Student(**hometown_repository.with_hometown_id(with_folded(data)))
             students.append(student)
 
         db.bulk_save_objects(students)
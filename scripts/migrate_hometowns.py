@@ -0,0 +1,56 @@
+"""
+Migrate quê quán của database cũ sang bảng hometowns (chạy 1 lần)
+Điền hometown_id từ cột chuỗi cũ (students.hometown), tùy chọn xóa các cột cũ
+
+Server không tự chạy bước này lúc khởi động (chỉ log cảnh báo nếu còn dữ liệu
+chưa chuyển). Nên backup file database trước khi xóa cột:
+    cp students.db students.db.bak
+    python scripts/migrate_hometowns.py                       # chỉ điền hometown_id
+    python scripts/migrate_hometowns.py --drop-legacy-columns # điền rồi xóa cột cũ
+
+Cột cũ chỉ bị xóa khi mọi sinh viên có quê quán ở cột cũ đều đã có hometown_id.
+Chạy `VACUUM` sau khi xóa để thu hồi dung lượng file.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+
+from app.database import SessionLocal, engine, Base, drop_columns
+from app.models import LEGACY_HOMETOWN_COLUMNS, Student
+from app.services import StudentService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--drop-legacy-columns", action="store_true",
+        help=f"Xóa các cột cũ ({', '.join(LEGACY_HOMETOWN_COLUMNS)}) sau khi kiểm tra đã chuyển hết"
+    )
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        service = StudentService(db)
+        updated = service.backfill_hometowns()
+        unmigrated = service.count_unmigrated_hometowns()
+
+    if unmigrated is None:
+        print("✅ Database không còn cột quê quán cũ, không cần migrate")
+        return
+    print(f"✅ Đã điền hometown_id cho {updated} sinh viên")
+    if unmigrated:
+        print(f"❌ Còn {unmigrated} sinh viên chưa có hometown_id, không xóa cột cũ")
+        sys.exit(1)
+
+    if not args.drop_legacy_columns:
+        print("⚠️  Giữ các cột cũ; chạy lại với --drop-legacy-columns để xóa (nên backup trước)")
+        return
+    dropped = drop_columns(Student.__table__, LEGACY_HOMETOWN_COLUMNS)
+    print(f"✅ Đã xóa cột: {', '.join(dropped)} (chạy VACUUM để thu hồi dung lượng)")
+
+
+if __name__ == "__main__":
+    main()
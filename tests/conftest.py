@@ -0,0 +1,49 @@
+"""
+Pytest fixtures
+Chạy API trên database SQLite tạm, bật QUERY_BUDGET_STRICT=1: endpoint nào chạy
+nhiều câu SQL hơn @query_budget thì request raise QueryBudgetExceeded và test fail
+"""
+
+import os
+import tempfile
+
+# Đặt trước khi import app (engine / strict mode / metrics đọc biến môi trường lúc import)
+_DATABASE_DIR = tempfile.mkdtemp(prefix="student-api-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DATABASE_DIR}/students.db"
+os.environ["QUERY_BUDGET_STRICT"] = "1"
+os.environ["WARMUP_ON_STARTUP"] = "0"
+os.environ["ANALYTICS_SNAPSHOT_ENABLED"] = "0"
+os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from app.database import engine
+from app.main import app
+from app.models import Student, StudentChange, StudentChangeCompaction
+from app.services.analytics_service import _analytics_cache
+from app.services.student_service import _student_list_cache
+
+
+@pytest.fixture(scope="session")
+def app_client():
+    """TestClient dùng chung cho cả session (lifespan chạy 1 lần)"""
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def client(app_client):
+    """TestClient trên database rỗng (xóa sinh viên, change log và cache của test trước)"""
+    with engine.begin() as conn:
+        for model in (StudentChange, StudentChangeCompaction, Student):
+            conn.execute(delete(model))
+    _student_list_cache.clear()
+    _analytics_cache.clear()
+    return app_client
+
+
+def query_count(response) -> int:
+    """Số câu SQL request đã chạy (header X-DB-Query-Count)"""
+    return int(response.headers["x-db-query-count"])
@@ -0,0 +1,84 @@
+"""
+Admission control: quá tải -> 503 + Retry-After, slot không bị mất khi request bị hủy
+"""
+
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from app.middleware.admission import AdmissionControlMiddleware, AdmissionLimit, _GroupLimiter
+
+
+def make_app(limit: AdmissionLimit, release: asyncio.Event) -> FastAPI:
+    """App chỉ có route của nhóm "search", handler chờ tới khi release được set"""
+    app = FastAPI()
+
+    @app.get("/api/students/")
+    async def list_students():
+        await release.wait()
+        return {"ok": True}
+
+    @app.get("/api/students/{student_id}")
+    async def get_student(student_id: int):
+        return {"id": student_id}
+
+    app.add_middleware(AdmissionControlMiddleware, limits={"search": limit})
+    return app
+
+
+async def send_concurrently(limit: AdmissionLimit, requests: int, release_after: float):
+    release = asyncio.Event()
+    transport = httpx.ASGITransport(app=make_app(limit, release))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        pending = [asyncio.create_task(client.get("/api/students/")) for _ in range(requests)]
+        await asyncio.sleep(release_after)
+        release.set()
+        responses = await asyncio.gather(*pending)
+        # Route không thuộc nhóm nào không bị giới hạn
+        other = await client.get("/api/students/1")
+    return responses, other
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    limit = AdmissionLimit(concurrency=1, queue=1, timeout=5)
+    responses, other = asyncio.run(send_concurrently(limit, requests=4, release_after=0.1))
+
+    assert sorted(r.status_code for r in responses) == [200, 200, 503, 503]
+    rejected = [r for r in responses if r.status_code == 503]
+    assert all(r.headers["retry-after"] == "5" for r in rejected)
+    assert other.status_code == 200
+
+
+def test_queue_timeout_is_rejected():
+    limit = AdmissionLimit(concurrency=1, queue=4, timeout=0.05)
+    responses, _ = asyncio.run(send_concurrently(limit, requests=3, release_after=0.3))
+
+    assert sorted(r.status_code for r in responses) == [200, 503, 503]
+    assert all(r.headers["retry-after"] == "1" for r in responses if r.status_code == 503)
+
+
+def test_cancelled_waiter_returns_granted_slot(monkeypatch):
+    # wait_for của Python 3.12+: vẫn raise CancelledError dù waiter đã nhận slot
+    async def wait_for(future, timeout):
+        async with asyncio.timeout(timeout):
+            return await future
+
+    monkeypatch.setattr(asyncio, "wait_for", wait_for)
+
+    async def scenario():
+        limiter = _GroupLimiter("search", AdmissionLimit(concurrency=1, queue=1, timeout=5))
+        assert await limiter.acquire() is None
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        limiter.release()  # chuyển slot cho waiter
+        waiter.cancel()  # client ngắt kết nối đúng lúc đó
+        try:
+            await waiter
+            limiter.release()
+        except asyncio.CancelledError:
+            pass
+        return limiter.active, len(limiter.waiters)
+
+    assert asyncio.run(scenario()) == (0, 0)
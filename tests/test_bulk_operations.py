@@ -0,0 +1,100 @@
+"""
+Bulk update / bulk delete (PATCH /api/students/bulk, POST /api/students/bulk-delete)
+"""
+
+import pytest
+
+from conftest import query_count
+
+
+@pytest.fixture
+def students(client):
+    """1200 sinh viên S0000..S1199, họ Nguyễn (chẵn) / Trần (lẻ); trả về mã -> id"""
+    client.post("/api/students/bulk", json=[
+        {"student_code": f"S{i:04d}", "last_name": "Nguyễn" if i % 2 == 0 else "Trần"}
+        for i in range(1200)
+    ])
+    codes = [f"S{i:04d}" for i in range(1200)]
+    results = client.post("/api/students/batch-get", json={"student_codes": codes[:1000]}).json()["results"]
+    results += client.post("/api/students/batch-get", json={"student_codes": codes[1000:]}).json()["results"]
+    return {item["student_code"]: item["student"]["id"] for item in results}
+
+
+def get_by_code(client, code):
+    return client.get(f"/api/students/by-code/{code}").json()
+
+
+def test_bulk_update_mixes_ids_codes_and_field_sets(client, students):
+    items = [{"id": students["S0000"], "fields": {"math_score": 1}},
+             {"student_code": "S0001", "fields": {"math_score": 2}},
+             {"student_code": "S0002", "fields": {"english_score": 3, "hometown": "Huế"}},
+             {"id": students["S0003"], "fields": {"student_code": "S0003X"}},
+             {"student_code": "missing", "fields": {"math_score": 1}},
+             {"id": 999999, "fields": {"math_score": 1}}]
+    response = client.patch("/api/students/bulk", json=items)
+
+    assert response.status_code == 200
+    assert response.json()["affected"] == 4
+    assert get_by_code(client, "S0000")["math_score"] == 1
+    assert get_by_code(client, "S0001")["math_score"] == 2
+    assert get_by_code(client, "S0002")["english_score"] == 3
+    assert get_by_code(client, "S0002")["hometown"] == "Huế"
+    assert get_by_code(client, "S0003X")["id"] == students["S0003"]
+
+
+def test_bulk_update_many_chunks_and_field_sets(client, students):
+    items = [
+        {"student_code": code, "fields": {"math_score": 5} if i % 2 else {"english_score": 5}}
+        if i % 3 else {"id": students[code], "fields": {"literature_score": 5}}
+        for i, code in enumerate(sorted(students)[:1100])
+    ]
+    response = client.patch("/api/students/bulk", json=items)
+
+    assert response.status_code == 200
+    assert response.json()["affected"] == 1100
+    # SELECT id theo mã (2 chunk) + UPDATE (3 tập field) + change log (3 chunk)
+    assert query_count(response) == 8
+    assert get_by_code(client, "S0001")["math_score"] == 5
+    assert get_by_code(client, "S0002")["english_score"] == 5
+    assert get_by_code(client, "S0003")["literature_score"] == 5
+    assert get_by_code(client, "S1100")["math_score"] is None
+
+
+def test_bulk_update_logs_changes_with_new_codes(client, students):
+    head = client.get("/api/students/changes", params={"since": 0, "limit": 5000}).json()["next_since"]
+    client.patch("/api/students/bulk", json=[
+        {"student_code": "S0000", "fields": {"student_code": "S0000X"}},
+        {"student_code": "S0001", "fields": {"math_score": 5}},
+    ])
+
+    changes = client.get("/api/students/changes", params={"since": head}).json()["changes"]
+    assert [(c["op"], c["student_code"]) for c in changes] == [("upsert", "S0000X"), ("upsert", "S0001")]
+
+
+@pytest.mark.parametrize("items", [
+    [{"id": 1, "fields": {"math_score": 1}}, {"id": 1, "fields": {"math_score": 2}}],
+    [{"student_code": "S0000", "fields": {"student_code": "S0001"}}],
+])
+def test_bulk_update_rejects_duplicates(client, students, items):
+    items = [
+        {**item, "id": students["S0000"]} if "id" in item else item
+        for item in items
+    ]
+    assert client.patch("/api/students/bulk", json=items).status_code == 400
+    assert get_by_code(client, "S0000")["math_score"] is None
+
+
+def test_bulk_delete_by_ids_codes_and_search(client, students):
+    # 699 id (2 chunk), chỉ xóa các sinh viên họ Nguyễn trong danh sách
+    ids = [students[f"S{i:04d}"] for i in range(699)]
+    response = client.post("/api/students/bulk-delete", json={"ids": ids, "search": "nguyen"})
+    assert response.json()["affected"] == 350
+
+    response = client.post("/api/students/bulk-delete", json={"student_codes": ["S0001", "S0003", "missing"]})
+    assert response.json()["affected"] == 2
+
+    response = client.post("/api/students/bulk-delete", json={"search": "Trần"})
+    assert response.json()["affected"] == 598
+    assert client.get("/api/students/").json()["total"] == 250
+
+    assert client.post("/api/students/bulk-delete", json={}).status_code == 422
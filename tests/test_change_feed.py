@@ -0,0 +1,64 @@
+"""
+Change feed (GET /api/students/changes) và compaction của change log
+"""
+
+from app.database import SessionLocal
+from app.services import StudentService
+
+
+def compact(tombstone_retention_days: float = 0):
+    with SessionLocal() as db:
+        return StudentService(db).compact_change_log(tombstone_retention_days)
+
+
+def feed(client, since, limit=1000):
+    return client.get("/api/students/changes", params={"since": since, "limit": limit})
+
+
+def test_feed_returns_latest_change_per_student(client):
+    first = client.post("/api/students/", json={"student_code": "A1"}).json()
+    client.post("/api/students/bulk", json=[{"student_code": f"B{i}"} for i in range(3)])
+    head = feed(client, 0).json()["next_since"]
+
+    client.put(f"/api/students/{first['id']}", json={"math_score": 5})
+    client.put(f"/api/students/{first['id']}", json={"math_score": 6})
+    client.post("/api/students/bulk-delete", json={"student_codes": ["B1"]})
+
+    changes = feed(client, head).json()["changes"]
+    assert [(c["op"], c["student_code"]) for c in changes] == [("upsert", "A1"), ("delete", "B1")]
+    assert changes[0]["student"]["math_score"] == 6
+    assert changes[1]["student"] is None
+
+    page = feed(client, 0, limit=2).json()
+    assert page["has_more"] and len(page["changes"]) == 2
+
+
+def test_since_below_watermark_is_gone(client):
+    client.post("/api/students/bulk", json=[{"student_code": f"B{i}"} for i in range(3)])
+    stale_since = feed(client, 0).json()["next_since"]
+    client.post("/api/students/bulk-delete", json={"student_codes": ["B0", "B1"]})
+    client.put("/api/students/3", json={"math_score": 1})
+
+    # Tombstone mới ghi vẫn được giữ trong thời gian retention
+    assert compact(tombstone_retention_days=7)[1] == 0
+    assert feed(client, stale_since).status_code == 200
+
+    removed, watermark = compact()
+    assert removed > 0 and watermark > stale_since
+    assert feed(client, stale_since).status_code == 410
+    assert feed(client, watermark).status_code == 200
+    # since=0: đồng bộ lại từ đầu, chỉ còn sinh viên hiện có
+    assert [c["student_code"] for c in feed(client, 0).json()["changes"]] == ["B2"]
+
+
+def test_compaction_does_not_revive_cached_pages(client):
+    deleted = client.post("/api/students/", json={"student_code": "K2"}).json()
+    client.post("/api/students/", json={"student_code": "K1"})
+    assert client.get("/api/students/").json()["total"] == 2
+
+    client.put(f"/api/students/{deleted['id']}", json={"math_score": 5})
+    client.delete(f"/api/students/{deleted['id']}")
+    compact()
+
+    # Tombstone mới nhất đã bị xóa: version của cache không được lùi về trang đã cache ở trên
+    assert client.get("/api/students/").json()["total"] == 1
@@ -0,0 +1,80 @@
+"""
+Query budget (QUERY_BUDGET_STRICT=1): CRUD, batch-get và bulk endpoint chạy
+trong số câu SQL đã khai báo bằng @query_budget
+"""
+
+import pytest
+
+from app.controllers import student_controller
+from app.monitoring import QueryBudgetExceeded
+from conftest import query_count
+
+
+def test_crud_endpoints_stay_within_budget(client):
+    created = client.post("/api/students/", json={
+        "student_code": "SV001", "first_name": "Minh", "last_name": "Nguyễn", "hometown": "Hà Nội",
+    })
+    assert created.status_code == 201
+    student_id = created.json()["id"]
+    assert query_count(created) <= 3
+
+    assert client.get(f"/api/students/{student_id}").json()["hometown"] == "Hà Nội"
+    assert client.get("/api/students/by-code/SV001").json()["id"] == student_id
+    assert client.get("/api/students/999999").status_code == 404
+
+    updated = client.put(f"/api/students/{student_id}", json={"math_score": 9.5, "hometown": "Huế"})
+    assert updated.status_code == 200
+    assert updated.json()["math_score"] == 9.5
+    assert updated.json()["hometown"] == "Huế"
+
+    params = {"search": "nguyen", "skip": 0, "limit": 10}
+    assert client.get("/api/students/", params=params).json()["total"] == 1
+    # Lần 2 là cache hit (chỉ đọc version của change log)
+    assert query_count(client.get("/api/students/", params=params)) == 1
+
+    assert client.delete(f"/api/students/{student_id}").status_code == 200
+    assert client.get(f"/api/students/{student_id}").status_code == 404
+    assert client.get("/api/students/").json()["total"] == 0
+
+
+def test_batch_get_uses_one_query_per_key_type(client):
+    client.post("/api/students/bulk", json=[{"student_code": f"B{i}"} for i in range(10)])
+    ids = [row["id"] for row in client.get("/api/students/", params={"limit": 3}).json()["students"]]
+
+    response = client.post("/api/students/batch-get", json={
+        "ids": ids + [999999], "student_codes": ["B7", "B8", "missing"],
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["found"], body["not_found"]) == (5, 2)
+    assert [item["found"] for item in body["results"]] == [True, True, True, False, True, True, False]
+    assert query_count(response) <= 2
+
+
+def test_bulk_endpoints_scale_budget_with_chunks(client):
+    # 1200 sinh viên: 3 chunk (BULK_CHUNK_SIZE = 500) cho SELECT mã đã có và change log
+    hometowns = ["Hà Nội", "Đà Nẵng", "TP. Hồ Chí Minh"]
+    response = client.post("/api/students/bulk", json=[
+        {"student_code": f"S{i:04d}", "hometown": hometowns[i % 3]} for i in range(1200)
+    ])
+    assert response.status_code == 200
+    assert client.get("/api/students/").json()["total"] == 1200
+
+    response = client.patch("/api/students/bulk", json=[
+        {"student_code": f"S{i:04d}", "fields": {"math_score": 8}} for i in range(1100)
+    ])
+    assert response.json()["affected"] == 1100
+
+    response = client.post("/api/students/bulk-delete", json={
+        "student_codes": [f"S{i:04d}" for i in range(1100)],
+    })
+    assert response.json()["affected"] == 1100
+    assert client.get("/api/students/").json()["total"] == 100
+
+
+def test_strict_mode_raises_when_budget_is_exceeded(client, monkeypatch):
+    student_id = client.post("/api/students/", json={"student_code": "SV001"}).json()["id"]
+    monkeypatch.setattr(student_controller.get_student, "__query_budget__", 0)
+
+    with pytest.raises(QueryBudgetExceeded):
+        client.get(f"/api/students/{student_id}")
@@ -0,0 +1,56 @@
+"""
+Tìm kiếm không dấu / không phân biệt hoa thường (GET /api/students/?search=)
+"""
+
+import pytest
+
+
+def codes(client, search):
+    students = client.get("/api/students/", params={"search": search}).json()["students"]
+    return sorted(student["student_code"] for student in students)
+
+
+@pytest.fixture
+def students(client):
+    client.post("/api/students/bulk", json=[
+        {"student_code": "A1", "first_name": "Hồng", "last_name": "Nguyễn", "hometown": "TP. Hồ Chí Minh"},
+        {"student_code": "A2", "first_name": "Ánh", "last_name": "Lê", "hometown": "Sài Gòn"},
+        {"student_code": "A3", "first_name": "Đức", "last_name": "Đặng", "hometown": "Hà Nội"},
+        {"student_code": "A4", "first_name": "Lan", "last_name": "Trần", "hometown": "Huế"},
+    ])
+
+
+@pytest.mark.parametrize("search, expected", [
+    ("nguyen", ["A1"]),
+    ("NGUYỄN", ["A1"]),
+    ("anh", ["A2"]),
+    ("dang", ["A3"]),
+    ("ĐẶNG", ["A3"]),
+    ("a", ["A1", "A2", "A3", "A4"]),
+])
+def test_search_folds_accents_and_case(client, students, search, expected):
+    assert codes(client, search) == expected
+
+
+@pytest.mark.parametrize("search, expected", [
+    ("Hồ Chí Minh", ["A1", "A2"]),
+    ("ho chi minh", ["A1", "A2"]),
+    ("Sài Gòn", ["A1", "A2"]),
+    ("tp.hcm", ["A1", "A2"]),
+    ("ha noi", ["A3"]),
+    ("HN", ["A3"]),
+    ("hue", ["A4"]),
+])
+def test_search_matches_hometown_aliases(client, students, search, expected):
+    assert codes(client, search) == expected
+
+
+def test_search_follows_updates(client, students):
+    student_id = client.get("/api/students/by-code/A1").json()["id"]
+    client.put(f"/api/students/{student_id}", json={"last_name": "Trần"})
+    client.patch("/api/students/bulk", json=[{"student_code": "A4", "fields": {"hometown": "Hải Phòng"}}])
+
+    assert codes(client, "nguyen") == []
+    assert codes(client, "tran") == ["A1", "A4"]
+    assert codes(client, "hue") == []
+    assert codes(client, "hai phong") == ["A4"]